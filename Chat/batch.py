@@ -0,0 +1,119 @@
+"""
+@file batch.py
+@brief Nicht-interaktiver Einstiegspunkt des SLCP-Clients für skriptgesteuertes Senden.
+
+Aufruf: `python -m Chat.batch befehle.txt --handle Bot --port 5001 --whoisport 4000`
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from Chat.common import log
+from Chat.config.config import Config
+from Chat.network.messenger import Messenger
+from Chat.client.batch_runner import BatchRunner, load_commands
+
+
+def parse_args(argv=None):
+    """
+    @brief Liest die Kommandozeilenargumente des Batch-Modus.
+
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return argparse.Namespace mit den Argumenten
+    """
+    parser = argparse.ArgumentParser(description="SLCP-Chat im Batch-Modus (ohne Eingabeaufforderung)")
+    parser.add_argument("script", help="Befehlsskript (CLI-Format) oder JSON-Lines-Datei (.jsonl)")
+    parser.add_argument("--config", default="slcp_config.toml", help="Pfad zur TOML-Konfigurationsdatei")
+    parser.add_argument("--handle", help="Benutzername (überschreibt Konfiguration)")
+    parser.add_argument("--port", type=int, help="Port für UDP/TCP (überschreibt Konfiguration)")
+    parser.add_argument("--whoisport", type=int, help="Whois-Port (überschreibt Konfiguration)")
+    parser.add_argument("--imagepath", help="Verzeichnis für empfangene Bilder")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximale parallele Befehle")
+    parser.add_argument("--discover", type=float, default=1.0,
+                        help="Sekunden, die nach WHO auf Antworten gewartet wird (0 = kein WHO)")
+    parser.add_argument("--peer", action="append", default=[], metavar="HANDLE=IP:PORT",
+                        help="Bekannten Peer vorab eintragen (mehrfach möglich)")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON-Lines ausgeben")
+    parser.add_argument("--verbose", action="store_true", help="Statusmeldungen des Messengers auf stderr ausgeben")
+    return parser.parse_args(argv)
+
+
+def parse_peer(spec):
+    """
+    @brief Zerlegt eine Peer-Angabe der Form HANDLE=IP:PORT.
+
+    @param spec Peer-Angabe als String
+    @return Tupel (handle, (ip, port))
+    """
+    handle, address = spec.split("=", 1)
+    ip, port = address.rsplit(":", 1)
+    return handle, (ip, int(port))
+
+
+async def main(argv=None):
+    """
+    @brief Führt ein Befehlsskript ohne Benutzerinteraktion aus.
+
+    Ablauf:
+    1. Konfiguration aus Datei und Argumenten laden (keine Eingabeaufforderung).
+    2. Messenger starten (JOIN) und optional per WHO Peers ermitteln.
+    3. Befehle mit begrenzter Parallelität ausführen.
+    4. Ergebnisse pro Befehl und Gesamtdurchsatz ausgeben, LEAVE senden.
+
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return Exit-Code: 0 wenn alle Befehle erfolgreich waren, sonst 1
+    """
+    args = parse_args(argv)
+    overrides = {
+        "handle": args.handle,
+        "port": args.port,
+        "whoisport": args.whoisport,
+        "imagepath": args.imagepath,
+        "quiet": True,
+    }
+    try:
+        config = Config(args.config, overrides, interactive=False)
+    except ValueError as e:
+        print(f"[Error] {e}", file=sys.stderr)
+        return 2
+
+    log.configure(config.log_level, config.log_file)
+    commands = load_commands(args.script)
+
+    messenger = Messenger(config)
+    messenger.output = (lambda text: print(text, file=sys.stderr)) if args.verbose else (lambda text: None)
+    for spec in args.peer:
+        handle, address = parse_peer(spec)
+        messenger.add_peer(handle, address)
+
+    await messenger.start_listener()
+    if args.discover > 0:
+        await messenger.send_who()
+        await asyncio.sleep(args.discover)
+
+    runner = BatchRunner(messenger, args.concurrency)
+    results, elapsed = await runner.run(commands)
+    summary = runner.summary(results, elapsed)
+
+    for r in results:
+        if args.json:
+            print(json.dumps(r, ensure_ascii=False))
+        else:
+            status = "OK  " if r["ok"] else "FAIL"
+            target = f" {r['to']}" if r["to"] else ""
+            error = f" – {r['error']}" if r["error"] else ""
+            print(f"{status} #{r['index']} {r['cmd']}{target} ({r['duration_ms']} ms){error}")
+
+    if args.json:
+        print(json.dumps({"summary": summary}))
+    else:
+        print(f"[BATCH] {summary['total']} Befehle, {summary['ok']} erfolgreich, {summary['failed']} "
+              f"fehlgeschlagen in {summary['elapsed_s']:.3f} s ({summary['commands_per_s']} Befehle/s)")
+
+    await messenger.send_leave()
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,179 @@
+"""
+@file batch_runner.py
+@brief Nicht-interaktive Ausführung von SLCP-Befehlen (Batch-Modus).
+Liest Befehlsskripte oder JSON-Lines-Dateien und führt die Befehle mit begrenzter Parallelität
+über den Messenger aus.
+"""
+
+import asyncio
+import json
+import time
+
+## Unterstützte Befehle und ihre Pflichtfelder
+COMMAND_FIELDS = {
+    "msg": ("to", "text"),
+    "img": ("to", "path"),
+    "who": (),
+    "join": (),
+    "leave": (),
+}
+
+
+def parse_script_line(line):
+    """
+    @brief Wandelt eine Skriptzeile im CLI-Format in ein Befehls-Dictionary um.
+
+    Beispiele: `/msg Bob Hallo`, `/img Bob bild.png`, `/who`. Leere Zeilen und
+    Kommentare (beginnend mit #) werden übersprungen.
+
+    @param line Skriptzeile
+    @return Befehls-Dictionary oder None für Leer-/Kommentarzeilen
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    parts = line.split(" ", 2)
+    cmd = parts[0].lstrip("/")
+    if cmd == "msg" and len(parts) == 3:
+        return {"cmd": "msg", "to": parts[1], "text": parts[2]}
+    if cmd == "img" and len(parts) == 3:
+        return {"cmd": "img", "to": parts[1], "path": parts[2]}
+    if cmd in ("who", "join", "leave") and len(parts) == 1:
+        return {"cmd": cmd}
+    return {"cmd": "invalid", "raw": line}
+
+
+def parse_json_line(line):
+    """
+    @brief Wandelt eine JSON-Lines-Zeile in ein Befehls-Dictionary um.
+
+    Beispiel: `{"cmd": "msg", "to": "Bob", "text": "Hallo"}`
+
+    @param line JSON-Zeile
+    @return Befehls-Dictionary oder None für Leerzeilen
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        command = json.loads(line)
+    except ValueError:
+        return {"cmd": "invalid", "raw": line}
+    if not isinstance(command, dict):
+        return {"cmd": "invalid", "raw": line}
+    return command
+
+
+def load_commands(path):
+    """
+    @brief Lädt alle Befehle aus einer Skript- oder JSON-Lines-Datei.
+
+    Dateien mit der Endung .jsonl oder .json werden als JSON-Lines gelesen, alle anderen
+    als Skript im CLI-Format.
+
+    @param path Pfad zur Befehlsdatei
+    @return Liste von Befehls-Dictionaries
+    """
+    parse = parse_json_line if path.endswith((".jsonl", ".json")) else parse_script_line
+    with open(path, "r", encoding="utf-8") as f:
+        return [c for c in (parse(line) for line in f) if c is not None]
+
+
+class BatchRunner:
+    """
+    @class BatchRunner
+    @brief Führt Befehle nebenläufig mit begrenzter Parallelität über einen Messenger aus.
+
+    Kann direkt aus Python verwendet werden (`await runner.run(commands)`) oder über den
+    Einstiegspunkt `python -m Chat.batch`. Für jeden Befehl wird ein Ergebnis mit Erfolg,
+    Fehlermeldung und Dauer erzeugt.
+    """
+
+    def __init__(self, messenger, concurrency=16):
+        """
+        @brief Konstruktor des BatchRunners.
+
+        @param messenger Gestartete Messenger-Instanz
+        @param concurrency Maximale Anzahl gleichzeitig laufender Befehle
+        """
+        self.messenger = messenger
+        self.concurrency = concurrency
+
+    async def execute(self, command):
+        """
+        @brief Führt einen einzelnen Befehl aus.
+
+        @param command Befehls-Dictionary (z. B. {"cmd": "msg", "to": "Bob", "text": "Hallo"});
+                       bei "msg" darf "to" auch eine Liste, "Bob,Alice" oder ein Gruppenname sein
+        @return Tupel (ok, fehler) – fehler ist None bei Erfolg
+        """
+        cmd = command.get("cmd")
+        if cmd not in COMMAND_FIELDS:
+            return False, f"Ungültiger Befehl: {command.get('raw', cmd)}"
+        missing = [field for field in COMMAND_FIELDS[cmd] if field not in command]
+        if missing:
+            return False, f"Fehlende Felder: {', '.join(missing)}"
+
+        if cmd == "msg":
+            recipients = self.messenger.resolve_recipients(command["to"])
+            results = await self.messenger.send_message_many(recipients, command["text"])
+            failed = [h for h, sent in results.items() if not sent]
+            if failed or not results:
+                return False, f"Nicht zugestellt an: {', '.join(failed)}" if failed else "Keine Empfänger"
+            return True, None
+        if cmd == "img":
+            ok = await self.messenger.send_image(command["to"], command["path"])
+        elif cmd == "who":
+            ok = await self.messenger.send_who()
+        elif cmd == "join":
+            ok = await self.messenger.send_join()
+        else:
+            ok = await self.messenger.send_leave()
+        return bool(ok), None if ok else "Senden fehlgeschlagen"
+
+    async def run(self, commands):
+        """
+        @brief Führt alle Befehle mit begrenzter Parallelität aus.
+
+        @param commands Liste von Befehls-Dictionaries
+        @return Tupel (results, elapsed): Ergebnisliste in Eingabereihenfolge und Gesamtdauer in Sekunden
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(index, command):
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    ok, error = await self.execute(command)
+                except Exception as e:
+                    ok, error = False, str(e)
+                return {
+                    "index": index,
+                    "cmd": command.get("cmd"),
+                    "to": command.get("to"),
+                    "ok": ok,
+                    "error": error,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                }
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_one(i, c) for i, c in enumerate(commands)))
+        return list(results), time.perf_counter() - start
+
+    @staticmethod
+    def summary(results, elapsed):
+        """
+        @brief Fasst die Ergebnisse eines Laufs zusammen.
+
+        @param results Ergebnisliste aus run()
+        @param elapsed Gesamtdauer in Sekunden
+        @return Dictionary mit total, ok, failed, elapsed_s und commands_per_s
+        """
+        ok = sum(1 for r in results if r["ok"])
+        return {
+            "total": len(results),
+            "ok": ok,
+            "failed": len(results) - ok,
+            "elapsed_s": round(elapsed, 6),
+            "commands_per_s": round(len(results) / elapsed, 1) if elapsed > 0 else None,
+        }
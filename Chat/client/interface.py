@@ -7,6 +7,9 @@ Stellt Eingabe, Ausgabe und Nutzerinteraktion über Terminal bereit.
 import asyncio
 import os
 from colorama import Fore, Style, init
+from Chat.client.renderer import Renderer
+from Chat.client.stdin_reader import StdinReader
+from Chat.network.memory import rss_bytes
 
 class Interface:
     """
@@ -21,7 +24,7 @@ class Interface:
     um Statusnachrichten und Befehle übersichtlicher darzustellen.
     """
 
-    def __init__(self, config, messenger):
+    def __init__(self, config, messenger, renderer=None, stdin=None):
         """
         @brief Konstruktor der Interface-Klasse.
 
@@ -30,9 +33,17 @@ class Interface:
 
         @param config Ein Konfigurationsobjekt mit Nutzername, Port, Autoreply etc.
         @param messenger Eine Messenger-Instanz, die SLCP-Nachrichten verarbeitet und verschickt
+        @param renderer Optionaler Renderer für gebündelte Ausgabe (Standard: aus config.render_fps/config.quiet)
+        @param stdin Optionaler StdinReader für die Befehlseingabe (Standard: sys.stdin)
         """
         self.config = config
         self.messenger = messenger
+        self.renderer = renderer or Renderer(fps=config.render_fps, quiet=config.quiet)
+        self.stdin = stdin or StdinReader()
+        # Eigene Zeilenbearbeitung im Terminal, damit Frames die angefangene Eingabe neu zeichnen
+        self.stdin.on_edit = self.renderer.echo_input
+        self.renderer.pending_input = self.stdin.pending_input
+        self.uploads = set()  # Laufende /img-Aufträge (im Hintergrund, damit /transfers und /cancel möglich sind)
         init()  # Initialisiere colorama (Farben für Terminalausgabe)
 
     async def run(self):
@@ -42,31 +53,42 @@ class Interface:
         Die Methode zeigt verfügbare Befehle an, liest Eingaben von der Konsole
         (z. B. /join, /msg, /img), prüft diese auf Gültigkeit und ruft entsprechende
         Messenger-Methoden zur Verarbeitung auf. Sie läuft bis der Befehl /quit ausgeführt wird.
+        Alle Ausgaben laufen über den Renderer, der sie gebündelt ausgibt. Eingaben werden
+        asynchron über den StdinReader gelesen; bei Dateiende (z. B. gepipte Skripte) wird
+        wie bei /quit beendet.
         """
-        print(f"{Fore.GREEN}🟢 Willkommen im SLCP-Chat, {self.config.handle}!{Style.RESET_ALL}")
-        print(f"""{Fore.CYAN}
+        self.renderer.start()
+        self.stdin.start(line_editing=not self.renderer.quiet)
+        self.renderer.emit(f"{Fore.GREEN}🟢 Willkommen im SLCP-Chat, {self.config.handle}!{Style.RESET_ALL}")
+        self.renderer.emit(f"""{Fore.CYAN}
 Verfügbare Befehle:
   {Fore.YELLOW}/join{Fore.CYAN} - Dem Chat beitreten
   {Fore.YELLOW}/leave{Fore.CYAN} - Chat verlassen
   {Fore.YELLOW}/who{Fore.CYAN} - Aktive Benutzer anzeigen
-  {Fore.YELLOW}/msg <handle> <text>{Fore.CYAN} - Nachricht senden
+  {Fore.YELLOW}/msg <handle> <text>{Fore.CYAN} - Nachricht senden (auch Bob,Alice oder Gruppenname)
   {Fore.YELLOW}/img <handle> <pfad>{Fore.CYAN} - Bild senden
+  {Fore.YELLOW}/transfers{Fore.CYAN} - Laufende und wartende Bildübertragungen anzeigen
+  {Fore.YELLOW}/cancel <id>{Fore.CYAN} - Bildübertragung abbrechen
+  {Fore.YELLOW}/lag{Fore.CYAN} - Verzögerung des Eventloops und blockierende Callbacks anzeigen
+  {Fore.YELLOW}/mem [trace|stop]{Fore.CYAN} - Speicherverbrauch und größte Allokationsstellen anzeigen
   {Fore.YELLOW}/quit{Fore.CYAN} - Chat beenden
 {Style.RESET_ALL}""")
 
         while True:
             try:
-                # Eingabe vom Nutzer in einem eigenen Thread lesen (blockierend)
-                command = await asyncio.to_thread(input, f"{Fore.MAGENTA}>> {Style.RESET_ALL}")
-                command = command.strip()
+                # Eingabe asynchron lesen; Prompt nur im Terminal und wenn keine Zeilen gepuffert sind
+                if self.stdin.interactive and not self.stdin.pending():
+                    self.renderer.show_prompt()
+                command = await self.stdin.readline()
+                command = "/quit" if command is None else command.strip()
 
                 if command == "/join":
                     await self.messenger.send_join()
-                    print(f"{Fore.GREEN}✅ Du bist dem Chat beigetreten!{Style.RESET_ALL}")
+                    self.renderer.emit(f"{Fore.GREEN}✅ Du bist dem Chat beigetreten!{Style.RESET_ALL}")
 
                 elif command == "/leave":
                     await self.messenger.send_leave()
-                    print(f"{Fore.YELLOW}🟡 Du hast den Chat verlassen.{Style.RESET_ALL}")
+                    self.renderer.emit(f"{Fore.YELLOW}🟡 Du hast den Chat verlassen.{Style.RESET_ALL}")
 
                 elif command.startswith("/who"):
                     await self.messenger.send_who()
@@ -74,39 +96,164 @@ Verfügbare Befehle:
                 elif command.startswith("/msg"):
                     parts = command.split(" ", 2)
                     if len(parts) < 3:
-                        print(f"{Fore.RED}❌ Usage: /msg <handle> <text>{Style.RESET_ALL}")
+                        self.renderer.emit(f"{Fore.RED}❌ Usage: /msg <handle> <text>{Style.RESET_ALL}")
                     else:
-                        await self.messenger.send_message(parts[1], parts[2])
+                        recipients = self.messenger.resolve_recipients(parts[1])
+                        if len(recipients) == 1:
+                            await self.messenger.send_message(recipients[0], parts[2])
+                        else:
+                            results = await self.messenger.send_message_many(recipients, parts[2])
+                            failed = [h for h, ok in results.items() if not ok]
+                            self.renderer.emit(f"{Fore.GREEN}✉️ Nachricht an {len(results) - len(failed)}/{len(results)} Empfänger gesendet{Style.RESET_ALL}")
+                            if failed:
+                                self.renderer.emit(f"{Fore.RED}❌ Nicht zugestellt an: {', '.join(failed)}{Style.RESET_ALL}")
 
                 elif command.startswith("/img"):
                     parts = command.split(" ", 2)
                     if len(parts) < 3:
-                        print(f"{Fore.RED}❌ Usage: /img <handle> <pfad>{Style.RESET_ALL}")
+                        self.renderer.emit(f"{Fore.RED}❌ Usage: /img <handle> <pfad>{Style.RESET_ALL}")
                     else:
                         handle, pfad = parts[1], parts[2]
                         if not os.path.isfile(pfad):
-                            print(f"{Fore.RED}❌ Datei nicht gefunden: {pfad}{Style.RESET_ALL}")
+                            self.renderer.emit(f"{Fore.RED}❌ Datei nicht gefunden: {pfad}{Style.RESET_ALL}")
                         elif not pfad.lower().endswith(('.jpg', '.jpeg', '.png')):
-                            print(f"{Fore.RED}❌ Ungültiges Bildformat! (.jpg/.png erlaubt){Style.RESET_ALL}")
+                            self.renderer.emit(f"{Fore.RED}❌ Ungültiges Bildformat! (.jpg/.png erlaubt){Style.RESET_ALL}")
                         else:
-                            success = await self.messenger.send_image(handle, pfad)
-                            if success:
-                                print(f"{Fore.GREEN}🖼️ Bild an {handle} gesendet!{Style.RESET_ALL}")
-                            else:
-                                print(f"{Fore.RED}❌ Bildversand fehlgeschlagen!{Style.RESET_ALL}")
+                            task = asyncio.create_task(self.send_image(handle, pfad))
+                            self.uploads.add(task)
+                            task.add_done_callback(self.uploads.discard)
+
+                elif command == "/transfers":
+                    self.show_transfers()
+
+                elif command.startswith("/cancel"):
+                    parts = command.split()
+                    if len(parts) != 2:
+                        self.renderer.emit(f"{Fore.RED}❌ Usage: /cancel <id>{Style.RESET_ALL}")
+                    elif self.messenger.transfers.cancel(parts[1]):
+                        self.renderer.emit(f"{Fore.YELLOW}🟡 Übertragung {parts[1]} wird abgebrochen{Style.RESET_ALL}")
+                    else:
+                        self.renderer.emit(f"{Fore.RED}❌ Keine Übertragung mit ID {parts[1]}{Style.RESET_ALL}")
+
+                elif command == "/lag":
+                    self.show_lag()
+
+                elif command.startswith("/mem"):
+                    parts = command.split()
+                    if len(parts) > 2 or (len(parts) == 2 and parts[1] not in ("trace", "stop")):
+                        self.renderer.emit(f"{Fore.RED}❌ Usage: /mem [trace|stop]{Style.RESET_ALL}")
+                    else:
+                        await self.show_mem(parts[1] if len(parts) == 2 else None)
 
                 elif command == "/quit":
+                    if self.uploads:
+                        # Wie früher (blockierendes /img) laufende Bildübertragungen abschließen
+                        self.renderer.emit(f"{Fore.YELLOW}🟡 Warte auf {len(self.uploads)} Bildübertragung(en) ...{Style.RESET_ALL}")
+                        await asyncio.gather(*self.uploads, return_exceptions=True)
                     await self.messenger.send_leave()
-                    print(f"{Fore.RED}🔴 Chat wird beendet...{Style.RESET_ALL}")
+                    self.renderer.emit(f"{Fore.RED}🔴 Chat wird beendet...{Style.RESET_ALL}")
+                    self.stdin.stop()
+                    await self.renderer.stop()
                     break
 
                 else:
-                    print(f"{Fore.RED}❌ Unbekannter Befehl.{Style.RESET_ALL}")
+                    self.renderer.emit(f"{Fore.RED}❌ Unbekannter Befehl.{Style.RESET_ALL}")
 
             except Exception as e:
-                print(f"{Fore.RED}⚠️ Fehler: {e}{Style.RESET_ALL}")
+                self.renderer.emit(f"{Fore.RED}⚠️ Fehler: {e}{Style.RESET_ALL}")
+
+    async def send_image(self, handle, pfad):
+        """
+        @brief Sendet ein Bild im Hintergrund und meldet das Ergebnis.
+
+        @param handle Empfänger-Handle
+        @param pfad Pfad zur Bilddatei
+        """
+        try:
+            success = await self.messenger.send_image(handle, pfad)
+        except asyncio.CancelledError:
+            return  # Per /cancel abgebrochen, der Messenger hat es bereits gemeldet
+        if success:
+            self.renderer.emit(f"{Fore.GREEN}🖼️ Bild an {handle} gesendet!{Style.RESET_ALL}")
+        else:
+            self.renderer.emit(f"{Fore.RED}❌ Bildversand fehlgeschlagen!{Style.RESET_ALL}")
+
+    def show_transfers(self):
+        """
+        @brief Zeigt alle aktiven und wartenden Bildübertragungen an.
+        """
+        transfers = self.messenger.transfers.list()
+        if not transfers:
+            self.renderer.emit(f"{Fore.CYAN}📦 Keine laufenden Übertragungen{Style.RESET_ALL}")
+            return
+        self.renderer.emit(f"{Fore.CYAN}📦 Übertragungen:{Style.RESET_ALL}")
+        for t in transfers:
+            arrow = "→" if t.direction == "send" else "←"
+            self.renderer.emit(f"  {Fore.YELLOW}{t.id:>5}{Fore.RESET} {arrow} {t.peer:8} {t.state:10} "
+                               f"{t.progress:5.1f}% ({t.transferred}/{t.size} Bytes)")
+
+    def show_lag(self):
+        """
+        @brief Zeigt Perzentile der Eventloop-Verzögerung und die letzten blockierenden Callbacks an.
+        """
+        monitor = self.messenger.loop_monitor
+        if monitor is None:
+            self.renderer.emit(f"{Fore.RED}❌ Eventloop-Überwachung ist deaktiviert (loop_monitor = false){Style.RESET_ALL}")
+            return
+        stats = monitor.percentiles()
+        if stats is None:
+            self.renderer.emit(f"{Fore.CYAN}⏱️ Noch keine Messwerte{Style.RESET_ALL}")
+            return
+        self.renderer.emit(f"{Fore.CYAN}⏱️ Eventloop-Lag ({stats['count']} Messungen): "
+                           f"p50 {stats[0.5] * 1000:.1f} ms, p90 {stats[0.9] * 1000:.1f} ms, "
+                           f"p99 {stats[0.99] * 1000:.1f} ms, max {stats['max'] * 1000:.1f} ms{Style.RESET_ALL}")
+        self.renderer.emit(f"{Fore.CYAN}   Blockierende Callbacks (≥ {monitor.threshold * 1000:.0f} ms): "
+                           f"{monitor.slow_total}{Style.RESET_ALL}")
+        recent = list(monitor.slow)[-5:]
+        for event in recent:
+            self.renderer.emit(f"  {Fore.YELLOW}{event.duration * 1000:6.0f} ms{Fore.RESET} "
+                               f"{event.context or '-':10} {event.location}")
+        if recent and recent[-1].stack:
+            self.renderer.emit(f"{Fore.CYAN}   Stack des letzten Ereignisses:{Style.RESET_ALL}")
+            for line in "".join(recent[-1].stack).rstrip().splitlines():
+                self.renderer.emit(f"  {line}")
+
+    async def show_mem(self, action=None):
+        """
+        @brief Zeigt Speicherverbrauch, Transfer-Speicherbudget und (mit tracemalloc) die größten Allokationsstellen.
+
+        @param action None zum Anzeigen, "trace" zum Einschalten, "stop" zum Ausschalten von tracemalloc
+        """
+        tracker = self.messenger.memory
+        if action == "trace":
+            tracker.start()
+            self.renderer.emit(f"{Fore.GREEN}🧠 tracemalloc eingeschaltet (verlangsamt Allokationen){Style.RESET_ALL}")
+        elif action == "stop":
+            tracker.stop()
+            self.renderer.emit(f"{Fore.YELLOW}🧠 tracemalloc ausgeschaltet{Style.RESET_ALL}")
+            return
+
+        mib = 1024 * 1024
+        current, peak = rss_bytes()
+        transfers = self.messenger.transfers
+        budget = f"{transfers.memory_budget / mib:.1f} MiB" if transfers.memory_budget else "unbegrenzt"
+        self.renderer.emit(f"{Fore.CYAN}🧠 Prozess: {f'{current / mib:.1f} MiB' if current else '?'} "
+                           f"(Spitze {f'{peak / mib:.1f} MiB' if peak else '?'}){Style.RESET_ALL}")
+        self.renderer.emit(f"{Fore.CYAN}   Übertragungspuffer: {transfers.memory_used / mib:.1f} MiB von {budget}, "
+                           f"{transfers.active} aktiv, {len(transfers.queue)} wartend{Style.RESET_ALL}")
+
+        result = await tracker.top()
+        if result is None:
+            self.renderer.emit(f"{Fore.CYAN}   Allokationsstellen: /mem trace einschalten{Style.RESET_ALL}")
+            return
+        rows, traced, traced_peak = result
+        self.renderer.emit(f"{Fore.CYAN}   tracemalloc: {traced / mib:.1f} MiB (Spitze {traced_peak / mib:.1f} MiB), "
+                           f"größte Allokationsstellen:{Style.RESET_ALL}")
+        for location, size, count, diff in rows:
+            self.renderer.emit(f"  {Fore.YELLOW}{size / 1024:9.1f} KiB{Fore.RESET} {diff / 1024:+9.1f} KiB "
+                               f"{count:7} × {location}")
 
-    async def display_message(self, sender_display, message):
+    async def display_message(self, sender_display, message, address=None):
         """
         @brief Zeigt eine empfangene Textnachricht in der Konsole an.
 
@@ -114,8 +261,9 @@ Verfügbare Befehle:
 
         @param sender_display Der Anzeigename oder die IP-Adresse des Absenders
         @param message Die empfangene Textnachricht
+        @param address Absender-Adresse als (ip, port) Tupel
         """
-        print(f"\n{Fore.BLUE}💬 {sender_display}: {Fore.RESET}{message}")
+        self.renderer.emit(f"{Fore.BLUE}💬 {sender_display}: {Fore.RESET}{message}")
 
     async def display_image_notice(self, sender, filename):
         """
@@ -126,7 +274,7 @@ Verfügbare Befehle:
         @param sender Handle oder IP des Absenders
         @param filename Pfad zur lokal gespeicherten Bilddatei
         """
-        print(f"\n{Fore.GREEN}🖼️ Bild von {sender}: {Fore.YELLOW}{filename}{Style.RESET_ALL}")
+        self.renderer.emit(f"{Fore.GREEN}🖼️ Bild von {sender}: {Fore.YELLOW}{filename}{Style.RESET_ALL}")
 
     async def display_knownusers(self, user_list):
         """
@@ -137,9 +285,9 @@ Verfügbare Befehle:
 
         @param user_list Liste von Tupeln: (handle, ip, port)
         """
-        print(f"\n{Fore.CYAN}🌐 Aktive Benutzer:{Style.RESET_ALL}")
+        self.renderer.emit(f"{Fore.CYAN}🌐 Aktive Benutzer:{Style.RESET_ALL}")
         seen = set()
         for handle, ip, port in user_list:
             if handle not in seen:
-                print(f"  {Fore.YELLOW}👉 {handle:8}{Fore.RESET} an {ip}:{port}")
+                self.renderer.emit(f"  {Fore.YELLOW}👉 {handle:8}{Fore.RESET} an {ip}:{port}")
                 seen.add(handle)
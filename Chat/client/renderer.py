@@ -0,0 +1,122 @@
+"""
+@file renderer.py
+@brief Gebündelte Terminalausgabe für den SLCP-Chat-Client.
+Sammelt Ausgabe-Ereignisse und schreibt sie mit begrenzter Bildrate als einen Frame ins Terminal.
+"""
+
+import asyncio
+import sys
+from collections import deque
+from colorama import Fore, Style
+
+
+class Renderer:
+    """
+    @class Renderer
+    @brief Render-Schleife, die Ausgaben zu Frames zusammenfasst.
+
+    Statt jede Zeile einzeln per `print` auszugeben, werden Ausgaben mit `emit()` gesammelt.
+    Die Render-Schleife schreibt höchstens `fps` Frames pro Sekunde, jeden Frame mit einem
+    einzigen `write`-Aufruf, und zeichnet danach den `>>`-Prompt samt der noch nicht
+    abgeschickten Eingabe (`pending_input`, siehe StdinReader) neu. Bei sehr vielen Zeilen
+    pro Frame werden ältere Zeilen zusammengefasst. Im Quiet-Modus wird nichts ausgegeben.
+    """
+
+    def __init__(self, fps=20, quiet=False, max_lines=200, stream=None):
+        """
+        @brief Konstruktor des Renderers.
+
+        @param fps Maximale Anzahl Frames pro Sekunde
+        @param quiet True, um die Ausgabe vollständig zu unterdrücken (Batch-/Quiet-Modus)
+        @param max_lines Maximale Anzahl Zeilen pro Frame; überzählige werden ausgelassen
+        @param stream Ausgabestrom (Standard: sys.stdout)
+        """
+        self.interval = 1.0 / fps
+        self.quiet = quiet
+        self.stream = stream or sys.stdout
+        self.prompt = f"{Fore.MAGENTA}>> {Style.RESET_ALL}"
+        self.pending_input = lambda: ""  # Liefert die angefangene Eingabezeile (für das Neuzeichnen)
+        self.events = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def emit(self, text):
+        """
+        @brief Reiht eine Ausgabe für den nächsten Frame ein.
+
+        @param text Auszugebender Text (ohne abschließenden Zeilenumbruch)
+        """
+        if self.quiet:
+            return
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(text)
+        self.wakeup.set()
+
+    def start(self):
+        """
+        @brief Startet die Render-Schleife als Task im laufenden Eventloop.
+        """
+        if self.task is None and not self.quiet:
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        """
+        @brief Render-Schleife: wartet auf Ereignisse und schreibt höchstens `fps` Frames pro Sekunde.
+        """
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            self.flush()
+            await asyncio.sleep(self.interval)
+
+    def flush(self):
+        """
+        @brief Schreibt alle gesammelten Ereignisse als einen Frame und zeichnet den Prompt neu.
+        """
+        if not self.events:
+            return
+        lines = list(self.events)
+        if self.dropped:
+            lines.insert(0, f"{Fore.YELLOW}… {self.dropped} Zeilen ausgelassen{Style.RESET_ALL}")
+        # Aktuelle Promptzeile löschen, Frame schreiben, Prompt und angefangene Eingabe neu zeichnen
+        frame = "\r\x1b[2K" + "\n".join(lines) + "\n" + self.prompt + self.pending_input()
+        self.events.clear()
+        self.dropped = 0
+        self.stream.write(frame)
+        self.stream.flush()
+
+    def show_prompt(self):
+        """
+        @brief Zeichnet den `>>`-Prompt in der aktuellen Zeile (z. B. vor dem Lesen einer Eingabe).
+        """
+        if self.quiet:
+            return
+        self.stream.write("\r\x1b[2K" + self.prompt + self.pending_input())
+        self.stream.flush()
+
+    def echo_input(self, completed):
+        """
+        @brief Zeigt die Eingabe bei eigener Zeilenbearbeitung an (Terminal ohne Echo, siehe StdinReader).
+
+        @param completed Mit Enter abgeschlossene Zeilen seit dem letzten Aufruf
+        """
+        if self.quiet:
+            return
+        text = "\r\x1b[2K" + "".join(f"{self.prompt}{line}\n" for line in completed)
+        self.stream.write(text + self.prompt + self.pending_input())
+        self.stream.flush()
+
+    async def stop(self):
+        """
+        @brief Beendet die Render-Schleife und schreibt verbleibende Ausgaben.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        self.flush()
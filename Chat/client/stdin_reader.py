@@ -0,0 +1,238 @@
+"""
+@file stdin_reader.py
+@brief Asynchroner Zeilenleser für die Standardeingabe des SLCP-Chat-Clients.
+Liest Befehle direkt über den Eventloop statt mit einem Thread-Wechsel pro Zeile.
+"""
+
+import asyncio
+import atexit
+import os
+import sys
+from collections import deque
+
+try:
+    import termios
+except ImportError:  # Windows
+    termios = None
+
+
+class StdinReader:
+    """
+    @class StdinReader
+    @brief Liest Zeilen aus stdin ohne Thread-Pool-Aufruf pro Befehl.
+
+    Der Dateideskriptor von stdin wird per `loop.add_reader` beim Eventloop registriert.
+    Sobald Daten anliegen, werden sie blockweise gelesen und in Zeilen zerlegt; eingefügte
+    oder gepipte Befehlsblöcke ergeben so viele Zeilen pro Lesevorgang. Das funktioniert für
+    Terminals (TTY) und Pipes. Ist stdin eine reguläre Datei oder unterstützt der Eventloop
+    kein `add_reader` (z. B. Proactor unter Windows), wird blockweise in einem Thread gelesen.
+
+    Mit Zeilenbearbeitung (nur Terminals) schaltet der Leser den kanonischen Modus und das Echo
+    des Terminals ab und verwaltet die angefangene Zeile selbst (Backspace, Strg+U, Strg+D).
+    So kennt der Renderer die Eingabe und kann sie nach jedem Frame neu zeichnen.
+    """
+
+    def __init__(self, stdin=None, block_size=65536, max_lines=10000):
+        """
+        @brief Konstruktor des StdinReaders.
+
+        @param stdin Eingabestrom (Standard: sys.stdin)
+        @param block_size Maximale Anzahl Bytes pro Lesevorgang
+        @param max_lines Anzahl gepufferter Zeilen, ab der das Lesen pausiert (Backpressure)
+        """
+        self.stdin = stdin or sys.stdin
+        self.fd = self.stdin.fileno()
+        self.block_size = block_size
+        self.max_lines = max_lines
+        self.lines = deque()
+        self.partial = b""
+        self.eof = False
+        self.ready = asyncio.Event()
+        self.loop = None
+        self.registered = False
+        self.threaded = False
+        self.on_edit = None  # Callback(abgeschlossene Zeilen) nach jeder Eingabe bei Zeilenbearbeitung
+        self.saved_mode = None  # Terminal-Einstellungen vor der Zeilenbearbeitung (None = aus)
+
+    @property
+    def interactive(self):
+        """
+        @brief Gibt an, ob stdin ein Terminal ist (dann wird ein Prompt angezeigt).
+        """
+        return self.stdin.isatty()
+
+    def start(self, line_editing=False):
+        """
+        @brief Registriert stdin beim laufenden Eventloop.
+
+        @param line_editing True, um in einem Terminal die Zeilenbearbeitung selbst zu übernehmen
+        """
+        self.loop = asyncio.get_running_loop()
+        try:
+            self.loop.add_reader(self.fd, self._on_readable)
+            self.registered = True
+        except (NotImplementedError, PermissionError, ValueError):
+            # Reguläre Dateien lassen sich nicht per epoll/select überwachen
+            self.threaded = True
+        if line_editing and self.registered and self.interactive:
+            self._enter_line_mode()
+
+    def stop(self):
+        """
+        @brief Meldet stdin wieder beim Eventloop ab und stellt den Terminalmodus wieder her.
+        """
+        if self.registered:
+            self.loop.remove_reader(self.fd)
+            self.registered = False
+        self._restore_mode()
+
+    def pending_input(self):
+        """
+        @brief Liefert die angefangene, noch nicht mit Enter abgeschickte Eingabezeile.
+        """
+        return self.partial.decode("utf-8", errors="replace") if self.saved_mode is not None else ""
+
+    def _enter_line_mode(self):
+        """
+        @brief Schaltet kanonischen Modus und Echo des Terminals ab (Signale wie Strg+C bleiben aktiv).
+        """
+        if termios is None:
+            return
+        try:
+            self.saved_mode = termios.tcgetattr(self.fd)
+            mode = termios.tcgetattr(self.fd)
+            mode[3] &= ~(termios.ICANON | termios.ECHO)
+            mode[6][termios.VMIN] = 1
+            mode[6][termios.VTIME] = 0
+            termios.tcsetattr(self.fd, termios.TCSANOW, mode)
+        except termios.error:
+            self.saved_mode = None
+            return
+        atexit.register(self._restore_mode)  # Auch bei Abbruch das Terminal nicht verstellt zurücklassen
+
+    def _restore_mode(self):
+        """
+        @brief Stellt die Terminal-Einstellungen vor der Zeilenbearbeitung wieder her.
+        """
+        if self.saved_mode is not None:
+            try:
+                termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved_mode)
+            except termios.error:
+                pass
+            self.saved_mode = None
+
+    def pending(self):
+        """
+        @brief Gibt an, ob bereits vollständige Zeilen gepuffert sind.
+        """
+        return bool(self.lines)
+
+    async def readline(self):
+        """
+        @brief Liefert die nächste Eingabezeile.
+
+        @return Zeile ohne Zeilenumbruch oder None bei Dateiende (EOF)
+        """
+        if self.loop is None:
+            self.start()
+        while not self.lines:
+            if self.eof:
+                return None
+            if self.threaded:
+                self._feed(await asyncio.to_thread(self._read_block))
+            else:
+                self.ready.clear()
+                await self.ready.wait()
+        line = self.lines.popleft()
+        if not self.registered and not self.eof and not self.threaded and len(self.lines) < self.max_lines // 2:
+            self.loop.add_reader(self.fd, self._on_readable)
+            self.registered = True
+        return line.decode("utf-8", errors="replace").rstrip("\r")
+
+    def _read_block(self):
+        """
+        @brief Liest einen Block von stdin.
+
+        @return Gelesene Bytes (leer bei EOF)
+        """
+        try:
+            return os.read(self.fd, self.block_size)
+        except BlockingIOError:
+            return None
+        except OSError:
+            return b""
+
+    def _on_readable(self):
+        """
+        @brief Callback des Eventloops, wenn stdin lesbar ist.
+        """
+        data = self._read_block()
+        if data is None:
+            return
+        self._feed(data)
+        if self.registered and (self.eof or len(self.lines) >= self.max_lines):
+            self.loop.remove_reader(self.fd)
+            self.registered = False
+        self.ready.set()
+
+    def _feed(self, data):
+        """
+        @brief Zerlegt gelesene Bytes in vollständige Zeilen.
+
+        @param data Gelesene Bytes; leere Bytes markieren EOF
+        """
+        if not data:
+            self.eof = True
+            if self.partial:
+                self.lines.append(self.partial)
+                self.partial = b""
+            return
+        if self.saved_mode is not None:
+            self._edit(data)
+            return
+        *complete, self.partial = (self.partial + data).split(b"\n")
+        self.lines.extend(complete)
+
+    def _edit(self, data):
+        """
+        @brief Zeilenbearbeitung: verarbeitet Tastendrücke und meldet sie per on_edit zur Anzeige.
+
+        Enter schließt die Zeile ab, Backspace löscht das letzte Zeichen (UTF-8), Strg+U die
+        ganze Zeile, Strg+D beendet bei leerer Zeile die Eingabe. Escape-Sequenzen (Pfeiltasten)
+        und übrige Steuerzeichen werden ignoriert.
+
+        @param data Gelesene Bytes
+        """
+        partial = bytearray(self.partial)
+        completed = []
+        i = 0
+        while i < len(data):
+            byte = data[i]
+            i += 1
+            if byte in (0x0A, 0x0D):
+                completed.append(partial.decode("utf-8", errors="replace"))
+                self.lines.append(bytes(partial))
+                partial.clear()
+            elif byte in (0x08, 0x7F):
+                while partial and 0x80 <= partial[-1] < 0xC0:  # UTF-8-Folgebytes
+                    partial.pop()
+                if partial:
+                    partial.pop()
+            elif byte == 0x15:
+                partial.clear()
+            elif byte == 0x04:
+                if not partial:
+                    self.eof = True
+                    break
+            elif byte == 0x1B:
+                # CSI/SS3-Sequenz überspringen: ESC [ ... Endbyte bzw. ESC O x
+                if i < len(data) and data[i] in (0x5B, 0x4F):
+                    i += 1
+                    while i < len(data) and not 0x40 <= data[i] <= 0x7E:
+                        i += 1
+                    i += 1
+            elif byte >= 0x20 or byte == 0x09:
+                partial.append(byte)
+        self.partial = bytes(partial)
+        if self.on_edit is not None:
+            self.on_edit(completed)
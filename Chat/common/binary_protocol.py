@@ -0,0 +1,181 @@
+##
+# @file binary_protocol.py
+# @brief Kompaktes binäres Rahmenformat für SLCP-Chatnachrichten (optional zum Textformat).
+#
+# Ein Rahmen beginnt mit dem Magic-Byte 0xB5 (kein gültiges erstes Zeichen einer SLCP-Textzeile)
+# und einem Typ-Byte. Danach folgen Felder fester Länge, Zeichenketten mit 1-Byte-Längenpräfix
+# und als letztes Feld die Nutzlast (Text/Fragment), die bis zum Ende des Datagramms reicht.
+# Das Binärformat wird nur für Chatnachrichten (MSG, RMSG, ACK, FRAG, RFRAG) zwischen Peers
+# genutzt, die es per CAPS angekündigt haben; Discovery (JOIN/LEAVE/WHO/KNOWNUSERS) bleibt Text.
+
+import struct
+from Chat.common.log import get_logger
+
+log = get_logger("protocol")
+
+MAGIC = 0xB5
+MAGIC_BYTE = bytes([MAGIC])
+
+## Typ-Bytes
+TYPE_MSG = 1
+TYPE_RMSG = 2
+TYPE_ACK = 3
+TYPE_FRAG = 4
+TYPE_RFRAG = 5
+
+# MSG: magic, typ, len(to) – je ein Byte; die Köpfe sind für alle Längen vorberechnet
+_MSG_HEADS = [bytes((MAGIC, TYPE_MSG, n)) for n in range(256)]
+_RMSG = struct.Struct("!BBIIB")         # magic, typ, epoch, seq, len(to)
+_ACK = struct.Struct("!BBIIH")          # magic, typ, epoch, cum, anzahl sacks
+_FRAG = struct.Struct("!BBIHHB")        # magic, typ, msgid, index, count, len(to)
+_RFRAG = struct.Struct("!BBIIIHHB")     # magic, typ, epoch, seq, msgid, index, count, len(to)
+
+## Maximale Anzahl zwischengespeicherter MSG-Köpfe (Handle → Kopf inkl. Handle)
+MSG_HEAD_CACHE = 4096
+_msg_heads = {}
+
+
+def is_binary(data):
+    """
+    @brief Prüft, ob ein Datagramm im Binärformat vorliegt.
+
+    @param data Empfangene Bytes
+    @return True, wenn das erste Byte das Magic-Byte ist
+    """
+    return bool(data) and data[0] == MAGIC
+
+
+def encode_msg(target, text):
+    """
+    @brief Kodiert eine MSG-Nachricht binär.
+
+    @param target Empfänger-Handle
+    @param text Nachrichtentext
+    @return Binärer Rahmen
+    @details Der Kopf samt kodiertem Handle wird pro Empfänger zwischengespeichert, sodass pro
+             Nachricht nur der Text kodiert und einmal angehängt wird.
+    """
+    head = _msg_heads.get(target)
+    if head is None:
+        if len(_msg_heads) >= MSG_HEAD_CACHE:
+            _msg_heads.clear()
+        to = target.encode()
+        head = _msg_heads[target] = _MSG_HEADS[len(to)] + to
+    return head + text.encode()
+
+
+def frame_msg(target_bytes, payload):
+    """
+    @brief Setzt einen MSG-Rahmen aus bereits kodierten Feldern zusammen.
+
+    Ermöglicht es, den Text bei mehreren Empfängern nur einmal zu kodieren.
+
+    @param target_bytes Empfänger-Handle (UTF-8)
+    @param payload Nachrichtentext (UTF-8)
+    @return Binärer Rahmen
+    """
+    return _MSG_HEADS[len(target_bytes)] + target_bytes + payload
+
+
+def encode_rmsg(target, epoch, seq, text):
+    """
+    @brief Kodiert eine RMSG-Nachricht (zuverlässiger Modus) binär.
+
+    @param target Empfänger-Handle
+    @param epoch Sitzungskennung des Senders
+    @param seq Sequenznummer
+    @param text Nachrichtentext
+    @return Binärer Rahmen
+    """
+    to = target.encode()
+    return _RMSG.pack(MAGIC, TYPE_RMSG, epoch, seq, len(to)) + to + text.encode()
+
+
+def encode_ack(epoch, cum, sacks=()):
+    """
+    @brief Kodiert eine Empfangsbestätigung binär.
+
+    @param epoch Sitzungskennung des Senders
+    @param cum Kumulativ bestätigte Sequenznummer
+    @param sacks Selektiv bestätigte Sequenznummern
+    @return Binärer Rahmen
+    """
+    return _ACK.pack(MAGIC, TYPE_ACK, epoch, cum, len(sacks)) + struct.pack(f"!{len(sacks)}I", *sacks)
+
+
+def encode_frag(target, msgid, index, count, chunk):
+    """
+    @brief Kodiert ein Fragment einer langen Nachricht binär.
+
+    @param target Empfänger-Handle
+    @param msgid Nachrichten-ID
+    @param index Index des Fragments
+    @param count Gesamtanzahl der Fragmente
+    @param chunk Maskierter Fragmenttext
+    @return Binärer Rahmen
+    """
+    to = target.encode()
+    return _FRAG.pack(MAGIC, TYPE_FRAG, msgid, index, count, len(to)) + to + chunk.encode()
+
+
+def encode_rfrag(target, epoch, seq, msgid, index, count, chunk):
+    """
+    @brief Kodiert ein Fragment im zuverlässigen Modus binär.
+
+    @param target Empfänger-Handle
+    @param epoch Sitzungskennung des Senders
+    @param seq Sequenznummer
+    @param msgid Nachrichten-ID
+    @param index Index des Fragments
+    @param count Gesamtanzahl der Fragmente
+    @param chunk Maskierter Fragmenttext
+    @return Binärer Rahmen
+    """
+    to = target.encode()
+    return _RFRAG.pack(MAGIC, TYPE_RFRAG, epoch, seq, msgid, index, count, len(to)) + to + chunk.encode()
+
+
+def decode(data):
+    """
+    @brief Dekodiert einen binären Rahmen in dasselbe Dictionary-Format wie protocol.parse_slcp().
+
+    Feste Kopffelder werden mit struct.unpack_from direkt aus dem Puffer gelesen, Zeichenketten
+    per Slice ohne Zwischenkopie in einen String dekodiert.
+
+    @param data Empfangene Bytes (beginnend mit dem Magic-Byte)
+    @return Dictionary mit Schlüssel "type" und weiteren Feldern; {"type": "UNKNOWN"} bei Fehlern
+    """
+    try:
+        kind = data[1]
+        if kind == TYPE_MSG:
+            end = 3 + data[2]
+            return {"type": "MSG", "to": data[3:end].decode(), "message": data[end:].decode()}
+
+        if kind == TYPE_RMSG:
+            _, _, epoch, seq, n = _RMSG.unpack_from(data)
+            end = _RMSG.size + n
+            return {"type": "RMSG", "to": data[_RMSG.size:end].decode(), "epoch": epoch,
+                    "seq": seq, "message": data[end:].decode()}
+
+        if kind == TYPE_ACK:
+            _, _, epoch, cum, n = _ACK.unpack_from(data)
+            sacks = list(struct.unpack_from(f"!{n}I", data, _ACK.size)) if n else []
+            return {"type": "ACK", "epoch": epoch, "cum": cum, "sacks": sacks}
+
+        if kind == TYPE_FRAG:
+            _, _, msgid, index, count, n = _FRAG.unpack_from(data)
+            end = _FRAG.size + n
+            return {"type": "FRAG", "to": data[_FRAG.size:end].decode(), "msgid": msgid,
+                    "index": index, "count": count, "chunk": data[end:].decode()}
+
+        if kind == TYPE_RFRAG:
+            _, _, epoch, seq, msgid, index, count, n = _RFRAG.unpack_from(data)
+            end = _RFRAG.size + n
+            return {"type": "RFRAG", "to": data[_RFRAG.size:end].decode(), "epoch": epoch,
+                    "seq": seq, "msgid": msgid, "index": index, "count": count,
+                    "chunk": data[end:].decode()}
+
+    except (struct.error, UnicodeDecodeError, IndexError) as e:
+        log.warning("parse_error", error=str(e), format="binary")
+
+    return {"type": "UNKNOWN", "raw": bytes(data)}
@@ -0,0 +1,115 @@
+##
+# @file capture.py
+# @brief Mitschnitt eingehender SLCP-Daten (Datagramme und TCP-Kopfzeilen) in eine kompakte Datei.
+#
+# Dateiformat (Big Endian):
+#   Kopf:      b"SLCPCAP1", uint16 Länge, Handle des mitschneidenden Clients (UTF-8)
+#   Eintrag:   float64 Zeitpunkt (time.time()), uint8 Art, 4 Byte IPv4-Adresse, uint16 Port,
+#              uint32 Länge, danach die Rohdaten
+# Arten: KIND_UDP (Messenger-Datagramm), KIND_DISCOVERY (Datagramm des Discovery-Dienstes),
+# KIND_TCP (Kopfzeile einer TCP-Verbindung, z. B. "IMG Bob 1234\n"; Bilddaten werden nicht
+# mitgeschnitten).
+#
+# Geschrieben wird gepuffert; ein Eintrag kostet im Eventloop nur das Packen des Kopfes und
+# das Anhängen an den Dateipuffer. Abgespielt werden Mitschnitte mit benchmarks/replay.py.
+
+import socket
+import struct
+import threading
+import time
+
+MAGIC = b"SLCPCAP1"
+
+## Arten von Einträgen
+KIND_UDP = 1
+KIND_DISCOVERY = 2
+KIND_TCP = 3
+
+KIND_NAMES = {KIND_UDP: "udp", KIND_DISCOVERY: "discovery", KIND_TCP: "tcp"}
+
+_RECORD = struct.Struct("!dB4sHI")  # Zeitpunkt, Art, IPv4, Port, Länge
+_HANDLE = struct.Struct("!H")
+_ANY = b"\0\0\0\0"
+
+## Größe des Dateipuffers in Bytes
+BUFFER_SIZE = 256 * 1024
+
+
+class Capture:
+    """
+    @class Capture
+    @brief Schreibt Mitschnitt-Einträge threadsicher in eine Datei (Messenger und Discovery-Thread).
+    """
+
+    def __init__(self, path, handle=""):
+        """
+        @brief Konstruktor der Capture; legt die Datei an (vorhandene wird überschrieben).
+        @param path Pfad der Mitschnittdatei
+        @param handle Handle des mitschneidenden Clients (für das Abspielen)
+        """
+        self.path = path
+        self.file = open(path, "wb", buffering=BUFFER_SIZE)
+        encoded = handle.encode()
+        self.file.write(MAGIC + _HANDLE.pack(len(encoded)) + encoded)
+        self.lock = threading.Lock()
+        self.records = 0
+
+    def record(self, kind, addr, data):
+        """
+        @brief Hängt einen Eintrag an.
+        @param kind KIND_UDP, KIND_DISCOVERY oder KIND_TCP
+        @param addr Absender als (ip, port) Tupel
+        @param data Rohdaten (bytes)
+        """
+        try:
+            ip = socket.inet_aton(addr[0])
+        except (OSError, TypeError, IndexError):
+            ip = _ANY  # Nicht-IPv4-Absender: Adresse wird nicht gespeichert
+        head = _RECORD.pack(time.time(), kind, ip, addr[1] if addr else 0, len(data))
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(head)
+            self.file.write(data)
+            self.records += 1
+
+    def close(self):
+        """
+        @brief Schreibt den Puffer und schließt die Datei.
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_capture(path):
+    """
+    @brief Liest eine Mitschnittdatei.
+    @param path Pfad der Mitschnittdatei
+    @return (Handle, Liste von (Zeitpunkt, Art, (ip, port), Rohdaten))
+    @throws ValueError Wenn die Datei kein Mitschnitt ist
+    @details Ein unvollständiger letzter Eintrag (z. B. nach einem Absturz) wird ignoriert.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    if not content.startswith(MAGIC):
+        raise ValueError(f"{path} ist keine SLCP-Mitschnittdatei")
+    offset = len(MAGIC)
+    (length,) = _HANDLE.unpack_from(content, offset)
+    offset += _HANDLE.size
+    handle = content[offset:offset + length].decode()
+    offset += length
+
+    records = []
+    while offset < len(content):
+        if offset + _RECORD.size > len(content):
+            break
+        ts, kind, ip, port, length = _RECORD.unpack_from(content, offset)
+        offset += _RECORD.size
+        data = content[offset:offset + length]
+        if len(data) != length:
+            break
+        offset += length
+        records.append((ts, kind, (socket.inet_ntoa(ip), port), data))
+    return handle, records
@@ -0,0 +1,247 @@
+"""
+@file log.py
+@brief Strukturiertes, asynchrones Logging im JSON-Lines-Format.
+@details
+    Komponenten holen sich per get_logger() einen Logger und melden Ereignisse mit Feldern,
+    z. B. `log.debug("received", addr=addr, size=len(data))`. Die Stufe wird vor allem anderen
+    geprüft; ist sie deaktiviert, kostet ein Aufruf nur einen Vergleich. Für sehr häufige
+    Aufrufe (pro Datagramm) kann zusätzlich vorab `if log.debug_enabled:` abgefragt werden.
+
+    Aktivierte Einträge werden als Tupel in eine Warteschlange gelegt. Formatierung (JSON) und
+    Schreiben übernimmt ein Hintergrund-Thread, der alle wartenden Einträge gesammelt schreibt.
+    Jede Zeile ist ein JSON-Objekt mit ts, level, component, event und den übergebenen Feldern.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+## Log-Stufen
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+_LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+## Maximale Anzahl wartender Einträge; darüber werden neue verworfen (siehe LogWriter.dropped)
+MAX_PENDING = 10000
+
+
+class LogWriter:
+    """
+    @class LogWriter
+    @brief Schreibt Log-Einträge aus einer Warteschlange in einem Hintergrund-Thread.
+    """
+
+    def __init__(self, path="", max_pending=MAX_PENDING):
+        """
+        @brief Konstruktor des LogWriter.
+        @param path Zieldatei (wird angehängt); leer für stderr
+        @param max_pending Maximale Anzahl wartender Einträge
+        """
+        self.path = path
+        self.max_pending = max_pending
+        self.queue = queue.SimpleQueue()
+        self.dropped = 0  # Wegen voller Warteschlange verworfene Einträge (nur der Aufrufer zählt hoch)
+        self._reported = 0  # Bereits als "dropped" geloggte Anzahl (nur der Schreib-Thread)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, record):
+        """
+        @brief Reiht einen Eintrag ein (nicht blockierend) und startet bei Bedarf den Thread.
+        @param record Tupel (Zeitpunkt, Stufe, Komponente, Ereignis, Felder)
+        """
+        if self._thread is None:
+            self._start()
+        if self.queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self.queue.put(record)
+
+    def _start(self):
+        """
+        @brief Startet den Schreib-Thread (einmalig).
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slcp-log", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """
+        @brief Schreib-Thread: formatiert wartende Einträge als JSON und schreibt sie gesammelt.
+        """
+        stream = open(self.path, "a", encoding="utf-8") if self.path else sys.stderr
+        try:
+            while True:
+                records = [self.queue.get()]
+                while True:
+                    try:
+                        records.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in records
+                lines = [format_record(r) for r in records if r is not None]
+                dropped = self.dropped
+                if dropped > self._reported:
+                    lines.append(format_record((time.time(), WARNING, "log", "dropped",
+                                                {"count": dropped - self._reported})))
+                    self._reported = dropped
+                if lines:
+                    stream.write("".join(lines))
+                    stream.flush()
+                if stop:
+                    return
+        finally:
+            if stream is not sys.stderr:
+                stream.close()
+
+    def close(self, timeout=2.0):
+        """
+        @brief Schreibt alle wartenden Einträge und beendet den Thread.
+        @param timeout Maximale Wartezeit in Sekunden
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self.queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+
+
+def format_record(record):
+    """
+    @brief Formatiert einen Eintrag als JSON-Zeile.
+    @param record Tupel (Zeitpunkt, Stufe, Komponente, Ereignis, Felder)
+    @return Zeile inklusive Zeilenumbruch
+    """
+    ts, level, component, event, fields = record
+    entry = {"ts": round(ts, 6), "level": _LEVEL_NAMES.get(level, level),
+             "component": component, "event": event, "pid": os.getpid()}
+    entry.update(fields)
+    return json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+
+
+class Logger:
+    """
+    @class Logger
+    @brief Logger einer Komponente; prüft die Stufe, bevor irgendetwas formatiert wird.
+    """
+    __slots__ = ("component", "level", "debug_enabled")
+
+    def __init__(self, component, level):
+        """
+        @brief Konstruktor des Loggers.
+        @param component Name der Komponente (z. B. "discovery")
+        @param level Aktuelle Mindeststufe
+        """
+        self.component = component
+        self.set_level(level)
+
+    def set_level(self, level):
+        """
+        @brief Setzt die Mindeststufe.
+        @param level Stufe (DEBUG, INFO, WARNING, ERROR)
+        """
+        self.level = level
+        self.debug_enabled = level <= DEBUG
+
+    def log(self, level, event, fields):
+        """
+        @brief Reiht einen Eintrag ein, falls die Stufe aktiviert ist.
+        @param level Stufe des Eintrags
+        @param event Kurzer Ereignisname (z. B. "received")
+        @param fields Dictionary mit zusätzlichen Feldern
+        """
+        if level >= self.level:
+            _writer.put((time.time(), level, self.component, event, fields))
+
+    def debug(self, event, **fields):
+        """
+        @brief Meldet ein Debug-Ereignis.
+        """
+        if self.debug_enabled:
+            _writer.put((time.time(), DEBUG, self.component, event, fields))
+
+    def info(self, event, **fields):
+        """
+        @brief Meldet ein Info-Ereignis.
+        """
+        if self.level <= INFO:
+            _writer.put((time.time(), INFO, self.component, event, fields))
+
+    def warning(self, event, **fields):
+        """
+        @brief Meldet eine Warnung.
+        """
+        if self.level <= WARNING:
+            _writer.put((time.time(), WARNING, self.component, event, fields))
+
+    def error(self, event, **fields):
+        """
+        @brief Meldet einen Fehler.
+        """
+        if self.level <= ERROR:
+            _writer.put((time.time(), ERROR, self.component, event, fields))
+
+
+_level = WARNING
+_writer = LogWriter()
+_loggers = {}
+
+
+def parse_level(name):
+    """
+    @brief Wandelt einen Stufennamen in die Stufe um.
+    @param name "debug", "info", "warning" oder "error" (Groß-/Kleinschreibung egal)
+    @return Stufe als Zahl
+    @throws ValueError Bei unbekanntem Namen
+    """
+    try:
+        return LEVELS[str(name).lower()]
+    except KeyError:
+        raise ValueError(f"Ungültiges log_level '{name}' (erlaubt: {', '.join(LEVELS)})") from None
+
+
+def get_logger(component):
+    """
+    @brief Liefert den Logger einer Komponente (pro Name nur einmal angelegt).
+    @param component Name der Komponente
+    @return Logger
+    """
+    logger = _loggers.get(component)
+    if logger is None:
+        logger = _loggers[component] = Logger(component, _level)
+    return logger
+
+
+def configure(level="warning", path=""):
+    """
+    @brief Setzt Mindeststufe und Ziel für alle Logger.
+    @param level Stufenname oder Stufe
+    @param path Zieldatei (JSON-Lines, wird angehängt); leer für stderr
+    """
+    global _level, _writer
+    _level = level if isinstance(level, int) else parse_level(level)
+    for logger in _loggers.values():
+        logger.set_level(_level)
+    if path != _writer.path:
+        _writer.close()
+        _writer = LogWriter(path)
+
+
+def shutdown():
+    """
+    @brief Schreibt alle wartenden Einträge (z. B. vor Programmende).
+    """
+    _writer.close()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,87 @@
+##
+# @file multicast.py
+# @brief Hilfsfunktionen für den Discovery-Versand per IP-Multicast oder Broadcast.
+#
+# Im Modus "multicast" werden JOIN/LEAVE/WHO an eine konfigurierbare Multicast-Gruppe gesendet,
+# sodass nur Hosts, die der Gruppe beigetreten sind, die SLCP-Nachrichten erhalten. Der Modus
+# "broadcast" (Standard) nutzt weiterhin 255.255.255.255 und dient zugleich als Fallback.
+
+import socket
+import struct
+
+BROADCAST_ADDR = "255.255.255.255"
+DEFAULT_GROUP = "239.255.76.67"
+DISCOVERY_MODES = ("broadcast", "multicast", "gossip")  # gossip: Unicast ab Seed-Liste (Chat.network.gossip)
+
+
+def multicast_settings(data):
+    """
+    @brief Liest die Multicast-Einstellungen aus einem Konfigurations-Dictionary.
+
+    Erwartete (optionale) Schlüssel: discovery_mode, multicast_group, multicast_ttl, multicast_interface.
+
+    @param data Dictionary mit Konfigurationswerten (z. B. aus slcp_config.toml)
+    @return Dictionary mit den Schlüsseln mode, group, ttl, interface
+    """
+    mode = data.get("discovery_mode", "broadcast")
+    if mode not in DISCOVERY_MODES:
+        print(f"[Warnung] Unbekannter discovery_mode '{mode}', verwende broadcast")
+        mode = "broadcast"
+    return {
+        "mode": mode,
+        "group": data.get("multicast_group", DEFAULT_GROUP),
+        "ttl": int(data.get("multicast_ttl", 1)),
+        "interface": data.get("multicast_interface", "0.0.0.0"),
+    }
+
+
+def setup_multicast(sock, group, ttl=1, interface="0.0.0.0"):
+    """
+    @brief Konfiguriert einen UDP-Socket für Senden und Empfangen in einer Multicast-Gruppe.
+
+    Setzt TTL, Ausgangs-Interface und Loopback und tritt der Gruppe auf dem angegebenen
+    Interface bei. Mit interface="127.0.0.1" lässt sich der Modus lokal auf Loopback testen.
+
+    @param sock UDP-Socket (socket.socket oder asyncio TransportSocket)
+    @param group IPv4-Multicast-Gruppe, z. B. "239.255.76.67"
+    @param ttl Time-to-live der gesendeten Pakete (1 = nur lokales Segment)
+    @param interface IPv4-Adresse des Interfaces ("0.0.0.0" = Standard-Interface)
+    """
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    if interface != "0.0.0.0":
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    mreq = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+
+
+def probe_multicast(group, port, ttl=1, interface="0.0.0.0"):
+    """
+    @brief Prüft mit einem eigenen Socket, ob Datagramme an die Multicast-Gruppe gesendet werden können.
+
+    Der asyncio-Transport meldet Sendefehler nicht an den Aufrufer von sendto(), ein Fallback
+    muss daher vorher entschieden werden. connect() wählt die Route, ohne etwas zu senden.
+
+    @param group IPv4-Multicast-Gruppe
+    @param port Zielport (whoisport)
+    @param ttl Time-to-live der gesendeten Pakete
+    @param interface IPv4-Adresse des Interfaces ("0.0.0.0" = Standard-Interface)
+    @throws OSError Wenn keine Route zur Gruppe existiert oder das Interface ungültig ist
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        if interface != "0.0.0.0":
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+        sock.connect((group, port))
+
+
+def discovery_address(settings):
+    """
+    @brief Liefert die Zieladresse für Discovery-Nachrichten.
+
+    @param settings Ergebnis von multicast_settings()
+    @return Multicast-Gruppe im Modus "multicast", sonst die Broadcast-Adresse
+    """
+    if settings["mode"] == "multicast":
+        return settings["group"]
+    return BROADCAST_ADDR
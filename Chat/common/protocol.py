@@ -5,6 +5,23 @@
 # Diese Datei stellt das Kommunikationsprotokoll bereit, das vom Messenger und Discovery-Service
 # verwendet wird, um Text- und Bildnachrichten sowie Netzwerkanfragen zu senden und zu empfangen.
 
+from Chat.common.log import get_logger
+
+log = get_logger("protocol")
+
+def split_lines(text):
+    """
+    @brief Zerlegt empfangenen Text in SLCP-Zeilen.
+
+    Zeilenende ist nur "\n" (ein "\r" davor wird entfernt). Anders als str.splitlines()
+    trennt der Text nicht an Steuerzeichen wie "\x0c" oder "\u2028" innerhalb von Nachrichten.
+
+    @param text Dekodierter Datagramm-Inhalt
+    @return Liste nicht-leerer Zeilen
+    """
+    return [line.removesuffix("\r") for line in text.split("\n") if line and line != "\r"]
+
+
 def parse_slcp(line):
     """
     @brief Parst eine SLCP-Zeile (Simple Local Chat Protocol) in ein Dictionary.
@@ -16,6 +33,14 @@ def parse_slcp(line):
     - MSG <to> <message>
     - IMG <to> <size>
     - KNOWNUSERS <handle1> <ip1> <port1>, ...
+    - RMSG <to> <epoch> <seq> <message>  (zuverlässiger Modus)
+    - ACK <epoch> <cum> [<sack1>,<sack2>,...]  (zuverlässiger Modus)
+    - CAPS <handle> <cap1,cap2,...> [1]  (Ankündigung optionaler Fähigkeiten, z. B. BIN; 1 = Antwort)
+    - FRAG <to> <msgid> <index> <count> <chunk>  (Fragment einer langen Nachricht)
+    - RFRAG <to> <epoch> <seq> <msgid> <index> <count> <chunk>  (Fragment im zuverlässigen Modus)
+    - GOSSIP <handle> <port> <digest> <reply> [<cookie>]  (Digest der Peer-Tabelle, Gossip-Discovery;
+      reply 0 = Anfrage, 1 = Antwort, 2 = Echo des Cookies)
+    - MEMBERS <handle1> <ip1> <port1>, ...  (Peer-Tabelle als Antwort auf einen abweichenden Digest)
 
     @param line SLCP-Zeile als String
     @return Dictionary mit Schlüssel "type" und weiteren Feldern je nach Befehl
@@ -37,13 +62,40 @@ def parse_slcp(line):
 
         elif cmd == "MSG" and len(parts) >= 3:
             to = parts[1]
-            text = " ".join(parts[2:]).strip('"')
+            text = _unquote(" ".join(parts[2:]))
             return {"type": "MSG", "to": to, "message": text}
 
+        elif cmd == "RMSG" and len(parts) >= 5:
+            text = _unquote(" ".join(parts[4:]))
+            return {"type": "RMSG", "to": parts[1], "epoch": int(parts[2]),
+                    "seq": int(parts[3]), "message": text}
+
+        elif cmd == "ACK" and len(parts) in (3, 4):
+            sacks = [int(s) for s in parts[3].split(",") if s] if len(parts) == 4 else []
+            return {"type": "ACK", "epoch": int(parts[1]), "cum": int(parts[2]), "sacks": sacks}
+
+        elif cmd == "CAPS" and len(parts) in (3, 4):
+            return {"type": "CAPS", "handle": parts[1], "caps": [c for c in parts[2].split(",") if c],
+                    "reply": len(parts) == 4 and parts[3] == "1"}
+
+        elif cmd == "FRAG" and len(parts) >= 6:
+            return {"type": "FRAG", "to": parts[1], "msgid": int(parts[2]), "index": int(parts[3]),
+                    "count": int(parts[4]), "chunk": _unquote(" ".join(parts[5:]))}
+
+        elif cmd == "RFRAG" and len(parts) >= 8:
+            return {"type": "RFRAG", "to": parts[1], "epoch": int(parts[2]), "seq": int(parts[3]),
+                    "msgid": int(parts[4]), "index": int(parts[5]), "count": int(parts[6]),
+                    "chunk": _unquote(" ".join(parts[7:]))}
+
         elif cmd == "IMG" and len(parts) == 3:
             return {"type": "IMG", "to": parts[1], "size": int(parts[2])}
 
-        elif cmd == "KNOWNUSERS" and len(parts) >= 1:
+        elif cmd == "GOSSIP" and len(parts) in (5, 6):
+            return {"type": "GOSSIP", "handle": parts[1], "port": int(parts[2]), "digest": parts[3],
+                    "reply": parts[4] in ("1", "2"), "echo": parts[4] == "2",
+                    "cookie": parts[5] if len(parts) == 6 else None}
+
+        elif cmd in ("KNOWNUSERS", "MEMBERS") and len(parts) >= 1:
             users = []
             user_data = ' '.join(parts[1:]).split(',')
             for entry in user_data:
@@ -56,14 +108,28 @@ def parse_slcp(line):
                             "ip": user_parts[1],
                             "port": int(user_parts[2])
                         })
-            return {"type": "KNOWNUSERS", "users": users}
+            return {"type": cmd, "users": users}
 
     except (ValueError, IndexError) as e:
-        print(f"Parse error: {e} for line: {line}")
+        log.warning("parse_error", error=str(e), line=line)
 
     return {"type": "UNKNOWN", "raw": line}
 
 
+def _unquote(text):
+    """
+    @brief Entfernt genau ein umschließendes Paar Anführungszeichen.
+
+    Anders als strip('"') bleiben Anführungszeichen am Rand des Inhalts erhalten.
+
+    @param text Text in Anführungszeichen
+    @return Inhalt ohne die äußeren Anführungszeichen
+    """
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        return text[1:-1]
+    return text
+
+
 def create_join(handle, port):
     """
     @brief Erstellt eine JOIN-Nachricht.
@@ -96,6 +162,157 @@ def create_msg(target, text):
     return f'MSG {target} "{text}"\n'
 
 
+def create_msg_payload(text):
+    """
+    @brief Kodiert den Textteil einer MSG-Nachricht einmalig als Bytes.
+
+    Für Nachrichten an mehrere Empfänger wird der Text nur einmal kodiert und pro
+    Empfänger mit create_msg_for() um den Kopf ergänzt.
+
+    @param text Nachrichtentext
+    @return Kodierter Textteil (inkl. Anführungszeichen und Zeilenende)
+    """
+    return f' "{text}"\n'.encode()
+
+
+def create_msg_for(target, payload):
+    """
+    @brief Setzt eine MSG-Nachricht aus Empfänger und vorkodiertem Textteil zusammen.
+
+    @param target Empfänger-Handle
+    @param payload Ergebnis von create_msg_payload()
+    @return SLCP-konforme MSG-Zeile als Bytes (identisch zu create_msg(target, text).encode())
+    """
+    return b"MSG " + target.encode() + payload
+
+
+def create_rmsg(target, epoch, seq, text):
+    """
+    @brief Erstellt eine MSG-Nachricht mit Sequenznummer für den zuverlässigen Modus.
+
+    @param target Empfänger-Handle
+    @param epoch Sitzungskennung des Senders (ändert sich bei jedem Neustart)
+    @param seq Sequenznummer pro Empfänger (beginnend bei 1)
+    @param text Nachrichtentext
+    @return SLCP-konforme RMSG-Zeile
+    """
+    return f'RMSG {target} {epoch} {seq} "{text}"\n'
+
+
+def create_ack(epoch, cum, sacks=()):
+    """
+    @brief Erstellt eine Empfangsbestätigung für den zuverlässigen Modus.
+
+    @param epoch Sitzungskennung des Senders (aus der RMSG-Nachricht übernommen)
+    @param cum Kumulative Bestätigung: alle Sequenznummern bis einschließlich cum sind angekommen
+    @param sacks Selektiv bestätigte Sequenznummern oberhalb von cum
+    @return SLCP-konforme ACK-Zeile
+    """
+    if sacks:
+        return f"ACK {epoch} {cum} {','.join(map(str, sacks))}\n"
+    return f"ACK {epoch} {cum}\n"
+
+
+def create_knownusers_pages(entries, page_bytes=1200, max_bytes=None, command="KNOWNUSERS"):
+    """
+    @brief Kodiert eine Benutzerliste als eine oder mehrere KNOWNUSERS-Nachrichten.
+
+    Jede Seite ist eine vollständige KNOWNUSERS-Zeile mit höchstens page_bytes Bytes (sofern kein
+    einzelner Eintrag größer ist), damit sie in ein Datagramm passt. Einträge werden nicht geteilt.
+    Mit max_bytes wird die Gesamtgröße aller Seiten begrenzt; weitere Einträge entfallen.
+
+    @param entries Liste von (handle, ip, port) Tupeln
+    @param page_bytes Maximale Größe einer Seite in Bytes
+    @param max_bytes Maximale Gesamtgröße aller Seiten in Bytes (None = unbegrenzt)
+    @param command Befehl der Zeilen ("KNOWNUSERS" oder "MEMBERS" für Gossip)
+    @return Liste kodierter KNOWNUSERS-Zeilen (bytes)
+    """
+    head = command.encode() + b" "
+    overhead = len(head) + 1
+    pages, current, size, done = [], [], 0, 0
+    for handle, ip, port in entries:
+        entry = f"{handle} {ip} {port}".encode()
+        if current and size + 2 + len(entry) > page_bytes:
+            pages.append(head + b", ".join(current) + b"\n")
+            done += size
+            current, size = [], 0
+        added = len(entry) + (2 if current else overhead)
+        if max_bytes is not None and done + size + added > max_bytes:
+            break
+        current.append(entry)
+        size += added
+    if current:
+        pages.append(head + b", ".join(current) + b"\n")
+    return pages
+
+
+def create_gossip(handle, port, digest, reply=False, cookie=None, echo=False):
+    """
+    @brief Erstellt eine GOSSIP-Nachricht mit dem Digest der eigenen Peer-Tabelle.
+
+    Der Empfänger antwortet bei abweichendem Digest mit MEMBERS-Seiten, auf eine Anfrage
+    (reply=False) zusätzlich mit seinem eigenen Digest. Einem unbekannten Absender schickt er
+    dabei ein Cookie, das dieser per Echo zurücksenden muss, bevor er als Peer gilt.
+
+    @param handle Eigener Benutzername
+    @param port Eigener UDP/TCP-Port
+    @param digest Digest der Peer-Tabelle (Hex-String)
+    @param reply True für die Antwort auf eine GOSSIP-Anfrage
+    @param cookie Optionales Cookie (Aufforderung bzw. Echo)
+    @param echo True, wenn cookie das Echo eines empfangenen Cookies ist
+    @return SLCP-konforme GOSSIP-Zeile
+    """
+    flag = 2 if echo else 1 if reply else 0
+    suffix = f" {cookie}" if cookie else ""
+    return f"GOSSIP {handle} {port} {digest} {flag}{suffix}\n"
+
+
+def create_caps(handle, caps, reply=False):
+    """
+    @brief Erstellt eine CAPS-Nachricht zur Ankündigung optionaler Fähigkeiten.
+
+    Wird als eigenes Datagramm gesendet, damit Peers ohne Unterstützung sie einfach ignorieren.
+    Eine Ankündigung beantwortet der Empfänger mit seinen eigenen CAPS (reply=True), eine
+    Antwort dagegen nie.
+
+    @param handle Eigener Benutzername
+    @param caps Liste von Fähigkeiten, z. B. ["BIN"] für das Binärformat
+    @param reply True für die Antwort auf eine CAPS-Ankündigung
+    @return SLCP-konforme CAPS-Zeile
+    """
+    return f"CAPS {handle} {','.join(caps)}{' 1' if reply else ''}\n"
+
+
+def create_frag(target, msgid, index, count, chunk):
+    """
+    @brief Erstellt ein Fragment einer langen MSG-Nachricht.
+
+    @param target Empfänger-Handle
+    @param msgid Nachrichten-ID des Absenders (gleich für alle Fragmente einer Nachricht)
+    @param index Index des Fragments (0-basiert)
+    @param count Gesamtanzahl der Fragmente
+    @param chunk Maskierter Fragmenttext (ohne Zeilenumbrüche, siehe network/fragments.py)
+    @return SLCP-konforme FRAG-Zeile
+    """
+    return f'FRAG {target} {msgid} {index} {count} "{chunk}"\n'
+
+
+def create_rfrag(target, epoch, seq, msgid, index, count, chunk):
+    """
+    @brief Erstellt ein Fragment mit Sequenznummer für den zuverlässigen Modus.
+
+    @param target Empfänger-Handle
+    @param epoch Sitzungskennung des Senders
+    @param seq Sequenznummer pro Empfänger
+    @param msgid Nachrichten-ID des Absenders
+    @param index Index des Fragments (0-basiert)
+    @param count Gesamtanzahl der Fragmente
+    @param chunk Maskierter Fragmenttext
+    @return SLCP-konforme RFRAG-Zeile
+    """
+    return f'RFRAG {target} {epoch} {seq} {msgid} {index} {count} "{chunk}"\n'
+
+
 def create_img(target, size):
     """
     @brief Erstellt eine IMG-Nachricht zum Senden von Bilddaten.
@@ -107,6 +324,22 @@ def create_img(target, size):
     return f"IMG {target} {size}\n"
 
 
+def create_img_reply(status, detail=""):
+    """
+    @brief Erstellt eine Antwort des Empfängers auf einer IMG-Verbindung (TCP).
+
+    IMGREADY: Slot belegt, der Absender darf die Bilddaten senden.
+    IMGOK <size>: Bild vollständig gespeichert.
+    IMGERR <grund>: Übertragung abgelehnt oder fehlgeschlagen.
+
+    @param status "IMGREADY", "IMGOK" oder "IMGERR"
+    @param detail Größe bzw. Grund (einzeilig)
+    @return Antwortzeile
+    """
+    detail = " ".join(str(detail).split())
+    return f"{status} {detail}\n" if detail else f"{status}\n"
+
+
 def create_who():
     """
     @brief Erstellt eine WHO-Broadcast-Nachricht zur Abfrage aller bekannten Nutzer.
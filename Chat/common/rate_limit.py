@@ -0,0 +1,180 @@
+##
+# @file rate_limit.py
+# @brief Token-Bucket-Ratenbegrenzung pro Absender und Nachrichtenklasse für eingehende Datagramme.
+#
+# Die Begrenzung greift vor dem Parsen: Die Nachrichtenklasse wird nur am ersten Wort bzw. am
+# Typ-Byte eines Binärrahmens erkannt. Enthält ein Datagramm mehrere Zeilen, wird jede weitere
+# Zeile vor ihrer Verarbeitung einzeln belastet (siehe line_class()). Jede Klasse hat ein Budget (Rate pro Sekunde, Burst).
+# WHO und GOSSIP werden zusätzlich global begrenzt, da Antworten sonst mit gefälschten Absendern
+# zur Verstärkung (Amplification) missbraucht werden können.
+
+from time import monotonic
+from collections import Counter
+from Chat.common.binary_protocol import MAGIC
+
+## Standardbudgets: Klasse → (Rate pro Sekunde, Burst); Rate 0 = unbegrenzt
+DEFAULT_BUDGETS = {
+    "who": (1.0, 3),            # WHO pro Absender
+    "who_total": (20.0, 40),    # WHO insgesamt (gegen wechselnde, gefälschte Absender)
+    "join": (2.0, 10),          # JOIN, LEAVE, CAPS
+    "knownusers": (5.0, 20),
+    "gossip": (10.0, 40),       # GOSSIP, MEMBERS pro Absender
+    "gossip_total": (50.0, 100),  # GOSSIP, MEMBERS insgesamt
+    "msg": (100.0, 200),        # MSG, RMSG, IMG
+    "frag": (2000.0, 4000),     # FRAG, RFRAG
+    "ack": (4000.0, 8000),
+    "other": (10.0, 20),        # Unbekannte Befehle
+}
+
+## Maximale Größe einer KNOWNUSERS-Antwort auf ein WHO in Bytes
+WHO_MAX_BYTES = 8192
+
+## Klassen, die zusätzlich über einen gemeinsamen Bucket aller Absender begrenzt werden
+GLOBAL_CLASSES = {"who": "who_total", "gossip": "gossip_total"}
+
+_TEXT_CLASSES = {
+    b"WHO": "who", b"JOIN": "join", b"LEAVE": "join", b"CAPS": "join",
+    b"KNOWNUSERS": "knownusers", b"MSG": "msg", b"RMSG": "msg", b"IMG": "msg",
+    b"FRAG": "frag", b"RFRAG": "frag", b"ACK": "ack", b"GOSSIP": "gossip", b"MEMBERS": "gossip",
+}
+_LINE_CLASSES = {command.decode(): cls for command, cls in _TEXT_CLASSES.items()}
+# Typ-Bytes des Binärformats (siehe binary_protocol): MSG, RMSG, ACK, FRAG, RFRAG
+_BINARY_CLASSES = {1: "msg", 2: "msg", 3: "ack", 4: "frag", 5: "frag"}
+
+
+def rate_limit_budgets(data):
+    """
+    @brief Liest die Budgets aus einem Konfigurations-Dictionary.
+
+    Erwartet optional eine Tabelle [rate_limits] mit Einträgen wie `who = [1, 3]`
+    (Rate pro Sekunde, Burst). Nicht angegebene Klassen behalten ihr Standardbudget.
+
+    @param data Dictionary mit Konfigurationswerten (z. B. aus slcp_config.toml)
+    @return Dictionary Klasse → (rate, burst)
+    """
+    budgets = dict(DEFAULT_BUDGETS)
+    for name, value in data.get("rate_limits", {}).items():
+        if name not in budgets:
+            print(f"[Warnung] Unbekannte Klasse in rate_limits: '{name}'")
+            continue
+        try:
+            rate, burst = value
+            budgets[name] = (float(rate), max(1, int(burst)))
+        except (TypeError, ValueError):
+            print(f"[Warnung] Ungültiges Budget für '{name}': {value!r} (erwartet [rate, burst])")
+    return budgets
+
+
+def message_class(data):
+    """
+    @brief Ordnet ein rohes Datagramm einer Budgetklasse zu, ohne es zu parsen.
+
+    @param data Empfangene Bytes
+    @return Klassenname (z. B. "who", "msg"), "other" für Unbekanntes
+    """
+    if not data:
+        return "other"
+    if data[0] == MAGIC:
+        return _BINARY_CLASSES.get(data[1] if len(data) > 1 else 0, "other")
+    head = data[:11].split(None, 1)
+    return _TEXT_CLASSES.get(head[0], "other") if head else "other"
+
+
+def line_class(line):
+    """
+    @brief Ordnet eine einzelne (dekodierte) SLCP-Zeile einer Budgetklasse zu.
+
+    @param line SLCP-Zeile
+    @return Klassenname, "other" für Unbekanntes
+    """
+    head = line[:11].split(None, 1)
+    return _LINE_CLASSES.get(head[0], "other") if head else "other"
+
+
+class RateLimiter:
+    """
+    @class RateLimiter
+    @brief Token-Buckets pro (Absender-IP, Klasse) mit Zählern für verworfene Nachrichten.
+
+    Ein Bucket ist eine Liste [Tokens, Zeitpunkt, Rate, Burst]; aufgefüllt wird erst beim nächsten
+    Zugriff. Klassen mit Rate 0 erhalten keinen Bucket und sind unbegrenzt.
+    Die Anzahl der Buckets ist begrenzt: Bei Überlauf werden zuerst länger unbenutzte entfernt.
+    Globale Buckets (GLOBAL_CLASSES) liegen getrennt und werden nie entfernt, damit gefälschte
+    Absender die globale Grenze nicht durch Überlauf der Tabelle zurücksetzen.
+    """
+
+    def __init__(self, budgets=None, max_buckets=8192, idle=60.0):
+        """
+        @brief Konstruktor des RateLimiter.
+
+        @param budgets Dictionary Klasse → (rate, burst), Standard: DEFAULT_BUDGETS
+        @param max_buckets Maximale Anzahl gleichzeitig gehaltener Buckets
+        @param idle Sekunden ohne Zugriff, nach denen ein Bucket entfernt werden darf
+        """
+        self.budgets = dict(budgets or DEFAULT_BUDGETS)
+        self.max_buckets = max_buckets
+        self.idle = idle
+        self.buckets = {}  # (ip, klasse) → [tokens, zeitpunkt, rate, burst]
+        self.totals = {}  # globale Klasse → Bucket (unabhängig vom Absender, nie entfernt)
+        self.dropped = Counter()  # Klasse → Anzahl verworfener Datagramme
+
+    def allow(self, source, cls):
+        """
+        @brief Prüft, ob ein Datagramm einer Klasse von einem Absender verarbeitet werden darf.
+
+        @param source Absender (IP-Adresse)
+        @param cls Budgetklasse (siehe message_class())
+        @return True, wenn ein Token verfügbar war, sonst False (Datagramm verwerfen)
+        """
+        now = monotonic()
+        if not self._take(self.buckets, (source, cls), cls, now):
+            self.dropped[cls] += 1
+            return False
+        total = GLOBAL_CLASSES.get(cls)
+        if total is not None and not self._take(self.totals, total, total, now):
+            self.dropped[total] += 1
+            return False
+        return True
+
+    def allow_datagram(self, data, addr):
+        """
+        @brief Kurzform für allow(addr[0], message_class(data)).
+
+        @param data Empfangene Bytes
+        @param addr Absender-Adresse als (ip, port) Tupel
+        @return True, wenn das Datagramm verarbeitet werden darf
+        """
+        return self.allow(addr[0], message_class(data))
+
+    def _take(self, buckets, key, cls, now):
+        """
+        @brief Entnimmt einem Bucket ein Token (legt ihn bei Bedarf voll an).
+        @param buckets self.buckets (pro Absender) oder self.totals (global)
+        """
+        bucket = buckets.get(key)
+        if bucket is None:
+            rate, burst = self.budgets.get(cls) or self.budgets["other"]
+            if rate <= 0:
+                return True
+            if buckets is self.buckets and len(buckets) >= self.max_buckets:
+                self._prune(now)
+            buckets[key] = [burst - 1.0, now, rate, burst]
+            return True
+        tokens = bucket[0] + (now - bucket[1]) * bucket[2]
+        if tokens > bucket[3]:
+            tokens = bucket[3]
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1.0
+        return True
+
+    def _prune(self, now):
+        """
+        @brief Entfernt unbenutzte Buckets; reicht das nicht, werden alle verworfen.
+        """
+        for key in [k for k, b in self.buckets.items() if now - b[1] > self.idle]:
+            del self.buckets[key]
+        if len(self.buckets) >= self.max_buckets:
+            self.buckets.clear()
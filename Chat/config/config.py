@@ -5,6 +5,10 @@
 
 import toml  # Für das Einlesen/Schreiben der Konfigurationsdatei
 import os    # Für Datei- und Pfadoperationen
+from Chat.common.multicast import multicast_settings
+from Chat.common.log import parse_level
+from Chat.common.rate_limit import WHO_MAX_BYTES, rate_limit_budgets
+from Chat.network.io_executor import FSYNC_POLICIES
 
 class Config:
     """
@@ -13,45 +17,142 @@ class Config:
 
     Diese Klasse lädt, speichert und verwaltet Benutzereinstellungen aus einer TOML-Datei.
     Falls Werte fehlen (z. B. Benutzername oder Port), werden sie beim ersten Start interaktiv abgefragt.
+    Für den nicht-interaktiven Betrieb (Batch-Modus) können Werte als Overrides übergeben werden.
     """
 
-    def __init__(self, path="slcp_config.toml"):
+    def __init__(self, path="slcp_config.toml", overrides=None, interactive=True):
         """
         @brief Initialisiert eine neue Konfigurationsinstanz.
 
         - Liest Konfiguration aus Datei (sofern vorhanden).
+        - Überschreibt Werte mit übergebenen Overrides (z. B. aus Kommandozeilenargumenten).
         - Fragt fehlende Parameter interaktiv ab.
         - Erstellt Standardverzeichnisse bei Bedarf.
 
         @param path Dateipfad zur TOML-Konfigurationsdatei (Standard: slcp_config.toml)
+        @param overrides Optionales Dictionary mit Werten, die Vorrang vor der Datei haben
+        @param interactive False, um statt einer Abfrage einen ValueError bei fehlenden Werten auszulösen
         """
         self.path = path
+        self.interactive = interactive
         self.data = self.load()
+        self.data.update({k: v for k, v in (overrides or {}).items() if v is not None})
 
         # Benutzername (Handle) laden oder abfragen
-        self.handle = self.data.get("handle")
-        if not self.handle:
-            self.handle = input("Benutzername (handle): ")
-            self.data["handle"] = self.handle
+        self.handle = self.data.get("handle") or self._ask("handle", "Benutzername (handle): ")
+        self.data["handle"] = self.handle
 
         # Port laden oder abfragen
-        self.port = int(self.data.get("port") or input("Port: "))
+        self.port = int(self.data.get("port") or self._ask("port", "Port: "))
         self.data["port"] = self.port
 
         # Whois-Port laden oder abfragen
-        self.whoisport = int(self.data.get("whoisport") or input("Whois-Port (z. B. 4000): "))
+        self.whoisport = int(self.data.get("whoisport") or self._ask("whoisport", "Whois-Port (z. B. 4000): "))
         self.data["whoisport"] = self.whoisport
 
         # Automatische Antwort (optional)
         self.autoreply = self.data.get("autoreply", "")
 
+        # Höchstens eine automatische Antwort pro Peer und Intervall (Sekunden)
+        self.autoreply_interval = float(self.data.get("autoreply_interval", 30))
+
+        # Empfängergruppen für /msg (z. B. [groups] team = ["Bob", "Alice"])
+        self.groups = self.data.get("groups", {})
+
+        # Zuverlässige MSG-Zustellung (ACKs, Wiederholungen, Sendefenster)
+        self.reliable = bool(self.data.get("reliable", False))
+        self.reliable_window = int(self.data.get("reliable_window", 32))
+        self.reliable_retries = int(self.data.get("reliable_retries", 8))
+
+        # Maximale Datagrammgröße; längere Nachrichten werden fragmentiert
+        self.max_datagram = int(self.data.get("max_datagram", 1200))
+
+        # Wire-Format für Chatnachrichten: "text" (SLCP) oder "binary" (mit Fallback auf Text)
+        self.wire_format = self.data.get("wire_format", "text")
+        if self.wire_format not in ("text", "binary"):
+            raise ValueError(f"Ungültiges wire_format '{self.wire_format}' (erlaubt: text, binary)")
+
+        # Ratenbegrenzung eingehender Datagramme pro Absender und Klasse ([rate_limits])
+        self.rate_limits = rate_limit_budgets(self.data)
+        self.who_max_bytes = int(self.data.get("who_max_bytes", WHO_MAX_BYTES))
+
+        # Worker-Prozesse für eingehenden Verkehr (SO_REUSEPORT, 1 = nur der Hauptprozess)
+        self.workers = max(1, int(self.data.get("workers", 1)))
+
+        # Bildübertragungen: gleichzeitig aktive (gesamt/pro Peer) und maximal wartende
+        self.transfer_max_active = int(self.data.get("transfer_max_active", 4))
+        self.transfer_max_per_peer = int(self.data.get("transfer_max_per_peer", 2))
+        self.transfer_max_queued = int(self.data.get("transfer_max_queued", 32))
+        # Pufferspeicher aller aktiven Bildübertragungen in Bytes (0 = unbegrenzt)
+        self.transfer_memory_budget = int(self.data.get("transfer_memory_budget", 64 * 1024 * 1024))
+        # tracemalloc beim Start einschalten (für /mem; kostet spürbar Leistung)
+        self.tracemalloc = bool(self.data.get("tracemalloc", False))
+
+        # Bandbreite für Bildübertragungen in Bytes/s, gesamt und pro Peer (0 = unbegrenzt)
+        self.bandwidth_limit = int(self.data.get("bandwidth_limit", 0))
+        self.bandwidth_peer_limit = int(self.data.get("bandwidth_peer_limit", 0))
+
+        # Überwachung des Eventloops: Lag-Messung und Erkennung blockierender Callbacks (ab slow_callback_ms)
+        self.loop_monitor = bool(self.data.get("loop_monitor", True))
+        self.slow_callback_ms = int(self.data.get("slow_callback_ms", 100))
+
+        # Dateisystem-Zugriffe (I/O-Threads, Schreibpuffer, fsync-Strategie)
+        self.io_workers = int(self.data.get("io_workers", 2))
+        self.write_buffer = int(self.data.get("write_buffer", 1024 * 1024))
+        self.fsync = self.data.get("fsync", "close")
+        if self.fsync not in FSYNC_POLICIES:
+            print(f"[Warnung] Unbekannte fsync-Strategie '{self.fsync}', verwende close")
+            self.fsync = "close"
+
+        # Discovery per Broadcast (Standard), Multicast-Gruppe oder Gossip (discovery_mode = "gossip")
+        self.multicast = multicast_settings(self.data)
+
+        # Gossip-Discovery: Seeds ("ip:port"), Rundenintervall in Sekunden, Partner pro Runde,
+        # maximale Größe der MEMBERS-Antwort in Bytes
+        self.gossip_seeds = [str(seed) for seed in self.data.get("gossip_seeds", [])]
+        self.gossip_interval = float(self.data.get("gossip_interval", 1.0))
+        self.gossip_fanout = max(1, int(self.data.get("gossip_fanout", 3)))
+        self.gossip_max_bytes = int(self.data.get("gossip_max_bytes", 32768))
+
+        # Persistenter Peer-Cache für schnelle Neustarts (leer = aus), Speicherintervall und maximales Alter in Sekunden
+        self.peer_cache = self.data.get("peer_cache", "slcp_peers.json")
+        self.peer_cache_interval = float(self.data.get("peer_cache_interval", 60))
+        self.peer_cache_max_age = float(self.data.get("peer_cache_max_age", 7 * 24 * 3600))
+
+        # Mitschnitt eingehender Datagramme und TCP-Kopfzeilen zum Abspielen (leer = aus)
+        self.capture_file = self.data.get("capture_file", "")
+
+        # Strukturiertes Log (JSON-Lines): Mindeststufe und Datei (leer = stderr)
+        self.log_level = self.data.get("log_level", "warning")
+        parse_level(self.log_level)  # ValueError bei unbekannter Stufe
+        self.log_file = self.data.get("log_file", "")
+
+        # Terminalausgabe: maximale Bildrate und Quiet-Modus (keine Ausgabe)
+        self.render_fps = int(self.data.get("render_fps", 20))
+        if self.render_fps < 1:
+            raise ValueError(f"Ungültige render_fps {self.render_fps} (mindestens 1)")
+        self.quiet = bool(self.data.get("quiet", False))
+
         # Pfad für empfangene Bilder vorbereiten
         self.imagepath = self._setup_imagepath()
 
-        # Konfiguration speichern, falls sie neu ist oder aktualisiert wurde
-        if not os.path.exists(self.path) or "handle" not in toml.load(self.path):
+        # Konfiguration speichern, falls sie neu ist oder aktualisiert wurde (nicht im Batch-Modus)
+        if self.interactive and (not os.path.exists(self.path) or "handle" not in toml.load(self.path)):
             self.save()
 
+    def _ask(self, key, prompt):
+        """
+        @brief Fragt einen fehlenden Konfigurationswert ab.
+
+        @param key Name des Konfigurationsschlüssels
+        @param prompt Eingabeaufforderung für den interaktiven Modus
+        @return Eingegebener Wert
+        @throws ValueError Im nicht-interaktiven Modus, da der Wert fehlt
+        """
+        if not self.interactive:
+            raise ValueError(f"Fehlender Konfigurationswert '{key}' (Datei {self.path} oder Argument)")
+        return input(prompt)
+
     def _setup_imagepath(self):
         """
         @brief Bereitet den Ordnerpfad für empfangene Bilder vor.
@@ -9,9 +9,16 @@ import toml  # Zum Laden der TOML-Konfigurationsdatei
 import time  # Für Zeitfunktionen wie sleep
 import sys  # Für Systemfunktionen, z.B. Programm beenden
 import errno  # Für Fehlerspezifische Nummern (z.B. Port belegt)
+from Chat.common.capture import KIND_DISCOVERY
+from Chat.common.log import get_logger
+from Chat.common.multicast import BROADCAST_ADDR, discovery_address, multicast_settings, setup_multicast
+from Chat.common.protocol import create_knownusers_pages
+from Chat.common.rate_limit import WHO_MAX_BYTES, RateLimiter, rate_limit_budgets
 
 BROADCAST_PORT = 4000
-BUFFER_SIZE = 1024
+BUFFER_SIZE = 65535  # Maximale UDP-Nutzlast, damit lange KNOWNUSERS-Listen nicht abgeschnitten werden
+
+log = get_logger("discovery")
 
 def is_port_in_use(port: int) -> bool:
     """
@@ -51,7 +58,7 @@ class DiscoveryService:
 
         self.config = self.load_config(config_path)
 
-        print("[DEBUG] Geladene Konfiguration:", self.config)
+        log.debug("config_loaded", path=config_path, config=self.config)
 
         try:
             self.handle = self.config["handle"]  # Benutzername/Handle
@@ -61,12 +68,32 @@ class DiscoveryService:
             sys.exit(1)
 
         self.whois_port = self.config.get("whoisport", 0)  # Optionaler Whois-Port
+        self.handles = [self.handle]  # Angekündigte lokale Handles (mehrere bei einem IdentityHost)
+
+        # Ratenbegrenzung pro Absender und Nachrichtenklasse (vor dem Parsen)
+        self.limiter = RateLimiter(rate_limit_budgets(self.config))
+        self.who_max_bytes = int(self.config.get("who_max_bytes", WHO_MAX_BYTES))
+        self.max_datagram = int(self.config.get("max_datagram", 1200))
+        self._knownusers_pages = None  # Kodierte KNOWNUSERS-Antwort, ungültig bei Peer-Änderungen
+        self._local_ip = None
+        self.capture = None  # Optionaler Mitschnitt (Chat.common.capture.Capture), z. B. der des Messengers
 
         # UDP-Socket erstellen und für Broadcast konfigurieren
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         self.sock.bind(('', BROADCAST_PORT))  # An alle Interfaces binden, Broadcast-Port
 
+        # Optional: Multicast-Gruppe statt Broadcast (Fallback auf Broadcast bei Fehler)
+        self.multicast = multicast_settings(self.config)
+        self.target_addr = discovery_address(self.multicast)
+        if self.multicast["mode"] == "multicast":
+            try:
+                setup_multicast(self.sock, self.multicast["group"],
+                                self.multicast["ttl"], self.multicast["interface"])
+            except OSError as e:
+                print(f"[Warnung] Multicast nicht verfügbar ({e}), verwende Broadcast")
+                self.target_addr = BROADCAST_ADDR
+
     @staticmethod
     def load_config(path):
         """
@@ -91,12 +118,18 @@ class DiscoveryService:
         while self.running:
             try:
                 data, addr = self.sock.recvfrom(BUFFER_SIZE)
+                if self.capture is not None:
+                    self.capture.record(KIND_DISCOVERY, addr, data)
+                if not self.limiter.allow_datagram(data, addr):
+                    continue  # Budget erschöpft, verworfen (siehe limiter.dropped)
                 message = data.decode("utf-8").strip()
 
-                print(f"[DISCOVERY] Empfangen: {message} von {addr}")
+                if log.debug_enabled:
+                    log.debug("received", addr=addr, message=message)
                 self.handle_message(message, addr)
             except Exception as e:
-                print(f"[Fehler beim Empfangen] {e}")
+                if self.running:
+                    log.error("receive_failed", error=str(e))
 
     def handle_message(self, message, addr):
         """
@@ -117,86 +150,133 @@ class DiscoveryService:
             try:
                 tcp_port = int(parts[2])
                 with self.peers_lock:
-                    self.peers[handle] = (ip, tcp_port)
+                    if self.peers.get(handle) != (ip, tcp_port):
+                        self.peers[handle] = (ip, tcp_port)
+                        self._knownusers_pages = None
+                        log.info("peer_joined", handle=handle, ip=ip, port=tcp_port)
             except ValueError:
-                print("[Fehler] Ungültiger Port in JOIN.")
+                log.warning("invalid_join", addr=addr, message=message)
 
         elif cmd == "LEAVE" and len(parts) == 2:
             handle = parts[1]
             with self.peers_lock:
-                self.peers.pop(handle, None)
+                if self.peers.pop(handle, None) is not None:
+                    self._knownusers_pages = None
+                    log.info("peer_left", handle=handle)
 
         elif cmd == "WHO" and len(parts) == 1:
-            with self.peers_lock:
-                seen = set()
-                user_infos = []
-
-                for handle, (ip, port) in self.peers.items():
-                    entry = f"{handle} {ip} {port}"
-                    if entry not in seen and (handle != self.handle or ip != self.get_local_ip() or port != self.port):
-                        user_infos.append(entry)
-                        seen.add(entry)
-
-                self_info = f"{self.handle} {self.get_local_ip()} {self.port}"
-                if self_info not in seen:
-                    user_infos.append(self_info)
-
-            msg = "KNOWNUSERS " + ", ".join(user_infos) + "\n"
-            self.sock.sendto(msg.encode("utf-8"), addr)
+            for page in self.knownusers_pages():
+                self.sock.sendto(page, addr)
 
         elif cmd == "KNOWNUSERS" and len(parts) >= 2:
             user_str = message[len("KNOWNUSERS "):].strip()
             user_list = [u.strip() for u in user_str.split(",") if u.strip()]
 
-            print("[DISCOVERY] KNOWNUSERS-Liste:")
+            log.debug("knownusers", addr=addr, count=len(user_list))
 
             with self.peers_lock:
                 seen = set()
                 for entry in user_list:
                     infos = entry.strip().split()
                     if len(infos) != 3:
-                        print(f"[WARNUNG] Ungültiger KNOWNUSERS-Eintrag: {entry}")
+                        log.warning("invalid_knownusers_entry", addr=addr, entry=entry)
                         continue
 
                     handle, ip, port = infos
                     # TODO: Bekannte Peers hier verarbeiten
 
+    def knownusers_pages(self):
+        """
+        @brief Liefert die kodierte KNOWNUSERS-Antwort auf ein WHO.
+
+        Enthält die eigenen Einträge und alle bekannten Peers, aufgeteilt in Seiten, die je in ein
+        Datagramm passen, und insgesamt auf who_max_bytes begrenzt. Neu erzeugt wird sie nur,
+        wenn sich die Peer-Tabelle seit dem letzten Aufruf geändert hat.
+
+        @return Liste von KNOWNUSERS-Zeilen (bytes)
+        """
+        with self.peers_lock:
+            if self._knownusers_pages is None:
+                local_ip = self.get_local_ip()
+                entries = [(handle, local_ip, self.port) for handle in self.handles]
+                local = set(self.handles)
+                entries.extend((handle, ip, port) for handle, (ip, port) in self.peers.items()
+                               if handle not in local or ip != local_ip or port != self.port)
+                self._knownusers_pages = create_knownusers_pages(entries, self.max_datagram, self.who_max_bytes)
+            return self._knownusers_pages
+
     def send_who(self):
         """
         @brief Sendet eine WHO-Anfrage als UDP-Broadcast, um bekannte Peers abzufragen.
         """
         msg = "WHO\n"
-        print("[DEBUG] sende WHO-Broadcast...")
-        self.sock.sendto(msg.encode("utf-8"), ('255.255.255.255', BROADCAST_PORT))
+        log.debug("who_sent")
+        self.send_discovery(msg)
 
     def get_local_ip(self):
         """
         @brief Ermittelt die lokale IP-Adresse des Hosts.
 
+        Eine erfolgreich ermittelte Adresse wird zwischengespeichert.
+
         @return String mit der lokalen IP-Adresse
         """
+        if self._local_ip is not None:
+            return self._local_ip
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
+            self._local_ip = s.getsockname()[0]
             s.close()
-            return ip
+            return self._local_ip
         except Exception:
             return "127.0.0.1"
 
     def send_join(self):
         """
-        @brief Sendet eine JOIN-Nachricht als Broadcast, um sich anzumelden.
+        @brief Sendet für jedes lokale Handle eine JOIN-Nachricht als Broadcast, um sich anzumelden.
         """
-        msg = f"JOIN {self.handle} {self.port}\n"
-        self.sock.sendto(msg.encode("utf-8"), ('255.255.255.255', BROADCAST_PORT))
+        for handle in list(self.handles):
+            self.send_discovery(f"JOIN {handle} {self.port}\n")
 
     def send_leave(self):
         """
-        @brief Sendet eine LEAVE-Nachricht als Broadcast, um sich abzumelden.
+        @brief Sendet für jedes lokale Handle eine LEAVE-Nachricht als Broadcast, um sich abzumelden.
+        """
+        for handle in list(self.handles):
+            self.send_discovery(f"LEAVE {handle}\n")
+
+    def set_handles(self, handles, port=None):
+        """
+        @brief Legt die lokalen Handles fest, die per JOIN/LEAVE und in KNOWNUSERS angekündigt werden.
+
+        Wird vom IdentityHost genutzt, damit ein Discovery-Dienst alle Identitäten eines Prozesses vertritt.
+
+        @param handles Liste lokaler Handles
+        @param port Gemeinsamer Port der Handles (Standard: unverändert)
         """
-        msg = f"LEAVE {self.handle}\n"
-        self.sock.sendto(msg.encode("utf-8"), ('255.255.255.255', BROADCAST_PORT))
+        with self.peers_lock:
+            self.handles = list(handles)
+            if port is not None:
+                self.port = port
+            self._knownusers_pages = None
+
+    def send_discovery(self, msg):
+        """
+        @brief Sendet eine Discovery-Nachricht an die Multicast-Gruppe bzw. per Broadcast.
+
+        Scheitert der Versand an die Multicast-Gruppe, wird die Nachricht per Broadcast gesendet.
+
+        @param msg SLCP-Nachricht als String
+        """
+        data = msg.encode("utf-8")
+        if self.target_addr != BROADCAST_ADDR:
+            try:
+                self.sock.sendto(data, (self.target_addr, BROADCAST_PORT))
+                return
+            except OSError as e:
+                print(f"[Warnung] Multicast-Versand fehlgeschlagen ({e}), sende per Broadcast")
+        self.sock.sendto(data, (BROADCAST_ADDR, BROADCAST_PORT))
 
     def get_peers(self):
         """
@@ -207,9 +287,12 @@ class DiscoveryService:
         with self.peers_lock:
             return dict(self.peers)
 
-    def start(self):
+    def start(self, who=True, join=True):
         """
         @brief Startet den Discovery-Service: Listener-Thread, JOIN und WHO senden.
+
+        @param who False, um kein Broadcast-WHO zu senden (z. B. wenn Peers aus dem Cache geprüft werden)
+        @param join False, um kein JOIN zu senden (z. B. wenn ein IdentityHost seine Handles selbst ankündigt)
         """
         listener = threading.Thread(target=self.listen)
         listener.daemon = True
@@ -217,9 +300,11 @@ class DiscoveryService:
 
         time.sleep(0.5)
 
-        self.send_join()
-        time.sleep(0.5)
-        self.send_who()
+        if join:
+            self.send_join()
+        if who:
+            time.sleep(0.5)
+            self.send_who()
 
     def stop(self):
         """
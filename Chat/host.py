@@ -0,0 +1,129 @@
+"""
+@file host.py
+@brief Betreibt viele Handles (z. B. Bots) in einem Prozess mit gemeinsamem UDP-Socket und TCP-Server.
+
+Aufruf: `python -m Chat.host --count 200 --prefix bot --port 5001 --whoisport 4000 [--echo] [--discovery]`
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from Chat.common import log
+from Chat.config.config import Config
+from Chat.discovery.discovery_service import DiscoveryService
+from Chat.network.events import MESSAGE
+from Chat.network.host import IdentityHost
+
+
+def parse_args(argv=None):
+    """
+    @brief Liest die Kommandozeilenargumente des Host-Modus.
+
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return argparse.Namespace mit den Argumenten
+    """
+    parser = argparse.ArgumentParser(description="Viele SLCP-Handles in einem Prozess betreiben")
+    parser.add_argument("--config", default="slcp_config.toml", help="Pfad zur TOML-Konfigurationsdatei")
+    parser.add_argument("--handles", default="", help="Kommagetrennte Handles, z. B. Bot1,Bot2")
+    parser.add_argument("--count", type=int, default=0, help="Zusätzlich n Handles <prefix>1 ... <prefix>n")
+    parser.add_argument("--prefix", default="bot", help="Präfix für --count")
+    parser.add_argument("--port", type=int, help="Gemeinsamer Port für UDP/TCP (überschreibt Konfiguration)")
+    parser.add_argument("--whoisport", type=int, help="Whois-Port (überschreibt Konfiguration)")
+    parser.add_argument("--imagepath", help="Verzeichnis für empfangene Bilder")
+    parser.add_argument("--discovery", action="store_true",
+                        help="Gemeinsamen Discovery-Dienst auf dem Whois-Port betreiben (WHO-Antworten für alle Handles)")
+    parser.add_argument("--echo", action="store_true", help="Jede empfangene Nachricht an den Absender zurücksenden")
+    parser.add_argument("--json", action="store_true", help="Empfangene Nachrichten als JSON-Lines ausgeben")
+    parser.add_argument("--verbose", action="store_true", help="Statusmeldungen des Hosts auf stderr ausgeben")
+    return parser.parse_args(argv)
+
+
+def subscribe(identity, args, counts):
+    """
+    @brief Abonniert die Nachrichten einer Identität (Ausgabe und ggf. Echo).
+
+    @param identity Identity des Hosts
+    @param args Kommandozeilenargumente
+    @param counts Dictionary handle → Anzahl empfangener Nachrichten
+    """
+    async def on_message(sender, message, address):
+        counts[identity.handle] += 1
+        if args.json:
+            print(json.dumps({"to": identity.handle, "from": sender, "message": message}, ensure_ascii=False))
+        else:
+            print(f"[{identity.handle}] {sender}: {message}")
+        if args.echo:
+            # Antwort an die Absenderadresse; MSG nennt kein Absender-Handle, daher nur bei eindeutigem Peer
+            handles = identity.host.handles_at(address)
+            if len(handles) == 1:
+                await identity.send_message(handles[0], message)
+            else:
+                log.get_logger("host").warning("echo_skipped", to=identity.handle, address=address,
+                                               handles=handles)
+
+    identity.events.subscribe(MESSAGE, on_message)
+
+
+async def main(argv=None):
+    """
+    @brief Startet den Host mit allen Handles und läuft bis Strg+C.
+
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return Exit-Code
+    """
+    args = parse_args(argv)
+    handles = [h.strip() for h in args.handles.split(",") if h.strip()]
+    handles += [f"{args.prefix}{n}" for n in range(1, args.count + 1)]
+    if not handles:
+        print("[Error] Keine Handles angegeben (--handles oder --count)", file=sys.stderr)
+        return 2
+
+    overrides = {
+        "handle": handles[0],
+        "port": args.port,
+        "whoisport": args.whoisport,
+        "imagepath": args.imagepath,
+        "quiet": True,
+        "workers": 1,  # Worker-Prozesse kennen die Identitäten nicht
+    }
+    try:
+        config = Config(args.config, overrides, interactive=False)
+        host = IdentityHost(config, handles)
+    except ValueError as e:
+        print(f"[Error] {e}", file=sys.stderr)
+        return 2
+
+    log.configure(config.log_level, config.log_file)
+    host.output = (lambda text: print(text, file=sys.stderr)) if args.verbose else (lambda text: None)
+    counts = dict.fromkeys(host.identities, 0)
+    for identity in host.identities.values():
+        subscribe(identity, args, counts)
+
+    if args.discovery:
+        discovery = DiscoveryService(args.config)
+        host.discovery = discovery
+        discovery.set_handles(list(host.identities), config.port)
+        discovery.capture = host.capture
+        await asyncio.to_thread(discovery.start, False, False)  # JOINs sendet der Host gedrosselt
+
+    await host.start_listener()  # Kündigt alle Handles per JOIN an (gedrosselt)
+    await host.send_who()
+    print(f"[HOST] {len(host.identities)} Handles auf Port {config.port}", file=sys.stderr)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await host.send_leave()
+        await host.save_peer_cache()
+        received = sum(counts.values())
+        print(f"[HOST] {received} Nachrichten an {sum(1 for c in counts.values() if c)} Handles empfangen",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        pass
@@ -4,10 +4,14 @@
 """
 
 import asyncio
+from Chat.common import log
 from Chat.config.config import Config
+from Chat.network.events import IMAGE, KNOWNUSERS, LATEST, MESSAGE, PROGRESS
 from Chat.network.messenger import Messenger
+from Chat.network.workers import WorkerPool
 from Chat.discovery.discovery_service import DiscoveryService
 from Chat.client.interface import Interface
+from Chat.client.renderer import Renderer
 
 
 async def main():
@@ -33,12 +37,16 @@ async def main():
     
     # 1. Konfiguration laden (z. B. aus slcp_config.toml)
     config = Config()
+    log.configure(config.log_level, config.log_file)
 
-    # 2. Messenger-Komponente für SLCP-Protokoll initialisieren
+    # 2. Messenger-Komponente für SLCP-Protokoll initialisieren,
+    #    Statusmeldungen laufen gebündelt über den Renderer
+    renderer = Renderer(fps=config.render_fps, quiet=config.quiet)
     messenger = Messenger(config)
+    messenger.output = renderer.emit
 
-    # 3. Optional: Callback zur Anzeige des Dateiübertragungsfortschritts definieren
-    def my_progress_callback(direction, peer, progress, sent, total):
+    # 3. Optional: Anzeige des Dateiübertragungsfortschritts abonnieren
+    def my_progress_callback(direction, peer, progress, sent, total, transfer_id):
         """
         @brief Zeigt den Fortschritt von Dateiübertragungen im Terminal.
 
@@ -47,28 +55,55 @@ async def main():
         @param progress Fortschritt in Prozent (float)
         @param sent Bereits übertragene Bytes
         @param total Gesamtgröße der Datei
+        @param transfer_id ID der Übertragung im TransferManager (None ohne Transfer-Objekt)
         """
-        print(f"{direction} {progress:.1f}% ({sent}/{total} bytes) für {peer}")
-
-    messenger.set_progress_callback(my_progress_callback)
-
-    # 4. Discovery-Dienst starten (Broadcast JOIN + WHO → Peer-Erkennung)
-    discovery = DiscoveryService("slcp_config.toml")
-    discovery.start()
-
-    # 5. Benutzeroberfläche (CLI) vorbereiten
-    interface = Interface(config, messenger)
-
-    # 6. Callbacks verknüpfen, damit Interface auf Ereignisse reagieren kann
-    messenger.set_message_callback(interface.display_message)
-    messenger.set_image_callback(interface.display_image_notice)
-    messenger.set_knownusers_callback(interface.display_knownusers)
-
-    # 7. Starte UDP-Listener für eingehende SLCP-Nachrichten
+        renderer.emit(f"{direction} {progress:.1f}% ({sent}/{total} bytes) für {peer}")
+
+    # Nur der neueste Stand je Übertragung (Transfer-ID) wartet, ältere Zwischenstände werden ersetzt
+    messenger.events.subscribe(PROGRESS, my_progress_callback, policy=LATEST,
+                               key=lambda args: args[5] if args[5] is not None else args[:2])
+
+    # 4. Peers aus dem Cache laden (Warmstart: /msg funktioniert sofort)
+    cached = messenger.load_peer_cache()
+
+    # 5. Discovery-Dienst starten (Broadcast JOIN + WHO → Peer-Erkennung; mit Cache ohne Broadcast-WHO).
+    #    Im Gossip-Modus übernimmt der Messenger die Discovery per Unicast (siehe network/gossip.py)
+    if messenger.gossip is None:
+        discovery = DiscoveryService("slcp_config.toml")
+        discovery.capture = messenger.capture  # Gemeinsamer Mitschnitt (falls capture_file gesetzt)
+        discovery.start(who=not cached)
+
+    # 6. Benutzeroberfläche (CLI) vorbereiten
+    interface = Interface(config, messenger, renderer)
+
+    # 7. Ereignisse abonnieren, damit Interface darauf reagieren kann (eigene Warteschlangen,
+    #    die Netzwerkverarbeitung wartet nicht auf die Anzeige)
+    messenger.events.subscribe(MESSAGE, interface.display_message)
+    messenger.events.subscribe(IMAGE, interface.display_image_notice)
+    messenger.events.subscribe(KNOWNUSERS, interface.display_knownusers)
+
+    # 8. Optional: Worker-Prozesse, die eingehenden Verkehr per SO_REUSEPORT mitverarbeiten
+    workers = None
+    if config.workers > 1:
+        workers = WorkerPool(messenger, config.workers - 1)
+        workers.start()
+
+    # 9. Starte UDP-Listener für eingehende SLCP-Nachrichten,
+    #    Cache-Peers im Hintergrund per Unicast prüfen
     await messenger.start_listener()
-
-    # 8. Benutzeroberfläche starten → Befehlseingabe lesen und verarbeiten
-    await interface.run()
+    if cached:
+        asyncio.create_task(messenger.probe_peers(cached))
+
+    # 10. Benutzeroberfläche starten → Befehlseingabe lesen und verarbeiten
+    try:
+        await interface.run()
+    finally:
+        if workers is not None:
+            await workers.stop()
+        await messenger.save_peer_cache()
+        if messenger.capture is not None:
+            messenger.capture.close()
+        log.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,250 @@
+"""
+@file events.py
+@brief Ereignisbus des Messengers: beliebig viele Abonnenten mit eigener, begrenzter Warteschlange.
+@details
+    Der Messenger veröffentlicht Ereignisse (Nachricht, Bild, Benutzerliste, Fortschritt, Peer-Änderung)
+    mit publish(), ohne auf die Abonnenten zu warten. Jeder Abonnent hat eine eigene Warteschlange,
+    die ein eigener Task abarbeitet; ein langsamer Abonnent (Terminal, Verlauf, Metriken) hält so
+    weder die Netzwerkverarbeitung noch andere Abonnenten auf. Läuft eine Warteschlange über,
+    entscheidet die Überlaufstrategie des Abonnenten:
+    - DROP_OLDEST: ältestes wartendes Ereignis verwerfen (Standard, z. B. Terminal)
+    - DROP_NEWEST: neues Ereignis verwerfen (z. B. Verlauf, der lückenlos ab Beginn sein soll)
+    - LATEST: nur das neueste Ereignis je Schlüssel behalten (z. B. Fortschritt je Übertragung)
+    Ob ein Callback synchron oder asynchron ist, wird einmal beim Abonnieren festgestellt.
+    Mit maxsize=0 wird ein synchroner Callback ohne Warteschlange direkt in publish() aufgerufen
+    (für schnelle Weiterleitungen, deren Reihenfolge zur Netzwerkverarbeitung passen muss).
+"""
+
+import asyncio
+import collections
+import inspect
+from Chat.common.log import get_logger
+
+## Ereignistypen und ihre Argumente
+MESSAGE = "message"  # (sender_handle, message, address) – address: (ip, port) des Absenders
+IMAGE = "image"  # (sender_handle, filename)
+KNOWNUSERS = "knownusers"  # (users_list) – Liste von (handle, ip, port)
+PROGRESS = "progress"  # (direction, handle, progress, bytes_transferred, total_bytes, transfer_id)
+PEER = "peer"  # (kind, handle, value) – kind: "join", "leave" oder "caps"
+
+EVENTS = {
+    MESSAGE: ("sender", "message", "address"),
+    IMAGE: ("sender", "filename"),
+    KNOWNUSERS: ("users",),
+    PROGRESS: ("direction", "handle", "progress", "transferred", "total", "transfer"),
+    PEER: ("kind", "handle", "value"),
+}
+
+## Überlaufstrategien
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+LATEST = "latest"
+POLICIES = (DROP_OLDEST, DROP_NEWEST, LATEST)
+
+## Standardgröße einer Warteschlange
+DEFAULT_MAXSIZE = 1024
+
+## Anzahl synchroner Callbacks, nach denen der Abarbeitungs-Task den Eventloop freigibt
+_BATCH = 32
+
+log = get_logger("events")
+
+
+class Subscription:
+    """
+    @class Subscription
+    @brief Ein Abonnent mit eigener Warteschlange und Überlaufstrategie.
+    """
+
+    def __init__(self, bus, event, callback, maxsize=DEFAULT_MAXSIZE, policy=DROP_OLDEST, key=None):
+        """
+        @brief Konstruktor der Subscription (über EventBus.subscribe erzeugen).
+        @param bus Zugehöriger EventBus
+        @param event Ereignistyp (siehe EVENTS)
+        @param callback Synchrone oder asynchrone Funktion mit den Argumenten des Ereignistyps
+        @param maxsize Maximale Anzahl wartender Ereignisse (0 = synchron ohne Warteschlange)
+        @param policy Überlaufstrategie (DROP_OLDEST, DROP_NEWEST, LATEST)
+        @param key Bei LATEST: Funktion args → Schlüssel (Standard: die ersten beiden Argumente)
+        """
+        self.bus = bus
+        self.event = event
+        self.callback = callback
+        self.is_async = inspect.iscoroutinefunction(callback)  # Einmalig beim Abonnieren
+        self.maxsize = maxsize
+        self.policy = policy
+        self.key = key or (lambda args: args[:2])
+        self.queue = {} if policy == LATEST else collections.deque()  # LATEST: Schlüssel → args
+        self.task = None  # Abarbeitungs-Task, läuft nur solange Ereignisse warten
+        self.delivered = 0
+        self.dropped = 0
+
+    @property
+    def name(self):
+        """
+        @brief Lesbarer Name des Callbacks (für Logs und Statistik).
+        """
+        return getattr(self.callback, "__qualname__", repr(self.callback))
+
+    def offer(self, args):
+        """
+        @brief Stellt ein Ereignis ein (ohne zu warten) und startet bei Bedarf den Abarbeitungs-Task.
+        @param args Argumente des Ereignisses als Tupel
+        """
+        if self.maxsize == 0:
+            self._call_sync(args)
+            return
+        queue = self.queue
+        if self.policy == LATEST:
+            key = self.key(args)
+            if key not in queue and len(queue) >= self.maxsize:
+                del queue[next(iter(queue))]
+                self._drop()
+            queue[key] = args  # Vorhandener Schlüssel behält seinen Platz, nur der Wert wird ersetzt
+        elif len(queue) >= self.maxsize:
+            self._drop()
+            if self.policy == DROP_NEWEST:
+                return
+            queue.popleft()
+            queue.append(args)
+        else:
+            queue.append(args)
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._drain())
+
+    def _drop(self):
+        """
+        @brief Zählt ein verworfenes Ereignis und protokolliert beim 1., 2., 4., 8., ... Mal.
+        """
+        self.dropped += 1
+        if self.dropped & (self.dropped - 1) == 0:
+            log.warning("event_dropped", type=self.event, subscriber=self.name,
+                        policy=self.policy, dropped=self.dropped)
+
+    def _call_sync(self, args):
+        """
+        @brief Ruft einen synchronen Callback auf; Fehler werden protokolliert, nicht weitergegeben.
+        """
+        try:
+            self.callback(*args)
+        except Exception as e:
+            log.error("event_subscriber_failed", type=self.event, subscriber=self.name, error=str(e))
+        self.delivered += 1
+
+    async def _drain(self):
+        """
+        @brief Arbeitet die Warteschlange ab und endet, sobald sie leer ist.
+        """
+        queue = self.queue
+        latest = self.policy == LATEST
+        count = 0
+        try:
+            while queue:
+                args = queue.pop(next(iter(queue))) if latest else queue.popleft()
+                if self.is_async:
+                    try:
+                        await self.callback(*args)
+                    except Exception as e:
+                        log.error("event_subscriber_failed", type=self.event, subscriber=self.name,
+                                  error=str(e))
+                    self.delivered += 1
+                else:
+                    self._call_sync(args)
+                    count += 1
+                    if count % _BATCH == 0:
+                        await asyncio.sleep(0)
+        finally:
+            self.task = None
+
+    def close(self):
+        """
+        @brief Verwirft wartende Ereignisse und bricht die Abarbeitung ab.
+        """
+        self.queue.clear()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+class EventBus:
+    """
+    @class EventBus
+    @brief Verteilt Ereignisse des Messengers an beliebig viele Abonnenten.
+    """
+
+    def __init__(self):
+        """
+        @brief Konstruktor des EventBus.
+        """
+        self.subscribers = {event: [] for event in EVENTS}  # Ereignistyp → Liste von Subscriptions
+
+    def subscribe(self, event, callback, maxsize=DEFAULT_MAXSIZE, policy=DROP_OLDEST, key=None):
+        """
+        @brief Abonniert einen Ereignistyp.
+        @param event Ereignistyp (MESSAGE, IMAGE, KNOWNUSERS, PROGRESS, PEER)
+        @param callback Synchrone oder asynchrone Funktion mit den Argumenten des Ereignistyps
+        @param maxsize Maximale Anzahl wartender Ereignisse (0 = synchron direkt in publish())
+        @param policy Überlaufstrategie (DROP_OLDEST, DROP_NEWEST, LATEST)
+        @param key Bei LATEST: Funktion args → Schlüssel (Standard: die ersten beiden Argumente)
+        @return Subscription (für unsubscribe() und Statistik)
+        @throws ValueError Bei unbekanntem Ereignistyp, unbekannter Strategie oder maxsize=0 mit
+                asynchronem Callback
+        """
+        if event not in EVENTS:
+            raise ValueError(f"Unbekannter Ereignistyp '{event}' (erlaubt: {', '.join(EVENTS)})")
+        if policy not in POLICIES:
+            raise ValueError(f"Unbekannte Überlaufstrategie '{policy}' (erlaubt: {', '.join(POLICIES)})")
+        if maxsize < 0:
+            raise ValueError("maxsize darf nicht negativ sein")
+        subscription = Subscription(self, event, callback, maxsize, policy, key)
+        if maxsize == 0 and subscription.is_async:
+            raise ValueError("maxsize=0 (ohne Warteschlange) ist nur für synchrone Callbacks möglich")
+        self.subscribers[event].append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        @brief Beendet ein Abonnement; wartende Ereignisse werden verworfen.
+        @param subscription Von subscribe() gelieferte Subscription
+        """
+        subscribers = self.subscribers[subscription.event]
+        if subscription in subscribers:
+            subscribers.remove(subscription)
+        subscription.close()
+
+    def has_subscribers(self, event):
+        """
+        @brief Gibt an, ob ein Ereignistyp abonniert ist.
+        @param event Ereignistyp
+        @return True, wenn mindestens ein Abonnent existiert
+        """
+        return bool(self.subscribers[event])
+
+    def publish(self, event, *args):
+        """
+        @brief Veröffentlicht ein Ereignis an alle Abonnenten, ohne auf sie zu warten.
+        @param event Ereignistyp
+        @param args Argumente des Ereignistyps (siehe EVENTS)
+        @return Anzahl der Abonnenten
+        """
+        subscribers = self.subscribers[event]
+        for subscription in subscribers:
+            subscription.offer(args)
+        return len(subscribers)
+
+    async def drain(self):
+        """
+        @brief Wartet, bis alle Warteschlangen abgearbeitet sind (z. B. vor dem Beenden).
+        """
+        while True:
+            tasks = [s.task for subs in self.subscribers.values() for s in subs if s.task is not None]
+            if not tasks:
+                return
+            await asyncio.wait(tasks)
+
+    def stats(self):
+        """
+        @brief Liefert Zustand und Zähler aller Abonnenten.
+        @return Liste von (Ereignistyp, Name, wartend, zugestellt, verworfen)
+        """
+        return [(s.event, s.name, len(s.queue), s.delivered, s.dropped)
+                for subs in self.subscribers.values() for s in subs]
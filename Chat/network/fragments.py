@@ -0,0 +1,180 @@
+"""
+@file fragments.py
+@brief Aufteilen langer Textnachrichten in MTU-taugliche Fragmente und deren Wiederzusammensetzung.
+@details
+    Lange MSG-Texte werden auf Anwendungsebene in Stücke zerlegt, die jeweils in ein Datagramm
+    passen (FRAG bzw. RFRAG im zuverlässigen Modus). Der Empfänger setzt sie mit einem in Größe
+    und Anzahl begrenzten Puffer wieder zusammen; unvollständige Nachrichten verfallen nach
+    einem Timeout. Backslashes und alle Zeichen, an denen str.splitlines() trennt, werden
+    maskiert, damit ein Fragment auch bei älteren Empfängern genau eine SLCP-Zeile bleibt.
+"""
+
+import re
+import time
+from collections import OrderedDict
+
+## Zeichen, an denen str.splitlines() trennt (außer \n und \r), maskiert als \uXXXX
+_LINE_BREAKS = "\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+_ESCAPE = re.compile(f"[\\\\\n\r{_LINE_BREAKS}]")
+_ESCAPE_MAP = {"\\": "\\\\", "\n": "\\n", "\r": "\\r"}
+_UNESCAPE = re.compile(r"\\(u[0-9a-fA-F]{4}|.)", re.DOTALL)
+_UNESCAPE_MAP = {"n": "\n", "r": "\r", "\\": "\\"}
+
+
+def escape(text):
+    """
+    @brief Maskiert Backslashes und Zeilentrenner für die Übertragung in einer SLCP-Zeile.
+    @param text Originaltext
+    @return Maskierter Text ohne Zeilentrenner
+    """
+    return _ESCAPE.sub(lambda m: _ESCAPE_MAP.get(m.group(), f"\\u{ord(m.group()):04x}"), text)
+
+
+def unescape(text):
+    """
+    @brief Macht escape() rückgängig.
+    @param text Maskierter Text
+    @return Originaltext
+    """
+    return _UNESCAPE.sub(_unescape_match, text)
+
+
+def _unescape_match(match):
+    """
+    @brief Ersetzt eine Maskierung (\\n, \\r, \\\\ oder \\uXXXX) durch das Originalzeichen.
+    """
+    code = match.group(1)
+    if len(code) == 5:
+        return chr(int(code[1:], 16))
+    return _UNESCAPE_MAP.get(code, code)
+
+
+def split_text(text, max_bytes):
+    """
+    @brief Zerlegt einen Text in maskierte Fragmente mit höchstens max_bytes Bytes (UTF-8).
+    @details Die Fragmente werden nur an UTF-8-Zeichengrenzen geschnitten. Maskierungen dürfen
+             über Fragmentgrenzen reichen, da erst der zusammengesetzte Text demaskiert wird.
+    @param text Nachrichtentext
+    @param max_bytes Maximale Größe eines Fragments in Bytes (mindestens 4)
+    @return Liste maskierter Fragmente (Strings)
+    """
+    data = escape(text).encode()
+    chunks = []
+    start = 0
+    while start < len(data):
+        end = min(start + max_bytes, len(data))
+        # Nicht mitten in einem Mehrbyte-Zeichen schneiden (Folgebytes: 0b10xxxxxx)
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        chunks.append(data[start:end].decode())
+        start = end
+    return chunks
+
+
+class Reassembler:
+    """
+    @class Reassembler
+    @brief Setzt Fragmente zu vollständigen Nachrichten zusammen, mit Speicher- und Zeitlimits.
+    @details
+        Unvollständige Nachrichten werden pro (Absender, Nachrichten-ID) gehalten. Überschreitet
+        der Puffer max_bytes bzw. max_messages oder ein Absender max_per_peer, werden die ältesten
+        unvollständigen Nachrichten verworfen. Nach timeout Sekunden verfallen sie ebenfalls.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024, max_messages=256, max_per_peer=16,
+                 max_fragments=4096, timeout=10.0):
+        """
+        @brief Konstruktor des Reassemblers.
+        @param max_bytes Maximale Gesamtgröße aller gepufferten Fragmente in Bytes
+        @param max_messages Maximale Anzahl gleichzeitig unvollständiger Nachrichten
+        @param max_per_peer Maximale Anzahl unvollständiger Nachrichten pro Absender
+        @param max_fragments Maximale Fragmentanzahl einer Nachricht
+        @param timeout Sekunden, nach denen unvollständige Nachrichten verworfen werden
+        """
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self.max_per_peer = max_per_peer
+        self.max_fragments = max_fragments
+        self.timeout = timeout
+        self.partial = OrderedDict()  # (addr, msgid) → [created, count, {index: chunk}, size]
+        self.per_peer = {}  # addr → Anzahl unvollständiger Nachrichten
+        self.size = 0
+        self.dropped = 0  # Verworfene (unvollständige oder ungültige) Nachrichten
+
+    def add(self, addr, msgid, index, count, chunk):
+        """
+        @brief Nimmt ein Fragment entgegen.
+        @param addr Absender (ip, port)
+        @param msgid Nachrichten-ID des Absenders
+        @param index Index des Fragments (0-basiert)
+        @param count Gesamtanzahl der Fragmente
+        @param chunk Maskierter Fragmenttext
+        @return Vollständiger (demaskierter) Text, sobald alle Fragmente vorliegen, sonst None
+        """
+        now = time.monotonic()
+        self._expire(now)
+        if not 0 <= index < count <= self.max_fragments:
+            self.dropped += 1
+            return None
+
+        key = (addr, msgid)
+        entry = self.partial.get(key)
+        if entry is None:
+            if self.per_peer.get(addr, 0) >= self.max_per_peer:
+                self._evict_oldest(addr)
+            entry = self.partial[key] = [now, count, {}, 0]
+            self.per_peer[addr] = self.per_peer.get(addr, 0) + 1
+        elif entry[1] != count:
+            self._remove(key)
+            self.dropped += 1
+            return None
+
+        parts = entry[2]
+        if index in parts:
+            return None  # Doppeltes Fragment
+        parts[index] = chunk
+        size = len(chunk)
+        entry[3] += size
+        self.size += size
+
+        if len(parts) == count:
+            self._remove(key)
+            return unescape("".join(parts[i] for i in range(count)))
+
+        while self.size > self.max_bytes or len(self.partial) > self.max_messages:
+            self._evict_oldest()
+        return None
+
+    def _expire(self, now):
+        """
+        @brief Verwirft unvollständige Nachrichten, deren Timeout abgelaufen ist.
+        """
+        while self.partial:
+            key, entry = next(iter(self.partial.items()))
+            if now - entry[0] < self.timeout:
+                break
+            self._remove(key)
+            self.dropped += 1
+
+    def _evict_oldest(self, addr=None):
+        """
+        @brief Verwirft die älteste unvollständige Nachricht (optional nur eines Absenders).
+        """
+        for key in self.partial:
+            if addr is None or key[0] == addr:
+                self._remove(key)
+                self.dropped += 1
+                return
+
+    def _remove(self, key):
+        """
+        @brief Entfernt eine unvollständige Nachricht aus dem Puffer.
+        """
+        entry = self.partial.pop(key)
+        self.size -= entry[3]
+        remaining = self.per_peer[key[0]] - 1
+        if remaining:
+            self.per_peer[key[0]] = remaining
+        else:
+            del self.per_peer[key[0]]
@@ -0,0 +1,317 @@
+"""
+@file gossip.py
+@brief Gossip-Discovery per Unicast für Netze ohne Broadcast (discovery_mode = "gossip").
+@details
+    Ausgangspunkt ist die Seed-Liste aus slcp_config.toml (gossip_seeds = ["10.0.1.5:5000", ...]).
+    In jeder Runde (gossip_interval, mit Zufallsversatz) schickt der Messenger an gossip_fanout
+    zufällig gewählte bekannte Peers bzw. Seeds ein GOSSIP mit Handle, Port und einem Digest seiner
+    Peer-Tabelle. Der Empfänger trägt den Absender ein; weicht der Digest von seinem eigenen ab,
+    sendet er seine Tabelle als MEMBERS-Seiten zurück und antwortet mit seinem Digest, worauf der
+    Absender ebenfalls seine Tabelle schickt (Push-Pull). Neue Peers verbreiten sich so in
+    logarithmisch vielen Runden, ohne Broadcast; bei übereinstimmenden Tabellen kostet eine
+    Runde nur ein Datagramm pro Partner.
+
+    JOIN und LEAVE gehen per Unicast an alle bekannten Adressen, WHO an Seeds und einige Peers.
+    Per MEMBERS gemeldete Peers ersetzen keine direkt bekannte Adresse, und abgemeldete Peers
+    werden für TOMBSTONE Sekunden nicht wieder aus fremden Tabellen übernommen.
+
+    Antworten gehen an die Absenderadresse des GOSSIP, nicht an den darin angegebenen Port.
+    Unbekannte Absender (weder Peer noch Seed) erhalten höchstens unverified_bytes an MEMBERS,
+    damit gefälschte GOSSIP kaum Verstärkung (Amplification) erzielen. Eingetragen werden sie
+    erst nach einem Roundtrip: Die Antwort enthält ein Cookie (HMAC über die Absenderadresse),
+    das der Absender per Echo (reply = 2) zurückschicken muss. Wer die Absenderadresse nur
+    fälscht, sieht das Cookie nie und wird deshalb weder Peer noch Gossip-Partner.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import random
+import socket
+import time
+from Chat.common import protocol
+from Chat.common.log import get_logger
+from Chat.network.events import PEER
+
+## Sekunden, für die ein per LEAVE abgemeldeter Peer nicht aus MEMBERS übernommen wird
+TOMBSTONE = 60.0
+
+## Gültigkeitsdauer eines Cookies in Sekunden (akzeptiert werden aktuelles und vorheriges Intervall)
+COOKIE_LIFETIME = 300.0
+
+log = get_logger("gossip")
+
+
+def parse_seed(seed):
+    """
+    @brief Zerlegt eine Seed-Angabe der Form HOST:PORT.
+    @param seed Seed als String, z. B. "10.0.1.5:5000"
+    @return Tupel (host, port)
+    @throws ValueError Bei ungültiger Angabe
+    """
+    host, _, port = seed.rpartition(":")
+    if not host:
+        raise ValueError(f"Ungültiger Seed '{seed}' (erwartet HOST:PORT)")
+    return host, int(port)
+
+
+class Gossip:
+    """
+    @class Gossip
+    @brief Verbreitet die Peer-Tabelle eines Messengers per Unicast-Gossip.
+    """
+
+    def __init__(self, messenger, seeds=(), interval=1.0, fanout=3, max_bytes=32768, unverified_bytes=8192):
+        """
+        @brief Konstruktor der Gossip-Discovery.
+        @param messenger Messenger, dessen Peer-Tabelle und Socket genutzt werden
+        @param seeds Liste von "host:port" Angaben
+        @param interval Mittlerer Abstand der Runden in Sekunden
+        @param fanout Anzahl Partner pro Runde
+        @param max_bytes Maximale Gesamtgröße der MEMBERS-Antwort (begrenzt Amplification)
+        @param unverified_bytes Maximale Gesamtgröße der MEMBERS-Antwort an unbekannte Absender
+        """
+        self.messenger = messenger
+        self.seeds = [parse_seed(seed) for seed in seeds]
+        self.seed_addrs = []  # Aufgelöste Seeds als (ip, port), siehe resolve_seeds()
+        self.interval = interval
+        self.fanout = fanout
+        self.max_bytes = max_bytes
+        self.unverified_bytes = min(max_bytes, unverified_bytes)
+        self.departed = {}  # handle → Zeitpunkt des LEAVE (time.monotonic())
+        self.rounds = 0
+        self.sent = 0  # Gesendete GOSSIP-Nachrichten
+        self.members_sent = 0  # Gesendete MEMBERS-Seiten
+        self.task = None
+        self._pages = None  # KNOWNUSERS-Seiten, zu denen _digest/_members berechnet wurden
+        self._digest = None
+        self._members = None
+        self._members_unverified = None
+        self._secret = os.urandom(16)  # Schlüssel für die Cookies unbekannter Absender
+        messenger.events.subscribe(PEER, self._on_peer_change, maxsize=0)
+
+    async def resolve_seeds(self):
+        """
+        @brief Löst die Seeds (auch Hostnamen) nicht blockierend in IPv4-Adressen auf.
+        """
+        loop = asyncio.get_running_loop()
+        addrs = []
+        for host, port in self.seeds:
+            try:
+                infos = await loop.getaddrinfo(host, port, family=socket.AF_INET, type=socket.SOCK_DGRAM)
+                addrs.append(infos[0][4][:2])
+            except OSError as e:
+                log.warning("seed_unresolved", seed=f"{host}:{port}", error=str(e))
+        own = self.messenger.config.port
+        local = {"127.0.0.1", "0.0.0.0", self.messenger.get_local_ip()}
+        self.seed_addrs = [a for a in addrs if not (a[1] == own and a[0] in local)]
+
+    def start(self):
+        """
+        @brief Startet die Gossip-Runden im Hintergrund.
+        """
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """
+        @brief Beendet die Gossip-Runden.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self):
+        """
+        @brief Führt in Abständen von interval (±50 %) Gossip-Runden aus.
+        """
+        await self.resolve_seeds()
+        if not self.seed_addrs and not self.messenger.peers:
+            self.messenger.output("[Gossip] Keine Seeds (gossip_seeds) und keine bekannten Peers")
+        while True:
+            self.round()
+            await asyncio.sleep(self.interval * random.uniform(0.5, 1.5))
+
+    def own_handle(self):
+        """
+        @brief Liefert das Handle, unter dem GOSSIP gesendet wird (erstes lokales Handle).
+        @return Handle oder None, wenn es keins gibt
+        """
+        entries = self.messenger.member_entries()
+        if entries and self.messenger.is_local(entries[0][0]):
+            return entries[0][0]
+        return None
+
+    def digest(self):
+        """
+        @brief Digest der Peer-Tabelle (eigene Handles und Peers) über die sortierten (handle, port).
+        @return Hex-String (16 Zeichen)
+        @details IP-Adressen gehen nicht ein, da derselbe Peer je nach Weg unter verschiedenen
+                 Adressen bekannt sein kann (z. B. 127.0.0.1 und die LAN-Adresse).
+        """
+        self._refresh()
+        return self._digest
+
+    def members(self, verified=True):
+        """
+        @brief Kodierte MEMBERS-Seiten der Peer-Tabelle.
+        @param verified False: Seiten für unbekannte Absender (höchstens unverified_bytes)
+        @return Liste von Zeilen (bytes)
+        """
+        self._refresh()
+        return self._members if verified else self._members_unverified
+
+    def _refresh(self):
+        """
+        @brief Berechnet Digest und MEMBERS-Seiten neu, wenn sich die Peer-Tabelle geändert hat.
+        @details Der Messenger verwirft seine KNOWNUSERS-Seiten bei jeder Änderung der Tabelle;
+                 solange er dieselben Seiten liefert, sind auch Digest und MEMBERS aktuell.
+        """
+        pages = self.messenger.knownusers_pages()
+        if pages is self._pages:
+            return
+        entries = self.messenger.member_entries()
+        summary = "\n".join(sorted(f"{handle} {port}" for handle, _, port in entries))
+        self._digest = hashlib.blake2b(summary.encode(), digest_size=8).hexdigest()
+        self._members = protocol.create_knownusers_pages(
+            entries, self.messenger.config.max_datagram, self.max_bytes, command="MEMBERS")
+        self._members_unverified = protocol.create_knownusers_pages(
+            entries, self.messenger.config.max_datagram, self.unverified_bytes, command="MEMBERS")
+        self._pages = pages
+
+    def candidates(self):
+        """
+        @brief Mögliche Gossip-Partner: Adressen bekannter Peers und Seeds (ohne Duplikate).
+        @return Liste von (ip, port)
+        """
+        addrs = dict.fromkeys(self.messenger.peers.values())
+        addrs.update(dict.fromkeys(self.seed_addrs))
+        return list(addrs)
+
+    def cookie(self, addr, epoch=None):
+        """
+        @brief Cookie für eine Absenderadresse, das nur deren Inhaber per Echo zurücksenden kann.
+        @param addr Adresse als (ip, port)
+        @param epoch Zeitintervall (Standard: aktuelles Intervall von COOKIE_LIFETIME)
+        @return Hex-String (16 Zeichen)
+        """
+        if epoch is None:
+            epoch = int(time.time() // COOKIE_LIFETIME)
+        data = f"{addr[0]}:{addr[1]}:{epoch}".encode()
+        return hashlib.blake2b(data, key=self._secret, digest_size=8).hexdigest()
+
+    def check_cookie(self, addr, cookie):
+        """
+        @brief Prüft ein zurückgesendetes Cookie (aktuelles oder vorheriges Intervall).
+        @param addr Absender-Adresse als (ip, port)
+        @param cookie Empfangenes Cookie oder None
+        @return True, wenn das Cookie zu addr gehört
+        """
+        if not cookie:
+            return False
+        epoch = int(time.time() // COOKIE_LIFETIME)
+        return any(hmac.compare_digest(cookie, self.cookie(addr, e)) for e in (epoch, epoch - 1))
+
+    def round(self):
+        """
+        @brief Eine Gossip-Runde: GOSSIP an fanout zufällige Partner.
+        """
+        handle = self.own_handle()
+        candidates = self.candidates()
+        if handle is None or not candidates:
+            return
+        self.rounds += 1
+        line = protocol.create_gossip(handle, self.messenger.config.port, self.digest()).encode()
+        for addr in random.sample(candidates, min(self.fanout, len(candidates))):
+            self.messenger._send_raw(line, addr)
+            self.sent += 1
+
+    def spread(self, line, everyone=True):
+        """
+        @brief Ersatz für den Broadcast: sendet eine Zeile per Unicast.
+        @param line SLCP-Zeile (String)
+        @param everyone True: an alle bekannten Adressen (JOIN/LEAVE), False: an Seeds und fanout
+               zufällige Peers (WHO)
+        @return True, wenn mindestens ein Empfänger erreicht wurde
+        """
+        data = line.encode()
+        if everyone:
+            targets = self.candidates()
+        else:
+            peers = [a for a in dict.fromkeys(self.messenger.peers.values()) if a not in self.seed_addrs]
+            targets = self.seed_addrs + random.sample(peers, min(self.fanout, len(peers)))
+        sent = False
+        for addr in targets:
+            sent = self.messenger._send_raw(data, addr) or sent
+        return sent
+
+    async def on_gossip(self, parsed, addr):
+        """
+        @brief Verarbeitet ein GOSSIP: Absender eintragen, bei abweichendem Digest Tabellen tauschen.
+        @param parsed Geparste GOSSIP-Nachricht
+        @param addr Absender-Adresse als (ip, port) Tupel
+        @details Unbekannte Absender erhalten nur die begrenzten MEMBERS-Seiten und ein Cookie;
+                 eingetragen werden sie erst, wenn sie das Cookie per Echo zurückschicken.
+                 Ein Echo wird nie selbst beantwortet, sodass kein Ping-Pong entstehen kann.
+        """
+        messenger = self.messenger
+        sender = parsed["handle"]
+        handle = self.own_handle()
+        verified = addr in self.candidates() or (parsed["echo"] and self.check_cookie(addr, parsed["cookie"]))
+        if not verified:
+            if parsed["digest"] != self.digest():
+                for page in self.members(False):
+                    messenger._send_raw(page, addr)
+                    self.members_sent += 1
+            if handle is not None:
+                line = protocol.create_gossip(handle, messenger.config.port, self.digest(),
+                                              reply=True, cookie=self.cookie(addr))
+                messenger._send_raw(line.encode(), addr)
+            return
+        if not messenger.is_local(sender):
+            self.departed.pop(sender, None)
+            if messenger.add_peer(sender, (addr[0], parsed["port"]), seen=True):
+                log.debug("gossip_peer", handle=sender, addr=addr)
+        if parsed["cookie"] and not parsed["echo"] and handle is not None:
+            line = protocol.create_gossip(handle, messenger.config.port, self.digest(),
+                                          cookie=parsed["cookie"], echo=True)
+            messenger._send_raw(line.encode(), addr)
+        if parsed["digest"] == self.digest():
+            return
+        for page in self.members():
+            messenger._send_raw(page, addr)
+            self.members_sent += 1
+        if not parsed["reply"] and handle is not None:
+            line = protocol.create_gossip(handle, messenger.config.port, self.digest(), reply=True)
+            messenger._send_raw(line.encode(), addr)
+
+    def on_members(self, users):
+        """
+        @brief Übernimmt unbekannte Peers aus einer MEMBERS-Seite.
+        @param users Liste von Dictionaries mit handle, ip, port
+        @details Bereits bekannte Peers behalten ihre (direkt beobachtete) Adresse, kürzlich
+                 abgemeldete werden ignoriert.
+        """
+        messenger = self.messenger
+        now = time.monotonic()
+        for user in users:
+            handle = user["handle"]
+            if messenger.is_local(handle) or handle in messenger.peers:
+                continue
+            left = self.departed.get(handle)
+            if left is not None:
+                if now - left < TOMBSTONE:
+                    continue
+                del self.departed[handle]
+            messenger.add_peer(handle, (user["ip"], user["port"]))
+
+    def _on_peer_change(self, kind, handle, value):
+        """
+        @brief Merkt sich abgemeldete Peers (Tombstones), damit alte Tabellen sie nicht zurückbringen.
+        """
+        if kind == "leave":
+            self.departed[handle] = time.monotonic()
+            if len(self.departed) > 4096:
+                cutoff = time.monotonic() - TOMBSTONE
+                self.departed = {h: t for h, t in self.departed.items() if t >= cutoff}
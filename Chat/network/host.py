@@ -0,0 +1,206 @@
+"""
+@file host.py
+@brief Betrieb vieler Handles (z. B. Bot-Identitäten) in einem Prozess mit gemeinsamen Sockets.
+@details
+    Ein IdentityHost ist ein Messenger mit beliebig vielen lokalen Handles. Alle Identitäten teilen
+    einen UDP-Socket, einen TCP-Server, die Peer-Tabelle, Ratenbegrenzung, Übertragungslimits und
+    (optional) einen Discovery-Dienst. Eingehende MSG/FRAG/RMSG und IMG werden anhand des
+    Ziel-Handles an die jeweilige Identität verteilt. Eine Identität besteht nur aus Handle und
+    (bei Bedarf) einem eigenen Ereignisbus und kostet damit nur einen Bruchteil eines vollständigen
+    Clients (siehe benchmarks/identity_host.py).
+
+    Einschränkung des Protokolls: MSG enthält keinen Absender, Empfänger ordnen Nachrichten über
+    (ip, port) zu. Da alle Identitäten denselben Port nutzen, sieht ein Peer Nachrichten aller
+    Identitäten als Nachrichten desselben (zuerst gefundenen) Handles.
+"""
+
+import asyncio
+from Chat.common import protocol
+from Chat.network.events import EventBus
+from Chat.network.messenger import Messenger
+
+## Anzahl JOINs, die beim Ankündigen sofort gesendet werden (Empfänger begrenzen JOINs pro Absender)
+JOIN_BURST = 8
+
+## Abstand weiterer JOINs in Sekunden (passend zum Standardbudget "join" der Empfänger)
+JOIN_INTERVAL = 0.5
+
+
+class Identity:
+    """
+    @class Identity
+    @brief Ein lokales Handle eines IdentityHost.
+    """
+
+    __slots__ = ("host", "handle", "_events")
+
+    def __init__(self, host, handle):
+        """
+        @brief Konstruktor der Identity (über IdentityHost.add_identity erzeugen).
+        @param host Zugehöriger IdentityHost
+        @param handle Benutzername der Identität
+        """
+        self.host = host
+        self.handle = handle
+        self._events = None  # Eigener Ereignisbus, erst beim ersten Zugriff angelegt
+
+    @property
+    def events(self):
+        """
+        @brief Ereignisbus der Identität (MESSAGE und IMAGE an dieses Handle).
+        """
+        if self._events is None:
+            self._events = EventBus()
+        return self._events
+
+    async def send_message(self, handle, message):
+        """
+        @brief Sendet eine Textnachricht über den gemeinsamen Socket.
+        @param handle Ziel-Handle
+        @param message Nachrichtentext
+        @return True, wenn die Nachricht gesendet (bzw. bestätigt) wurde
+        """
+        return await self.host.send_message(handle, message)
+
+    async def send_image(self, handle, filepath):
+        """
+        @brief Sendet ein Bild über die gemeinsamen Übertragungsslots.
+        @param handle Ziel-Handle
+        @param filepath Pfad zur Bilddatei
+        @return True bei Erfolg
+        """
+        return await self.host.send_image(handle, filepath)
+
+
+class IdentityHost(Messenger):
+    """
+    @class IdentityHost
+    @brief Messenger, der viele lokale Handles über einen UDP-Socket und einen TCP-Server bedient.
+    """
+
+    def __init__(self, config, handles=()):
+        """
+        @brief Konstruktor des IdentityHost.
+        @param config Konfiguration (port, whoisport, imagepath, Limits, ...); config.handle selbst
+               wird nur angekündigt, wenn es auch als Identität hinzugefügt wird
+        @param handles Anfangs vorhandene Handles
+        """
+        super().__init__(config)
+        self.identities = {}  # handle → Identity
+        self.discovery = None  # Optionaler gemeinsamer DiscoveryService (vertritt alle Identitäten)
+        for handle in handles:
+            self.add_identity(handle)
+
+    def is_local(self, handle):
+        """
+        @brief Gibt an, ob ein Handle eine Identität dieses Hosts ist.
+        """
+        return handle in self.identities
+
+    def events_for(self, handle):
+        """
+        @brief Liefert den Ereignisbus der Identität, ohne eigenen Bus den des Hosts.
+        """
+        identity = self.identities.get(handle)
+        if identity is not None and identity._events is not None:
+            return identity._events
+        return self.events
+
+    def add_identity(self, handle):
+        """
+        @brief Fügt ein lokales Handle hinzu und kündigt es (falls der Host läuft) per JOIN an.
+        @param handle Benutzername (ohne Leerzeichen und Komma)
+        @return Neue Identity
+        @throws ValueError Bei ungültigem oder bereits vorhandenem Handle
+        """
+        if not handle or any(c in handle for c in " ,\n"):
+            raise ValueError(f"Ungültiges Handle '{handle}'")
+        if handle in self.identities:
+            raise ValueError(f"Handle '{handle}' ist bereits vorhanden")
+        identity = Identity(self, handle)
+        self.identities[handle] = identity
+        self.remove_peer(handle, notify=False)  # Ein lokales Handle ist kein Peer
+        self._identities_changed()
+        if self.transport is not None:
+            asyncio.create_task(self.announce([handle]))
+        return identity
+
+    async def remove_identity(self, handle):
+        """
+        @brief Entfernt ein lokales Handle und meldet es per LEAVE ab.
+        @param handle Benutzername
+        @return True, wenn das Handle vorhanden war
+        """
+        identity = self.identities.pop(handle, None)
+        if identity is None:
+            return False
+        if identity._events is not None:
+            for subscriptions in identity._events.subscribers.values():
+                for subscription in list(subscriptions):
+                    identity._events.unsubscribe(subscription)
+        self._identities_changed()
+        await self.send_broadcast(protocol.create_leave(handle))
+        return True
+
+    def _identities_changed(self):
+        """
+        @brief Verwirft die KNOWNUSERS-Seiten und gleicht den Discovery-Dienst ab.
+        """
+        self._knownusers_pages = None
+        if self.discovery is not None:
+            self.discovery.set_handles(list(self.identities), self.config.port)
+
+    def local_handles(self):
+        """
+        @brief Alle Identitäten dieses Hosts.
+        """
+        return list(self.identities)
+
+    def add_peer(self, handle, address, notify=True, seen=False):
+        """
+        @brief Wie Messenger.add_peer, lokale Handles werden aber nie als Peer eingetragen.
+        """
+        if handle in self.identities:
+            return False
+        return super().add_peer(handle, address, notify, seen)
+
+    async def announce(self, handles=None):
+        """
+        @brief Sendet JOIN für lokale Handles (CAPS gehen per Unicast, siehe announce_caps()).
+        @param handles Liste von Handles (Standard: alle)
+        @details Die ersten JOIN_BURST JOINs gehen sofort hinaus, weitere im Abstand von
+                 JOIN_INTERVAL Sekunden, damit die Ratenbegrenzung der Empfänger sie nicht verwirft.
+                 Per WHO sind alle Identitäten sofort in der KNOWNUSERS-Antwort enthalten.
+        """
+        handles = list(self.identities) if handles is None else handles
+        for index, handle in enumerate(handles):
+            if index >= JOIN_BURST:
+                await asyncio.sleep(JOIN_INTERVAL)
+            if handle not in self.identities:
+                continue
+            await self.send_broadcast(protocol.create_join(handle, self.config.port))
+
+    async def send_join(self):
+        """
+        @brief Kündigt alle lokalen Handles an (siehe announce()).
+        """
+        await self.announce()
+        return True
+
+    async def send_leave(self):
+        """
+        @brief Meldet alle lokalen Handles per LEAVE ab.
+        """
+        ok = True
+        for handle in list(self.identities):
+            ok = await self.send_broadcast(protocol.create_leave(handle)) and ok
+        return ok
+
+    def member_entries(self):
+        """
+        @brief Alle lokalen Handles (gemeinsame Adresse) gefolgt von allen Peers (für KNOWNUSERS).
+        """
+        local_ip = self.get_local_ip()
+        entries = [(handle, local_ip, self.config.port) for handle in self.identities]
+        entries.extend((handle, peer_ip, peer_port) for handle, (peer_ip, peer_port) in self.peers.items())
+        return entries
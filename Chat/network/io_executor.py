@@ -0,0 +1,275 @@
+"""
+@file io_executor.py
+@brief Begrenzter Thread-Pool für Dateisystem-Zugriffe des Messengers.
+@details
+    Alle blockierenden Dateioperationen (Prüfen, Lesen, Schreiben, fsync) laufen über diesen
+    Executor, damit der asyncio-Eventloop auch bei großen Bildübertragungen reaktionsfähig bleibt.
+    Zusätzlich stellt das Modul einen Write-Behind-Writer bereit, der empfangene Chunks puffert
+    und blockweise im Hintergrund auf die Platte schreibt.
+"""
+
+import asyncio
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+FSYNC_POLICIES = ("none", "close", "always")
+
+
+class IOExecutor:
+    """
+    @class IOExecutor
+    @brief Führt blockierende Dateioperationen in einem eigenen, begrenzten Thread-Pool aus.
+    @details
+        Die Anzahl gleichzeitig laufender Jobs ist durch max_workers begrenzt, die Anzahl
+        wartender Jobs durch max_pending. Weitere Aufrufer warten asynchron, statt die
+        Warteschlange des Pools unbegrenzt zu füllen.
+    """
+
+    def __init__(self, max_workers=2, max_pending=64):
+        """
+        @brief Konstruktor des IOExecutors.
+        @param max_workers Anzahl der I/O-Threads
+        @param max_pending Maximale Anzahl gleichzeitig eingereichter Jobs
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="slcp-io")
+        self.slots = asyncio.Semaphore(max_pending)
+
+    async def run(self, func, *args):
+        """
+        @brief Führt eine blockierende Funktion im I/O-Pool aus.
+        @param func Auszuführende Funktion
+        @param args Positionsargumente für func
+        @return Rückgabewert von func
+        """
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    async def isfile(self, path):
+        """
+        @brief Prüft im I/O-Pool, ob eine Datei existiert.
+        @param path Dateipfad
+        @return True, wenn path eine reguläre Datei ist
+        """
+        return await self.run(os.path.isfile, path)
+
+    async def read_file(self, path):
+        """
+        @brief Liest eine Datei vollständig im I/O-Pool.
+        @param path Dateipfad
+        @return Dateiinhalt als Bytes
+        """
+        return await self.run(_read_all, path)
+
+    async def getsize(self, path):
+        """
+        @brief Ermittelt die Größe einer Datei im I/O-Pool.
+        @param path Dateipfad
+        @return Größe in Bytes
+        """
+        return await self.run(os.path.getsize, path)
+
+    async def open_reader(self, path, block_size=1024 * 1024):
+        """
+        @brief Öffnet eine Datei zum blockweisen Lesen mit Read-Ahead.
+        @param path Dateipfad
+        @param block_size Größe eines Blocks in Bytes
+        @return Geöffneter ReadAheadReader
+        """
+        f = await self.run(open, path, "rb")
+        return ReadAheadReader(self, f, block_size)
+
+    async def guess_type(self, path):
+        """
+        @brief Ermittelt den MIME-Typ einer Datei im I/O-Pool.
+        @param path Dateipfad
+        @return MIME-Typ als String oder None
+        """
+        mime_type, _ = await self.run(mimetypes.guess_type, path)
+        return mime_type
+
+    async def makedirs(self, path):
+        """
+        @brief Legt ein Verzeichnis (inkl. Elternverzeichnisse) im I/O-Pool an.
+        @param path Verzeichnispfad
+        """
+        await self.run(lambda: os.makedirs(path, exist_ok=True))
+
+    async def open_writer(self, path, buffer_size=1024 * 1024, fsync="close", exclusive=False):
+        """
+        @brief Öffnet eine Datei zum gepufferten Schreiben.
+        @param path Zieldatei
+        @param buffer_size Puffergröße in Bytes, ab der ein Block geschrieben wird
+        @param fsync fsync-Strategie: "none", "close" oder "always"
+        @param exclusive True, um die Datei neu anzulegen (FileExistsError, falls sie existiert)
+        @return Geöffneter WriteBehindWriter
+        @throws ValueError Bei unbekannter fsync-Strategie (bevor die Datei angelegt wird)
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unbekannte fsync-Strategie: {fsync}")
+        f = await self.run(open, path, "xb" if exclusive else "wb")
+        return WriteBehindWriter(self, f, buffer_size, fsync)
+
+    def shutdown(self):
+        """
+        @brief Beendet den I/O-Pool, ohne auf laufende Jobs zu warten.
+        """
+        self.executor.shutdown(wait=False)
+
+
+class WriteBehindWriter:
+    """
+    @class WriteBehindWriter
+    @brief Puffert Daten im Speicher und schreibt sie blockweise im I/O-Pool.
+    @details
+        Es ist immer höchstens ein Schreibjob pro Datei unterwegs. Während er läuft, wird der
+        nächste Puffer befüllt; die Reihenfolge der Blöcke bleibt dadurch erhalten.
+    """
+
+    def __init__(self, io, f, buffer_size, fsync):
+        """
+        @brief Konstruktor des Writers.
+        @param io Zugehöriger IOExecutor
+        @param f Geöffnetes Dateiobjekt (binär)
+        @param buffer_size Schwelle in Bytes für das Schreiben eines Blocks
+        @param fsync fsync-Strategie: "none", "close" oder "always"
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unbekannte fsync-Strategie: {fsync}")
+        self.io = io
+        self.f = f
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.buffer = bytearray()
+        self.pending = None  # Laufender Schreibjob (Future)
+        self.written = 0
+
+    async def write(self, data):
+        """
+        @brief Hängt Daten an den Puffer an und stößt bei Bedarf einen Schreibjob an.
+        @param data Zu schreibende Bytes
+        """
+        self.buffer += data
+        if len(self.buffer) >= self.buffer_size:
+            await self._flush_buffer()
+
+    async def _flush_buffer(self):
+        """
+        @brief Übergibt den aktuellen Puffer an den I/O-Pool.
+        @details Wartet vorher auf den vorherigen Schreibjob (Backpressure).
+        """
+        if self.pending is not None:
+            await self.pending
+            self.pending = None
+        if not self.buffer:
+            return
+        block = bytes(self.buffer)
+        self.buffer.clear()
+        self.written += len(block)
+        sync = self.fsync == "always"
+        self.pending = asyncio.ensure_future(self.io.run(_write_block, self.f, block, sync))
+
+    async def close(self):
+        """
+        @brief Schreibt verbleibende Daten, führt ggf. fsync aus und schließt die Datei.
+        """
+        try:
+            await self._flush_buffer()
+            if self.pending is not None:
+                await self.pending
+                self.pending = None
+        finally:
+            await self.io.run(_close_file, self.f, self.fsync in ("close", "always"))
+
+    async def abort(self):
+        """
+        @brief Verwirft den Puffer und schließt die Datei ohne fsync.
+        """
+        self.buffer.clear()
+        if self.pending is not None:
+            try:
+                await self.pending
+            except Exception:
+                pass
+            self.pending = None
+        await self.io.run(_close_file, self.f, False)
+
+
+class ReadAheadReader:
+    """
+    @class ReadAheadReader
+    @brief Liest eine Datei blockweise im I/O-Pool; der nächste Block wird bereits im Voraus gelesen.
+    @details Es sind höchstens zwei Blöcke gleichzeitig im Speicher (der gelieferte und der nächste).
+    """
+
+    def __init__(self, io, f, block_size):
+        """
+        @brief Konstruktor des Readers.
+        @param io Zugehöriger IOExecutor
+        @param f Geöffnetes Dateiobjekt (binär)
+        @param block_size Größe eines Blocks in Bytes
+        """
+        self.io = io
+        self.f = f
+        self.block_size = block_size
+        self.pending = None  # Laufender Lesejob für den nächsten Block (Future)
+
+    async def read(self):
+        """
+        @brief Liefert den nächsten Block und stößt das Lesen des darauffolgenden an.
+        @return Block als Bytes (leer am Dateiende)
+        """
+        if self.pending is None:
+            self.pending = asyncio.ensure_future(self.io.run(self.f.read, self.block_size))
+        block = await self.pending
+        self.pending = asyncio.ensure_future(self.io.run(self.f.read, self.block_size)) if block else None
+        return block
+
+    async def close(self):
+        """
+        @brief Wartet auf einen laufenden Lesejob und schließt die Datei.
+        """
+        if self.pending is not None:
+            await asyncio.wait([self.pending])  # Auch abgebrochene/fehlgeschlagene Jobs abwarten
+            if not self.pending.cancelled():
+                self.pending.exception()  # Fehler des verworfenen Blocks als abgerufen markieren
+            self.pending = None
+        await self.io.run(self.f.close)
+
+
+def _read_all(path):
+    """
+    @brief Liest eine Datei vollständig (läuft im I/O-Thread).
+    @param path Dateipfad
+    @return Dateiinhalt als Bytes
+    """
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_block(f, block, sync):
+    """
+    @brief Schreibt einen Block und führt optional fsync aus (läuft im I/O-Thread).
+    @param f Dateiobjekt
+    @param block Zu schreibende Bytes
+    @param sync True, wenn nach dem Schreiben fsync erfolgen soll
+    """
+    f.write(block)
+    if sync:
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _close_file(f, sync):
+    """
+    @brief Schließt eine Datei, optional nach fsync (läuft im I/O-Thread).
+    @param f Dateiobjekt
+    @param sync True, wenn vor dem Schließen fsync erfolgen soll
+    """
+    try:
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        f.close()
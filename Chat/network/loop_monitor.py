@@ -0,0 +1,196 @@
+"""
+@file loop_monitor.py
+@brief Überwachung des asyncio-Eventloops: Verzögerung (Lag) und blockierende Callbacks.
+@details
+    Ein Heartbeat-Timer läuft im Eventloop alle interval Sekunden und misst, wie viel später als
+    geplant er ausgeführt wurde. Diese Verzögerungen werden in einem Ringpuffer gesammelt und als
+    Perzentile ausgewertet (CLI-Befehl /lag).
+
+    Ein Watchdog-Thread prüft den Heartbeat. Bleibt er länger als threshold Sekunden aus, blockiert
+    gerade ein Callback oder ein Task-Schritt den Eventloop. Der Watchdog liest dann den Stack des
+    Eventloop-Threads (sys._current_frames) und ermittelt die SLCP-Nachricht, die gerade verarbeitet
+    wird. Sobald der Eventloop wieder läuft, wird das Ereignis mit Dauer, Nachrichtentyp und Stack
+    gespeichert und gemeldet.
+
+    Im Eventloop kostet das nur den Timer; Stack-Erfassung und Formatierung laufen im Watchdog.
+    Die Überwachung kann daher dauerhaft eingeschaltet bleiben.
+"""
+
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from time import monotonic
+from Chat.common.rate_limit import message_class
+
+## Anzahl Stackframes, die pro blockierendem Callback gespeichert werden
+STACK_LIMIT = 12
+
+
+class SlowCallback:
+    """
+    @class SlowCallback
+    @brief Ein erkannter blockierender Callback oder Task-Schritt.
+    """
+    __slots__ = ("timestamp", "duration", "context", "stack")
+
+    def __init__(self, timestamp, duration, context, stack):
+        """
+        @brief Konstruktor eines SlowCallback.
+        @param timestamp Zeitpunkt des Endes (time.time())
+        @param duration Blockierdauer in Sekunden
+        @param context Verarbeitete SLCP-Nachricht (z. B. "MSG") oder None
+        @param stack Formatierter Stack (Liste von Zeilen, innerster Frame zuletzt); leer, wenn
+                     der Watchdog den Stack nicht rechtzeitig erfassen konnte
+        """
+        self.timestamp = timestamp
+        self.duration = duration
+        self.context = context
+        self.stack = stack
+
+    @property
+    def location(self):
+        """
+        @brief Kurzbeschreibung des innersten Frames (Datei:Zeile in Funktion).
+        """
+        if not self.stack:
+            return "unbekannt"
+        return self.stack[-1].strip().splitlines()[0]
+
+
+def message_context(frame):
+    """
+    @brief Ermittelt aus einem Stack die SLCP-Nachricht, die gerade verarbeitet wird.
+    @details Sucht von innen nach außen den Messenger-Aufruf dispatch() (geparste Nachricht)
+             oder datagram_received() (rohes Datagramm).
+    @param frame Innerster Frame des Eventloop-Threads
+    @return Nachrichtentyp (z. B. "MSG", "WHO") oder None
+    """
+    while frame is not None:
+        name = frame.f_code.co_name
+        if name == "dispatch":
+            parsed = frame.f_locals.get("parsed")
+            if isinstance(parsed, dict) and "type" in parsed:
+                return parsed["type"]
+        elif name == "datagram_received":
+            data = frame.f_locals.get("data")
+            if isinstance(data, (bytes, bytearray)):
+                return message_class(data).upper()
+        frame = frame.f_back
+    return None
+
+
+class LoopMonitor:
+    """
+    @class LoopMonitor
+    @brief Misst die Verzögerung des Eventloops und erfasst blockierende Callbacks mit Stack.
+    """
+
+    def __init__(self, threshold=0.1, interval=None, history=1200, keep=50):
+        """
+        @brief Konstruktor des LoopMonitor.
+        @param threshold Blockierdauer in Sekunden, ab der ein Callback als langsam gilt
+        @param interval Abstand der Heartbeats in Sekunden (Standard: threshold / 2, höchstens 0,5 s)
+        @param history Anzahl gespeicherter Lag-Messwerte
+        @param keep Anzahl gespeicherter langsamer Callbacks
+        """
+        self.threshold = threshold
+        self.interval = interval or min(0.5, threshold / 2)
+        self.samples = deque(maxlen=history)  # Lag-Messwerte in Sekunden
+        self.slow = deque(maxlen=keep)  # SlowCallback-Einträge, neueste zuletzt
+        self.slow_total = 0  # Anzahl aller erkannten langsamen Callbacks
+        self.output = print  # Ausgabefunktion für Meldungen (z. B. Messenger.output)
+        self.loop = None
+        self.thread_id = None
+        self.due = None  # Geplanter Zeitpunkt des nächsten Heartbeats
+        self.captured = None  # Vom Watchdog erfasster (due, Kontext, Stack)
+        self._handle = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self, loop):
+        """
+        @brief Startet Heartbeat und Watchdog (aus dem Eventloop-Thread aufrufen).
+        @param loop Laufender asyncio-Eventloop
+        """
+        if self._watchdog is not None:
+            return
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.due = monotonic() + self.interval
+        self._handle = loop.call_later(self.interval, self._beat)
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="slcp-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """
+        @brief Beendet Heartbeat und Watchdog.
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._stop.set()
+        self._watchdog = None
+
+    def _beat(self):
+        """
+        @brief Heartbeat im Eventloop: misst die Verspätung und plant den nächsten Heartbeat.
+        """
+        now = monotonic()
+        due = self.due
+        lag = now - due
+        self.samples.append(lag if lag > 0 else 0.0)
+        if lag >= self.threshold:
+            self._record(due, lag)
+        self.due = now + self.interval
+        self._handle = self.loop.call_later(self.interval, self._beat)
+
+    def _record(self, due, lag):
+        """
+        @brief Speichert einen blockierenden Callback und meldet ihn.
+        @param due Geplanter Zeitpunkt des verspäteten Heartbeats
+        @param lag Verspätung in Sekunden
+        """
+        captured, self.captured = self.captured, None
+        context, stack = None, []
+        if captured is not None and captured[0] == due:
+            context, stack = captured[1], captured[2]
+        event = SlowCallback(time.time(), lag, context, stack)
+        self.slow.append(event)
+        self.slow_total += 1
+        self.output(f"[Loop] Eventloop {lag * 1000:.0f} ms blockiert"
+                    f"{f' ({context})' if context else ''} in {event.location}")
+
+    def _watch(self):
+        """
+        @brief Watchdog-Thread: erfasst den Stack, wenn der Heartbeat ausbleibt.
+        """
+        period = self.threshold / 2
+        while not self._stop.wait(period):
+            due, captured = self.due, self.captured
+            if monotonic() - due < self.threshold or (captured is not None and captured[0] == due):
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            try:
+                stack = traceback.format_list(traceback.extract_stack(frame, limit=STACK_LIMIT))
+                self.captured = (due, message_context(frame), stack)
+            finally:
+                del frame
+
+    def percentiles(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        @brief Wertet die gesammelten Lag-Messwerte aus.
+        @param quantiles Gewünschte Quantile
+        @return Dictionary mit "count", "max" und je Quantil einem Eintrag (Sekunden), None ohne Messwerte
+        """
+        if not self.samples:
+            return None
+        values = sorted(self.samples)
+        result = {"count": len(values), "max": values[-1]}
+        for q in quantiles:
+            result[q] = values[min(len(values) - 1, int(len(values) * q))]
+        return result
@@ -0,0 +1,57 @@
+"""
+@file lossy_transport.py
+@brief Verlustbehafteter Transport-Wrapper zum lokalen Testen des zuverlässigen Modus.
+@details
+    Umhüllt einen asyncio-Datagram-Transport und verwirft bzw. verzögert einen einstellbaren
+    Anteil der gesendeten Datagramme. So lassen sich Paketverlust und Umordnung auf Loopback
+    nachstellen, z. B. `messenger.transport = LossyTransport(messenger.transport, loss=0.2)`.
+"""
+
+import asyncio
+import random
+
+
+class LossyTransport:
+    """
+    @class LossyTransport
+    @brief Simuliert Paketverlust und Umordnung für ausgehende Datagramme.
+    """
+
+    def __init__(self, transport, loss=0.1, reorder=0.1, max_delay=0.02, seed=None):
+        """
+        @brief Konstruktor des LossyTransport.
+        @param transport Zugrundeliegender Datagram-Transport
+        @param loss Anteil verworfener Datagramme (0.0–1.0)
+        @param reorder Anteil verzögerter (und damit umgeordneter) Datagramme (0.0–1.0)
+        @param max_delay Maximale Verzögerung umgeordneter Datagramme in Sekunden
+        @param seed Optionaler Seed für reproduzierbare Läufe
+        """
+        self.transport = transport
+        self.loss = loss
+        self.reorder = reorder
+        self.max_delay = max_delay
+        self.rng = random.Random(seed)
+        self.dropped = 0
+        self.delayed = 0
+
+    def sendto(self, data, addr=None):
+        """
+        @brief Sendet ein Datagramm – oder verwirft/verzögert es zufällig.
+        @param data Zu sendende Bytes
+        @param addr Zieladresse (ip, port)
+        """
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        if self.rng.random() < self.reorder:
+            self.delayed += 1
+            delay = self.rng.uniform(0, self.max_delay)
+            asyncio.get_running_loop().call_later(delay, self.transport.sendto, data, addr)
+            return
+        self.transport.sendto(data, addr)
+
+    def __getattr__(self, name):
+        """
+        @brief Leitet alle übrigen Attribute (close, get_extra_info, ...) an den echten Transport weiter.
+        """
+        return getattr(self.transport, name)
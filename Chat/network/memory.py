@@ -0,0 +1,98 @@
+"""
+@file memory.py
+@brief Speicherdiagnose für /mem: Prozessgröße und Allokationsstellen per tracemalloc.
+@details
+    tracemalloc verlangsamt jede Allokation spürbar und ist deshalb standardmäßig aus. Es wird per
+    /mem trace (oder config.tracemalloc) eingeschaltet. Snapshots werden in einem Thread erstellt
+    und mit dem vorherigen Snapshot verglichen, sodass /mem neben den größten Allokationsstellen
+    auch deren Wachstum seit dem letzten Aufruf zeigt.
+"""
+
+import asyncio
+import os
+import tracemalloc
+
+try:
+    import resource  # Nicht unter Windows verfügbar
+except ImportError:
+    resource = None
+
+## Frames, die in Snapshots ausgeblendet werden (tracemalloc selbst, Importmechanismus)
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+def rss_bytes():
+    """
+    @brief Liefert den aktuellen und den maximalen belegten Arbeitsspeicher des Prozesses.
+    @return (aktuell, maximal) in Bytes; nicht ermittelbare Werte sind None
+    """
+    current = peak = None
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux: KiB
+    return current, peak
+
+
+class AllocationTracker:
+    """
+    @class AllocationTracker
+    @brief Startet/stoppt tracemalloc und wertet Snapshots nach Allokationsstellen aus.
+    """
+
+    def __init__(self, nframes=1):
+        """
+        @brief Konstruktor des AllocationTracker.
+        @param nframes Anzahl gespeicherter Frames pro Allokation (1 = nur die Zeile selbst)
+        """
+        self.nframes = nframes
+        self.previous = None  # Letzter Snapshot für den Vergleich
+
+    @property
+    def tracing(self):
+        """
+        @brief Gibt an, ob tracemalloc läuft.
+        """
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """
+        @brief Schaltet tracemalloc ein (falls nicht bereits aktiv).
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self.previous = None
+
+    def stop(self):
+        """
+        @brief Schaltet tracemalloc aus und verwirft den letzten Snapshot.
+        """
+        tracemalloc.stop()
+        self.previous = None
+
+    async def top(self, limit=10):
+        """
+        @brief Erstellt einen Snapshot (im Thread) und liefert die größten Allokationsstellen.
+        @param limit Anzahl Einträge
+        @return (Liste von (Stelle, Bytes, Anzahl, Zuwachs seit letztem Aufruf), aktuell, Spitze)
+                oder None, wenn tracemalloc nicht läuft
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = await asyncio.to_thread(lambda: tracemalloc.take_snapshot().filter_traces(_FILTERS))
+        previous, self.previous = self.previous, snapshot
+        if previous is not None:
+            stats = await asyncio.to_thread(snapshot.compare_to, previous, "lineno")
+            rows = [(str(s.traceback[0]), s.size, s.count, s.size_diff) for s in stats[:limit]]
+        else:
+            stats = await asyncio.to_thread(snapshot.statistics, "lineno")
+            rows = [(str(s.traceback[0]), s.size, s.count, 0) for s in stats[:limit]]
+        current, peak = tracemalloc.get_traced_memory()
+        return rows, current, peak
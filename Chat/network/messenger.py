@@ -8,12 +8,61 @@
 """
 
 import asyncio
-import mimetypes
+import itertools
+import random
 import socket
 import time
-from Chat.common import protocol
+from Chat.common import protocol, binary_protocol
+from Chat.common.capture import KIND_TCP, KIND_UDP, Capture
+from Chat.common.log import get_logger
+from Chat.common.multicast import BROADCAST_ADDR, discovery_address, probe_multicast, setup_multicast
+from Chat.common.rate_limit import RateLimiter, line_class
+from Chat.network.io_executor import IOExecutor
+from Chat.network.reliable import ReliableChannel
+from Chat.network.fragments import Reassembler, split_text
+from Chat.network.transfers import TransferManager, TransferRejected
+from Chat.network.shaper import CHUNK_SIZE, BandwidthShaper, set_traffic_class
+from Chat.network.loop_monitor import LoopMonitor
+from Chat.network.memory import AllocationTracker
+from Chat.network.peer_cache import PeerCache
+from Chat.network.events import EventBus, IMAGE, KNOWNUSERS, MESSAGE, PEER, PROGRESS
+from Chat.network.gossip import Gossip
 import os
 
+## Anzahl Fragmente, nach denen der Sender den Eventloop kurz freigibt
+FRAGMENT_BURST = 16
+## Empfangspuffer des UDP-Sockets in Bytes (Platz für Fragment-Bursts)
+UDP_RCVBUF = 1024 * 1024
+## Blockgröße beim Lesen zu sendender Bilder (mit Read-Ahead sind zwei Blöcke im Speicher)
+READ_BLOCK = 1024 * 1024
+## Sekunden, die ein Absender auf IMGREADY wartet (der Empfänger kann die Übertragung einreihen)
+IMG_READY_TIMEOUT = 300.0
+## Sekunden, die ein Absender nach den Bilddaten auf IMGOK/IMGERR wartet
+IMG_RESULT_TIMEOUT = 60.0
+## Höchstzahl lokaler Handles, deren CAPS einem Peer angekündigt werden (Ratenbegrenzung "join")
+CAPS_HANDLES = 8
+## Sekunden, in denen eine Adresse höchstens eine CAPS-Antwort erhält
+CAPS_REPLY_INTERVAL = 1.0
+
+log = get_logger("messenger")
+
+
+class _ProbeProtocol(asyncio.DatagramProtocol):
+    """
+    @class _ProbeProtocol
+    @brief Empfängt die Antworten auf Unicast-Prüfungen (Messenger.probe_peers).
+    """
+
+    def __init__(self, on_reply):
+        """
+        @brief Konstruktor des _ProbeProtocol.
+        @param on_reply Funktion (data, addr) für jedes empfangene Datagramm
+        """
+        self.on_reply = on_reply
+
+    def datagram_received(self, data, addr):
+        self.on_reply(data, addr)
+
 
 class Messenger(asyncio.DatagramProtocol):
     """
@@ -21,7 +70,7 @@ class Messenger(asyncio.DatagramProtocol):
     @brief Messenger für den Versand und Empfang von Chat-Nachrichten und Bildern.
     @details
         Verwaltet alle UDP- und TCP-Kommunikationsprozesse, Peer-Liste, sowie das Senden und Empfangen von Nachrichten und Bildern.
-        Stellt zudem verschiedene Callback-Funktionen für die Interaktion mit der Benutzeroberfläche bereit.
+        Veröffentlicht Ereignisse für die Benutzeroberfläche und andere Abonnenten über den Ereignisbus (self.events).
     """
     def __init__(self, config):
         """
@@ -32,25 +81,84 @@ class Messenger(asyncio.DatagramProtocol):
             - whoisport: Port für WHO-Broadcasts
             - imagepath: Pfad zum Speichern empfangener Bilder
             - autoreply: Automatische Antwort (optional)
+            - io_workers, write_buffer, fsync: Einstellungen für Dateizugriffe
+            - multicast: Discovery-Modus (Broadcast/Multicast) inkl. Gruppe, TTL und Interface
+            - reliable, reliable_window, reliable_retries: Zuverlässige MSG-Zustellung (optional)
+            - max_datagram: Maximale Datagrammgröße, darüber werden Nachrichten fragmentiert
+            - wire_format: "text" oder "binary" (Binärformat mit Peers, die es per CAPS ankündigen;
+              CAPS gehen per Unicast an jeden neu eingetragenen Peer)
+            - workers: Anzahl Prozesse, die sich den Port per SO_REUSEPORT teilen (1 = aus)
+            - rate_limits, who_max_bytes, autoreply_interval: Schutz vor Überlastung und Amplification
+            - transfer_max_active, transfer_max_per_peer, transfer_max_queued: Limits für Bildübertragungen
+            - transfer_memory_budget: Pufferspeicher aller aktiven Bildübertragungen (Bytes, 0 = unbegrenzt)
+            - tracemalloc: Allokationsverfolgung für /mem von Anfang an einschalten
+            - peer_cache, peer_cache_interval, peer_cache_max_age: Persistenter Peer-Cache (Warmstart)
+            - gossip_seeds, gossip_interval, gossip_fanout, gossip_max_bytes: Gossip-Discovery
+              (bei discovery_mode = "gossip" ersetzt Unicast-Gossip alle Broadcasts)
+            - bandwidth_limit, bandwidth_peer_limit: Datenrate für Bildübertragungen (Bytes/s, 0 = unbegrenzt)
+            - loop_monitor, slow_callback_ms: Überwachung des Eventloops (Lag, blockierende Callbacks)
+            - capture_file: Mitschnitt eingehender Datagramme und TCP-Kopfzeilen (leer = aus)
         """
         self.config = config
         self.peers = {}  # Dictionary: handle → (ip, port) - Bekannte Peers
         self.transport = None # UDP Transport Objekt
-        self.message_callback = None  # Callback für eingehende Nachrichten
-        self.image_callback = None  # Callback für empfangene Bilder
-        self.knownusers_callback = None  # Callback für Benutzerlisten
-        self.progress_callback = None  # Callback für Übertragungsfortschritt
+        self.events = EventBus()  # Ereignisse (Nachrichten, Bilder, Fortschritt, ...) für beliebig viele Abonnenten
         self.pending_who_responses = {}  # Ausstehende WHO-Antworten
         self.who_timeout = 2.0  # Timeout für WHO-Anfragen in Sekunden
-
-    async def start_listener(self):
+        self.io = IOExecutor(max_workers=config.io_workers)  # Thread-Pool für alle Dateizugriffe
+        self.discovery_addr = discovery_address(config.multicast)  # Ziel für JOIN/LEAVE/WHO
+        self.output = print  # Ausgabefunktion für Statusmeldungen (z. B. Renderer.emit)
+        self.reliable = None  # Zuverlässiger Modus (Sequenznummern, ACKs, Wiederholungen)
+        if config.reliable:
+            self.reliable = ReliableChannel(self._send_raw, window=config.reliable_window,
+                                            max_retries=config.reliable_retries)
+        # Empfangsseite: RMSG/RFRAG werden immer bestätigt, auch ohne eigenen zuverlässigen Modus
+        self.reliable_receiver = self.reliable
+        self.reassembler = Reassembler()  # Puffer für fragmentierte lange Nachrichten
+        self.msg_ids = itertools.count(random.getrandbits(20))  # Nachrichten-IDs für Fragmente
+        self.peer_caps = {}  # handle → Menge angekündigter Fähigkeiten (z. B. {"BIN"})
+        self.limiter = RateLimiter(config.rate_limits)  # Token-Buckets pro Absender und Nachrichtenklasse
+        self.autoreplied = {}  # (ip, port) → Zeitpunkt der letzten automatischen Antwort
+        self.caps_replied = {}  # (ip, port) → Zeitpunkt der letzten CAPS-Antwort
+        self._knownusers_pages = None  # Kodierte KNOWNUSERS-Antwort, ungültig bei Peer-Änderungen
+        self._local_ip = None  # Zwischengespeicherte lokale IP-Adresse
+        self.transfers = TransferManager(max_active=config.transfer_max_active,
+                                         max_per_peer=config.transfer_max_per_peer,
+                                         max_queued=config.transfer_max_queued,
+                                         memory_budget=config.transfer_memory_budget)  # Bildübertragungen
+        # Bandbreitenbegrenzung je Richtung (Senden/Empfangen sind auf der Leitung unabhängig)
+        self.upload_shaper = BandwidthShaper(config.bandwidth_limit, config.bandwidth_peer_limit)
+        self.download_shaper = BandwidthShaper(config.bandwidth_limit, config.bandwidth_peer_limit)
+        self.loop_monitor = None  # Lag-Messung und Watchdog für blockierende Callbacks (ab start_listener)
+        if config.loop_monitor:
+            self.loop_monitor = LoopMonitor(threshold=config.slow_callback_ms / 1000)
+            self.loop_monitor.output = lambda text: self.output(text)
+        self.memory = AllocationTracker()  # tracemalloc-Auswertung für /mem
+        if config.tracemalloc:
+            self.memory.start()
+        self.last_seen = {}  # handle → Zeitpunkt (time.time()) des letzten Kontakts
+        self.peer_cache = PeerCache(config.peer_cache, config.peer_cache_max_age) if config.peer_cache else None
+        self.gossip = None  # Gossip-Discovery ohne Broadcast (discovery_mode = "gossip")
+        if config.multicast["mode"] == "gossip":
+            self.gossip = Gossip(self, config.gossip_seeds, config.gossip_interval,
+                                 config.gossip_fanout, config.gossip_max_bytes, config.who_max_bytes)
+        self.capture = None  # Mitschnitt eingehender Daten (siehe benchmarks/replay.py)
+        if config.capture_file:
+            self.capture = Capture(config.capture_file, config.handle)
+
+    async def start_listener(self, join=True):
         """
         @brief Startet den UDP-Listener und den TCP-Server.
         @details
             Öffnet den UDP-Socket für Nachrichtenempfang und startet
             parallel den TCP-Server für den Empfang von Bildern.
+            Im Worker-Modus (config.workers > 1) werden beide Sockets mit SO_REUSEPORT
+            gebunden, sodass der Kernel eingehenden Verkehr auf alle Prozesse verteilt.
+        @param join False, um kein JOIN zu senden (Worker-Prozesse)
         """
         loop = asyncio.get_running_loop()
+        if self.loop_monitor is not None:
+            self.loop_monitor.start(loop)
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
@@ -62,12 +170,56 @@ class Messenger(asyncio.DatagramProtocol):
             local_addr=('0.0.0.0', self.config.port),
             family=socket.AF_INET,
             proto=socket.IPPROTO_UDP,
-            allow_broadcast=True
+            allow_broadcast=True,
+            reuse_port=self.reuse_port
         )
-        print(f"[Messenger] Lauscht auf Port {self.config.port}")
+        udp_socket = self.transport.get_extra_info("socket")
+        try:
+            udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+        except OSError:
+            pass
+        set_traffic_class(udp_socket, "interactive")  # Chat-Datagramme vor Bilddaten senden
+        if self.config.multicast["mode"] == "multicast":
+            self._join_multicast_group()
+        self.output(f"[Messenger] Lauscht auf Port {self.config.port}")
+        if self.peer_cache is not None and self.config.peer_cache_interval > 0:
+            asyncio.create_task(self._save_peer_cache_periodically())
+        if join:
+            # JOIN im Hintergrund, damit /msg an (z. B. aus dem Cache) bekannte Peers sofort möglich ist
+            asyncio.create_task(self._delayed_join())
+            if self.gossip is not None:
+                self.gossip.start()  # Worker (join=False) beantworten GOSSIP nur
+
+    async def _delayed_join(self):
+        """
+        @brief Sendet das JOIN, sobald der TCP-Server gestartet ist.
+        """
         await asyncio.sleep(1)
         await self.send_join()
 
+    @property
+    def reuse_port(self):
+        """
+        @brief Gibt an, ob UDP- und TCP-Socket mit SO_REUSEPORT gebunden werden (Worker-Modus).
+        """
+        return self.config.workers > 1 and hasattr(socket, "SO_REUSEPORT")
+
+    def _join_multicast_group(self):
+        """
+        @brief Tritt mit dem UDP-Socket der konfigurierten Multicast-Gruppe bei.
+        @details Schlägt der Beitritt fehl oder ist die Gruppe nicht erreichbar (siehe
+                 probe_multicast()), wird auf Broadcast zurückgefallen.
+        """
+        settings = self.config.multicast
+        try:
+            setup_multicast(self.transport.get_extra_info("socket"),
+                            settings["group"], settings["ttl"], settings["interface"])
+            probe_multicast(settings["group"], self.config.whoisport, settings["ttl"], settings["interface"])
+            self.output(f"[Messenger] Multicast-Gruppe {settings['group']} beigetreten")
+        except OSError as e:
+            self.output(f"[Warnung] Multicast nicht verfügbar ({e}), verwende Broadcast")
+            self.discovery_addr = BROADCAST_ADDR
+
     def connection_made(self, transport):
         """
         @brief Wird aufgerufen, wenn die UDP-Verbindung erfolgreich hergestellt wurde.
@@ -81,76 +233,207 @@ class Messenger(asyncio.DatagramProtocol):
         @param data Empfangene Bytes (Nachricht)
         @param addr Adresse des Absenders als Tupel (IP, Port)
         """
+        if self.capture is not None:
+            self.capture.record(KIND_UDP, addr, data)
+        if not self.limiter.allow_datagram(data, addr):
+            return  # Budget erschöpft: vor dem Parsen verwerfen (siehe limiter.dropped)
         try:
+            if binary_protocol.is_binary(data):
+                asyncio.create_task(self.dispatch(binary_protocol.decode(data), addr, binary=True))
+                return
             message = data.decode()
             asyncio.create_task(self.handle_message(message, addr))
         except Exception as e:
-            print(f"[Error] Konnte Nachricht von {addr} nicht dekodieren: {e}")
+            log.warning("decode_failed", addr=addr, error=str(e))
 
     async def handle_message(self, message, addr):
         """
         @brief Verarbeitet empfangene SLCP-Nachrichten.
         @param message Die dekodierte Nachricht als String
         @param addr Absender-Adresse als (ip, port) Tupel
-        @details Parst SLCP-Befehle und führt entsprechende Aktionen aus:
-            - JOIN: Neuen Peer registrieren
+        @details Parst jede Zeile und übergibt sie an dispatch(). Die erste Zeile wurde bereits
+                 in datagram_received() belastet, jede weitere belastet das Budget ihrer Klasse
+                 (sonst könnte z. B. ein MSG-Datagramm beliebig viele WHO transportieren).
+        """
+        for index, line in enumerate(protocol.split_lines(message)):
+            if index and not self.limiter.allow(addr[0], line_class(line)):
+                continue  # Budget erschöpft (siehe limiter.dropped)
+            await self.dispatch(protocol.parse_slcp(line), addr, message)
+
+    async def dispatch(self, parsed, addr, message=None, binary=False):
+        """
+        @brief Führt die Aktion zu einer geparsten SLCP-Nachricht aus (Text- oder Binärformat).
+        @param parsed Geparste Nachricht (Dictionary mit Schlüssel "type")
+        @param addr Absender-Adresse als (ip, port) Tupel
+        @param message Vollständige Textnachricht (für KNOWNUSERS), None bei Binärrahmen
+        @param binary True, wenn die Nachricht im Binärformat empfangen wurde
+        @details Unterstützte Befehle:
+            - JOIN: Neuen Peer registrieren (und ggf. eigene CAPS zurücksenden)
+            - CAPS: Fähigkeiten eines Peers merken und eine Ankündigung mit eigenen CAPS beantworten
             - LEAVE: Peer entfernen
             - WHO: Bekannte Benutzer senden
             - KNOWNUSERS: Benutzerliste verarbeiten
             - MSG: Private Nachricht empfangen
+            - FRAG: Fragment einer langen Nachricht
+            - RMSG/RFRAG/ACK: Nachricht, Fragment bzw. Bestätigung im zuverlässigen Modus
             - IMG: Bildübertragung initialisieren
+            - GOSSIP/MEMBERS: Digest bzw. Peer-Tabelle der Gossip-Discovery
         """
-        lines = message.splitlines()
-        for line in lines:
-            parsed = protocol.parse_slcp(line)
-
-            if parsed["type"] == "JOIN":
-                self.peers[parsed["handle"]] = (addr[0], parsed["port"])
-                print(f"[JOIN] {parsed['handle']} ist vom Port {parsed['port']} beigetreten")
-
-            elif parsed["type"] == "LEAVE":
-                self.peers.pop(parsed["handle"], None)
-                print(f"[LEAVE] {parsed['handle']} hat den Chat verlassen.")
-
-            elif parsed["type"] == "WHO":
-                await self.send_known_to(addr[0], addr[1])
-                print(f"[KNOWNUSERS] Gesendet an {addr[0]}:{addr[1]}")
-
-            elif parsed["type"] == "KNOWNUSERS":
-                await self.handle_knownusers_response(message, addr)
-
-            elif parsed["type"] == "MSG":
-                if parsed["to"] == self.config.handle:
-                    msg = parsed["message"]
-                    sender_ip, sender_port = addr[0], addr[1]
-                    sender_handle = None
-
-                    # Absender-Handle ermitteln
-                    for handle, (ip, port) in self.peers.items():
-                        if ip == sender_ip and port == sender_port:
-                            sender_handle = handle
-                            break
-                    if not sender_handle:
-                        for handle, (ip, _) in self.peers.items():
-                            if ip == sender_ip:
-                                sender_handle = f"{handle} (port {sender_port})"
-                                break
-
-                    sender_display = sender_handle if sender_handle else f"Unbekannt ({sender_ip}:{sender_port})"
-
-                    # Nachricht-Callback aufrufen oder ausgeben
-                    if self.message_callback:
-                        await self.message_callback(sender_display, msg)
+        if parsed["type"] == "JOIN":
+            log.debug("join", handle=parsed["handle"], addr=addr, port=parsed["port"])
+            if self.add_peer(parsed["handle"], (addr[0], parsed["port"]), seen=True):
+                self.output(f"[JOIN] {parsed['handle']} ist vom Port {parsed['port']} beigetreten")
+            elif not self.is_local(parsed["handle"]):
+                # Bekannter Peer (z. B. nach Neustart): add_peer kündigt CAPS nur neuen Peers an
+                self.announce_caps((addr[0], parsed["port"]))
+
+        elif parsed["type"] == "CAPS":
+            self.set_peer_caps(parsed["handle"], parsed["caps"])
+            if not parsed["reply"] and not self.is_local(parsed["handle"]):
+                self.reply_caps(addr)
+
+        elif parsed["type"] == "LEAVE":
+            log.debug("leave", handle=parsed["handle"], addr=addr)
+            if self.remove_peer(parsed["handle"]):
+                self.output(f"[LEAVE] {parsed['handle']} hat den Chat verlassen.")
+
+        elif parsed["type"] == "WHO":
+            await self.send_known_to(addr[0], addr[1])
+            log.debug("knownusers_sent", addr=addr)
+
+        elif parsed["type"] == "KNOWNUSERS":
+            await self.handle_knownusers_response(message, addr)
+
+        elif parsed["type"] == "MSG":
+            if self.is_local(parsed["to"]):
+                await self.deliver_message(parsed["message"], addr, parsed["to"])
+
+        elif parsed["type"] == "FRAG":
+            if self.is_local(parsed["to"]):
+                await self.handle_fragment(parsed, addr)
+
+        elif parsed["type"] in ("RMSG", "RFRAG"):
+            if self.is_local(parsed["to"]):
+                if self.reliable_receiver is None:
+                    self.reliable_receiver = ReliableChannel(self._send_raw)  # Nur Empfang, beim ersten RMSG
+                # Duplikate werden verworfen, Lücken gepuffert; ACK geht in jedem Fall zurück
+                for item in self.reliable_receiver.on_data(addr, parsed["epoch"], parsed["seq"], parsed, binary):
+                    if item["type"] == "RMSG":
+                        await self.deliver_message(item["message"], addr, item["to"])
                     else:
-                        print(f"\n💬 Nachricht von {sender_display}: {msg}")
+                        await self.handle_fragment(item, addr)
+
+        elif parsed["type"] == "ACK":
+            if self.reliable is not None:
+                self.reliable.on_ack(addr, parsed["epoch"], parsed["cum"], parsed["sacks"])
+
+        elif parsed["type"] == "IMG":
+            if self.is_local(parsed["to"]):
+                log.info("img_announced", addr=addr, size=parsed["size"])
+
+        elif parsed["type"] == "GOSSIP":
+            if self.gossip is not None:
+                await self.gossip.on_gossip(parsed, addr)
+
+        elif parsed["type"] == "MEMBERS":
+            if self.gossip is not None:
+                self.gossip.on_members(parsed["users"])
+
+    async def handle_fragment(self, parsed, addr):
+        """
+        @brief Übergibt ein empfangenes Fragment an den Reassembler und liefert vollständige Nachrichten aus.
+        @param parsed Geparste FRAG/RFRAG-Nachricht
+        @param addr Absender-Adresse als (ip, port) Tupel
+        """
+        text = self.reassembler.add(addr, parsed["msgid"], parsed["index"], parsed["count"], parsed["chunk"])
+        if text is not None:
+            await self.deliver_message(text, addr, parsed["to"])
+
+    def is_local(self, handle):
+        """
+        @brief Gibt an, ob ein Handle zu diesem Client gehört (Ziel eingehender MSG/IMG).
+        @param handle Benutzername
+        @return True für das eigene Handle
+        """
+        return handle == self.config.handle
+
+    def events_for(self, handle):
+        """
+        @brief Liefert den Ereignisbus, über den Ereignisse für ein lokales Handle veröffentlicht werden.
+        @param handle Lokales Handle (Empfänger)
+        @return EventBus (beim einfachen Client immer self.events)
+        """
+        return self.events
+
+    def peer_at(self, ip):
+        """
+        @brief Ordnet eine Absender-IP (z. B. einer TCP-Verbindung mit beliebigem Quellport) einem Peer zu.
+        @param ip IP-Adresse des Absenders
+        @return Handle des ersten bekannten Peers mit dieser IP, sonst die IP selbst
+        """
+        for handle, (peer_ip, _) in self.peers.items():
+            if peer_ip == ip:
+                return handle
+        return ip
+
+    def handles_at(self, address):
+        """
+        @brief Liefert alle Peers, die unter genau dieser Adresse bekannt sind.
+        @param address Adresse als (ip, port) Tupel
+        @return Liste von Handles (mehrere bei einem Peer mit mehreren Identitäten)
+        """
+        return [handle for handle, peer_address in self.peers.items() if peer_address == tuple(address)]
 
-                    # Automatische Antwort senden falls konfiguriert
-                    if self.config.autoreply:
-                        await self.send_message(sender_display, self.config.autoreply)
+    async def deliver_message(self, msg, addr, to=None):
+        """
+        @brief Zeigt eine an uns adressierte Textnachricht an und sendet ggf. die automatische Antwort.
+        @param msg Nachrichtentext
+        @param addr Absender-Adresse als (ip, port) Tupel
+        @param to Lokales Ziel-Handle (Standard: eigenes Handle)
+        """
+        sender_ip, sender_port = addr[0], addr[1]
+        sender_handle = None
+
+        # Absender-Handle ermitteln
+        for handle, (ip, port) in self.peers.items():
+            if ip == sender_ip and port == sender_port:
+                sender_handle = handle
+                self.last_seen[handle] = time.time()
+                break
+        if not sender_handle:
+            for handle, (ip, _) in self.peers.items():
+                if ip == sender_ip:
+                    sender_handle = f"{handle} (port {sender_port})"
+                    break
+
+        sender_display = sender_handle if sender_handle else f"Unbekannt ({sender_ip}:{sender_port})"
+
+        # Nachricht veröffentlichen (ohne auf die Abonnenten zu warten) oder ausgeben
+        events = self.events_for(to or self.config.handle)
+        if events.has_subscribers(MESSAGE):
+            events.publish(MESSAGE, sender_display, msg, addr)
+        else:
+            self.output(f"💬 Nachricht von {sender_display}: {msg}")
 
-            elif parsed["type"] == "IMG":
-                if parsed["to"] == self.config.handle:
-                    print(f"[IMG] Peer {addr[0]} sendet ein Bild über TCP ...")
+        # Automatische Antwort senden falls konfiguriert (höchstens einmal pro Peer und Intervall)
+        if self.config.autoreply and self._autoreply_due(addr):
+            await self.send_message(sender_display, self.config.autoreply)
+
+    def _autoreply_due(self, addr):
+        """
+        @brief Prüft, ob einem Absender (wieder) automatisch geantwortet werden darf.
+        @param addr Absender-Adresse als (ip, port) Tupel
+        @return True, wenn seit der letzten Antwort config.autoreply_interval Sekunden vergangen sind
+        """
+        now = time.monotonic()
+        last = self.autoreplied.get(addr)
+        if last is not None and now - last < self.config.autoreply_interval:
+            return False
+        if len(self.autoreplied) >= 1024:
+            self.autoreplied = {a: t for a, t in self.autoreplied.items()
+                                if now - t < self.config.autoreply_interval}
+        self.autoreplied[addr] = now
+        return True
 
     async def send_slcp(self, line, ip, port):
         """
@@ -158,148 +441,448 @@ class Messenger(asyncio.DatagramProtocol):
         @param line SLCP-formatierte Nachricht (String)
         @param ip Ziel-IP-Adresse
         @param port Ziel-Portnummer
+        @return True, wenn die Nachricht übergeben wurde, sonst False
         """
         try:
             if self.transport:
                 self.transport.sendto(line.encode(), (ip, port))
+                return True
         except Exception as e:
-            print(f"[Error] Fehler beim Senden an {ip}:{port}: {e}")
+            self.output(f"[Error] Fehler beim Senden an {ip}:{port}: {e}")
+        return False
 
     async def send_broadcast(self, line):
         """
         @brief Sendet eine SLCP-Broadcast-Nachricht an alle Teilnehmer im lokalen Netzwerk.
         @param line Die zu sendende SLCP-Nachricht (String)
+        @details Im Multicast-Modus geht die Nachricht an die konfigurierte Gruppe bzw. an die
+                 Broadcast-Adresse, wenn die Gruppe beim Start nicht nutzbar war (siehe
+                 _join_multicast_group()). Im Gossip-Modus geht sie per Unicast an alle bekannten
+                 Peers und Seeds.
+        @return True, wenn die Nachricht übergeben wurde, sonst False
         """
-        await self.send_slcp(line, "255.255.255.255", self.config.whoisport)
+        if self.gossip is not None:
+            return self.gossip.spread(line)
+        return await self.send_slcp(line, self.discovery_addr, self.config.whoisport)
 
     async def send_join(self):
         """
         @brief Sendet eine JOIN-Nachricht per UDP-Broadcast, um dem Chat beizutreten.
+        @details CAPS gehen nicht per Broadcast (der Discovery-Dienst wertet sie nicht aus),
+                 sondern per Unicast an jeden neu eingetragenen Peer (siehe announce_caps()).
         """
         msg = protocol.create_join(self.config.handle, self.config.port)
-        await self.send_broadcast(msg)
+        return await self.send_broadcast(msg)
 
     async def send_leave(self):
         """
         @brief Sendet eine LEAVE-Nachricht per UDP-Broadcast, um den Chat zu verlassen.
         """
         msg = protocol.create_leave(self.config.handle)
-        await self.send_broadcast(msg)
+        return await self.send_broadcast(msg)
 
     async def send_who(self):
         """
         @brief Sendet eine WHO-Nachricht, um die Liste aktiver Teilnehmer zu erfragen.
         """
         msg = "WHO\n"
-        await self.send_broadcast(msg)
+        if self.gossip is not None:
+            return self.gossip.spread(msg, everyone=False)  # Seeds und einige Peers, nicht alle
+        return await self.send_broadcast(msg)
 
     async def send_message(self, handle, message):
         """
         @brief Sendet eine Textnachricht an einen bestimmten Peer.
         @param handle Ziel-Handle (Benutzername) des Empfängers
         @param message Die zu sendende Nachricht (String)
+        @return True bei Erfolg, False wenn der Peer unbekannt ist oder das Senden fehlschlug
+        @details Im zuverlässigen Modus wird auf die Bestätigung des Empfängers gewartet.
+                 Texte, die nicht in ein Datagramm (config.max_datagram) passen, werden fragmentiert.
         """
         if handle not in self.peers:
-            print(f"[Error] Kein bekannter Peer mit Handle '{handle}'")
-            return
-        if handle in self.peers:
-            ip, port = self.peers[handle]
-            msg = protocol.create_msg(handle, message)
-            await self.send_slcp(msg, ip, port)
+            self.output(f"[Error] Kein bekannter Peer mit Handle '{handle}'")
+            return False
+        address = self.peers[handle]
+        binary = self.use_binary(handle)
+        if binary:
+            data = binary_protocol.encode_msg(handle, message)
+        else:
+            data = protocol.create_msg(handle, message).encode()
+        if len(data) > self.config.max_datagram:
+            ok = await self.send_fragmented(handle, address, self.split_message(handle, message))
+        elif self.reliable is not None:
+            encode = binary_protocol.encode_rmsg if binary else protocol.create_rmsg
+            ok = await self.reliable.send_frame(address, lambda epoch, seq: encode(handle, epoch, seq, message))
         else:
-            print(f"[Error] Handle '{handle}' ist nicht verbunden")
+            return self._send_raw(data, address)
+        if not ok:
+            self.output(f"[Error] Nachricht an '{handle}' wurde nicht bestätigt")
+        return ok
 
-    async def send_image(self, handle, filepath):
+    def add_peer(self, handle, address, notify=True, seen=False):
         """
-        @brief Sendet ein Bild an einen bestimmten Peer via TCP.
-        @param handle Der Ziel-Benutzername
-        @param filepath Pfad zur Bilddatei
-        @return True bei Erfolg, False bei Fehler
-        @details Überprüft die Datei auf Gültigkeit, öffnet eine TCP-Verbindung
-                 zum Ziel-Peer und überträgt das Bild in Chunks.
+        @brief Trägt einen Peer in die Peer-Tabelle ein (oder aktualisiert seine Adresse).
+        @param handle Benutzername des Peers
+        @param address Adresse als (ip, port) Tupel
+        @param notify False, um kein PEER-Ereignis zu veröffentlichen (z. B. bei Synchronisation)
+        @param seen True bei direktem Kontakt (JOIN, eigene Antwort des Peers); nur dann wird
+                    last_seen erneuert. Über Dritte gemeldete Peers (KNOWNUSERS, MEMBERS) altern
+                    ab der ersten Meldung, sonst liefen tote Cache-Einträge nie ab.
+        @return True, wenn der Peer neu ist oder seine Adresse geändert hat
         """
-        if handle not in self.peers:
-            print(f"[Error] Kein bekannter Peer mit Handle '{handle}'")
-            return
+        if seen or handle not in self.last_seen:
+            self.last_seen[handle] = time.time()
+        if self.peers.get(handle) == address:
+            return False
+        self.peers[handle] = address
+        self._knownusers_pages = None
+        if notify:
+            self.events.publish(PEER, "join", handle, address)
+            if not self.is_local(handle):
+                self.announce_caps(address)
+        return True
+
+    def remove_peer(self, handle, notify=True):
+        """
+        @brief Entfernt einen Peer aus der Peer-Tabelle.
+        @param handle Benutzername des Peers
+        @param notify False, um kein PEER-Ereignis zu veröffentlichen
+        @return True, wenn der Peer bekannt war
+        """
+        if self.peers.pop(handle, None) is None:
+            return False
+        self.last_seen.pop(handle, None)
+        self._knownusers_pages = None
+        if notify:
+            self.events.publish(PEER, "leave", handle, None)
+        return True
 
-        if not os.path.isfile(filepath):
-            print(f"[Error] Datei '{filepath}' nicht gefunden.")
+    def set_peer_caps(self, handle, caps, notify=True):
+        """
+        @brief Merkt sich die per CAPS angekündigten Fähigkeiten eines Peers.
+        @param handle Benutzername des Peers
+        @param caps Liste der Fähigkeiten (z. B. ["BIN"])
+        @param notify False, um kein PEER-Ereignis zu veröffentlichen
+        """
+        caps = set(caps)
+        if self.peer_caps.get(handle) == caps:
             return
+        self.peer_caps[handle] = caps
+        if notify:
+            self.events.publish(PEER, "caps", handle, sorted(caps))
 
-        try:
-            with open(filepath, "rb") as f:
-                img_bytes = f.read()
-            size = len(img_bytes)
+    def local_handles(self):
+        """
+        @brief Lokale Handles dieses Clients (Absender von JOIN und CAPS).
+        @return Liste von Handles
+        """
+        return [self.config.handle]
 
-            mime_type, _ = mimetypes.guess_type(filepath)
-            if not mime_type or not mime_type.startswith('image/'):
-                print(f"[Error] Datei '{filepath}' ist kein gültiges Bild.")
-                return False
+    def announce_caps(self, address, reply=False):
+        """
+        @brief Kündigt einem Peer die eigenen Fähigkeiten per Unicast an (nur bei wire_format "binary").
+        @param address Adresse des Peers als (ip, port) Tupel
+        @param reply True für die Antwort auf eine empfangene Ankündigung
+        @return True, wenn ein Datagramm gesendet wurde
+        @details Im Standardbetrieb gehen JOIN und Broadcasts an den Discovery-Dienst, Messenger
+                 lernen Peers nur über KNOWNUSERS. Deshalb erhält jeder neu eingetragene Peer die
+                 CAPS direkt; er antwortet mit seinen eigenen (siehe reply_caps()).
+                 Alle Zeilen gehen in einem Datagramm, höchstens CAPS_HANDLES Handles.
+        """
+        if self.config.wire_format != "binary":
+            return False
+        lines = [protocol.create_caps(handle, ["BIN"], reply) for handle in self.local_handles()[:CAPS_HANDLES]]
+        return self._send_raw("".join(lines).encode(), address)
 
-            print(f"[IMG] Bereite das Senden von {size} Bytes an {handle} vor")
+    def reply_caps(self, addr):
+        """
+        @brief Beantwortet eine CAPS-Ankündigung mit den eigenen CAPS.
+        @param addr Absender-Adresse als (ip, port) Tupel
+        @details Höchstens eine Antwort pro Adresse und CAPS_REPLY_INTERVAL, auch wenn ein
+                 Datagramm die CAPS mehrerer Handles enthält. Antworten werden nie beantwortet.
+        """
+        now = time.monotonic()
+        last = self.caps_replied.get(addr)
+        if last is not None and now - last < CAPS_REPLY_INTERVAL:
+            return
+        if len(self.caps_replied) >= 1024:
+            self.caps_replied = {a: t for a, t in self.caps_replied.items() if now - t < CAPS_REPLY_INTERVAL}
+        if self.announce_caps(addr, reply=True):
+            self.caps_replied[addr] = now
 
-            ip, port = self.peers[handle]
-            loop = asyncio.get_running_loop()
+    def use_binary(self, handle):
+        """
+        @brief Gibt an, ob mit einem Peer das Binärformat verwendet wird.
+        @param handle Handle des Peers
+        @return True, wenn wire_format "binary" ist und der Peer BIN angekündigt hat
+        """
+        return self.config.wire_format == "binary" and "BIN" in self.peer_caps.get(handle, ())
 
-            tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            tcp_socket.setblocking(False)
+    def split_message(self, handle, message):
+        """
+        @brief Zerlegt einen langen Text in Fragmente, die samt Kopf in ein Datagramm passen.
+        @param handle Längster zu erwartender Empfänger-Handle (bestimmt die Kopfgröße)
+        @param message Nachrichtentext
+        @return Tupel (msgid, chunks)
+        """
+        # Kopf: "RFRAG <to> <epoch> <seq> <msgid> <index> <count> " + Anführungszeichen und Zeilenende
+        overhead = 72 + len(handle.encode())
+        chunks = split_text(message, max(self.config.max_datagram - overhead, 64))
+        return next(self.msg_ids), chunks
 
-            try:
-                await asyncio.wait_for(
-                    loop.sock_connect(tcp_socket, (ip, port)),
-                    timeout=10.0  # 10 seconds timeout
-                )
+    async def send_fragmented(self, handle, address, fragments):
+        """
+        @brief Sendet eine in Fragmente zerlegte Nachricht an einen Peer.
+        @param handle Empfänger-Handle
+        @param address Zieladresse als (ip, port) Tupel
+        @param fragments Ergebnis von split_message()
+        @return True, wenn alle Fragmente gesendet (bzw. im zuverlässigen Modus bestätigt) wurden
+        """
+        msgid, chunks = fragments
+        count = len(chunks)
+        binary = self.use_binary(handle)
+        if self.reliable is not None:
+            encode = binary_protocol.encode_rfrag if binary else protocol.create_rfrag
+            sent = await asyncio.gather(*(
+                self.reliable.send_frame(address, lambda epoch, seq, i=i, chunk=chunk:
+                                         encode(handle, epoch, seq, msgid, i, count, chunk))
+                for i, chunk in enumerate(chunks)))
+            return all(sent)
+        if self.transport is None:
+            return False
+        try:
+            for i, chunk in enumerate(chunks):
+                if binary:
+                    data = binary_protocol.encode_frag(handle, msgid, i, count, chunk)
+                else:
+                    data = protocol.create_frag(handle, msgid, i, count, chunk).encode()
+                self.transport.sendto(data, address)
+                if i % FRAGMENT_BURST == FRAGMENT_BURST - 1:
+                    await asyncio.sleep(0)  # Burst begrenzen, damit der Empfangspuffer nicht überläuft
+            return True
+        except Exception as e:
+            self.output(f"[Error] Fehler beim Senden an {address[0]}:{address[1]}: {e}")
+            return False
 
-                img_command = f"IMG {handle} {size}\n".encode('utf-8')
-                await loop.sock_sendall(tcp_socket, img_command)
+    def _send_raw(self, data, addr):
+        """
+        @brief Übergibt ein fertig kodiertes Datagramm an den UDP-Transport.
+        @param data Zu sendende Bytes
+        @param addr Zieladresse als (ip, port) Tupel
+        @return True, wenn das Datagramm übergeben wurde, sonst False
+        """
+        try:
+            if self.transport:
+                self.transport.sendto(data, addr)
+                return True
+        except Exception as e:
+            self.output(f"[Error] Fehler beim Senden an {addr[0]}:{addr[1]}: {e}")
+        return False
 
-                await self.send_image_data(tcp_socket, img_bytes, handle)
+    def resolve_recipients(self, target):
+        """
+        @brief Löst eine Empfängerangabe in eine Liste von Handles auf.
+        @param target Handle, kommagetrennte Liste ("Bob,Alice"), Gruppenname aus config.groups
+                      oder bereits eine Liste von Handles/Gruppen
+        @return Liste eindeutiger Handles in der angegebenen Reihenfolge
+        @details Ist ein Name als Gruppe definiert, hat die Gruppe Vorrang vor einem gleichnamigen Handle.
+        """
+        names = target.split(",") if isinstance(target, str) else list(target)
+        handles = []
+        for name in (n.strip() for n in names):
+            if not name:
+                continue
+            handles.extend(self.config.groups.get(name, [name]))
+        return list(dict.fromkeys(handles))
+
+    async def send_message_many(self, recipients, message):
+        """
+        @brief Sendet dieselbe Textnachricht an mehrere Peers.
+        @param recipients Liste von Handles (siehe resolve_recipients())
+        @param message Die zu sendende Nachricht (String)
+        @return Dictionary handle → True/False mit dem Ergebnis pro Empfänger
+        @details Der Text wird nur einmal kodiert; pro Empfänger wird nur der Kopf vorangestellt.
+                 Alle Datagramme werden ohne Unterbrechung nacheinander an den Transport übergeben.
+        """
+        if self.reliable is not None:
+            # Sequenznummern sind pro Peer verschieden: einzeln, aber nebenläufig senden
+            sent = await asyncio.gather(*(self.send_message(h, message) for h in recipients))
+            return dict(zip(recipients, sent))
+
+        payload = protocol.create_msg_payload(message)
+        if len(payload) + 64 > self.config.max_datagram:
+            # Lange Nachricht: einmal fragmentieren, dieselben Fragmente an alle Empfänger
+            fragments = self.split_message(max(recipients, key=len, default=""), message)
+            results = {}
+            for handle in recipients:
+                address = self.peers.get(handle)
+                if address is None:
+                    self.output(f"[Error] Kein bekannter Peer mit Handle '{handle}'")
+                results[handle] = address is not None and await self.send_fragmented(handle, address, fragments)
+            return results
+
+        text_bytes = None  # Nutzlast für Binärrahmen, ebenfalls nur einmal kodiert
+        results = {}
+        for handle in recipients:
+            address = self.peers.get(handle)
+            if address is None or self.transport is None:
+                self.output(f"[Error] Kein bekannter Peer mit Handle '{handle}'")
+                results[handle] = False
+                continue
+            try:
+                if self.use_binary(handle):
+                    if text_bytes is None:
+                        text_bytes = message.encode()
+                    data = binary_protocol.frame_msg(handle.encode(), text_bytes)
+                else:
+                    data = protocol.create_msg_for(handle, payload)
+                self.transport.sendto(data, address)
+                results[handle] = True
+            except Exception as e:
+                self.output(f"[Error] Fehler beim Senden an {address[0]}:{address[1]}: {e}")
+                results[handle] = False
+        return results
 
-                print(f"[IMG] Bild erfolgreich gesendet ({size} Bytes) an {handle}")
-                return True
+    async def send_image(self, handle, filepath):
+        """
+        @brief Sendet ein Bild an einen bestimmten Peer via TCP.
+        @param handle Der Ziel-Benutzername
+        @param filepath Pfad zur Bilddatei
+        @return True bei Erfolg, False bei Fehler
+        @details Überprüft die Datei auf Gültigkeit, belegt einen Slot im TransferManager
+                 (wartet ggf. in der Warteschlange), öffnet eine TCP-Verbindung
+                 zum Ziel-Peer und überträgt das Bild in Chunks. Die Daten gehen erst nach
+                 IMGREADY des Empfängers hinaus; erfolgreich ist die Übertragung erst mit IMGOK.
+        @throws asyncio.CancelledError Wenn die Übertragung abgebrochen wurde (z. B. per /cancel)
+        """
+        if handle not in self.peers:
+            self.output(f"[Error] Kein bekannter Peer mit Handle '{handle}'")
+            return False
 
-            except asyncio.TimeoutError:
-                print(f"[Error] Verbindung zu {handle} abgelaufen")
-                return False
-            except ConnectionRefusedError:
-                print(f"[Error] Verbindung zu {handle} wurde abgelehnt")
+        if not await self.io.isfile(filepath):
+            self.output(f"[Error] Datei '{filepath}' nicht gefunden.")
+            return False
+
+        try:
+            mime_type = await self.io.guess_type(filepath)
+            if not mime_type or not mime_type.startswith('image/'):
+                self.output(f"[Error] Datei '{filepath}' ist kein gültiges Bild.")
                 return False
-            finally:
-                tcp_socket.close()
 
+            size = await self.io.getsize(filepath)
+
+            # Die Datei wird erst im Slot und blockweise gelesen, wartende Übertragungen belegen keinen Speicher
+            async with self.transfers.run("send", handle, size, memory=self.send_buffer_size(size)) as transfer:
+                self.output(f"[IMG] Übertragung {transfer.id}: Bereite das Senden von {size} Bytes an {handle} vor")
+
+                ip, port = self.peers[handle]
+                loop = asyncio.get_running_loop()
+
+                tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                tcp_socket.setblocking(False)
+                set_traffic_class(tcp_socket, "bulk")
+                reader = None
+
+                try:
+                    await asyncio.wait_for(
+                        loop.sock_connect(tcp_socket, (ip, port)),
+                        timeout=10.0  # 10 seconds timeout
+                    )
+
+                    img_command = f"IMG {handle} {size}\n".encode('utf-8')
+                    await loop.sock_sendall(tcp_socket, img_command)
+
+                    # Empfänger meldet freien Slot (IMGREADY) oder Ablehnung (IMGERR)
+                    reply = await asyncio.wait_for(self._read_img_reply(tcp_socket), IMG_READY_TIMEOUT)
+                    if reply[0] != "IMGREADY":
+                        self.output(f"[Error] {handle} hat das Bild abgelehnt: {reply[1] or 'keine Antwort'}")
+                        return False
+
+                    reader = await self.io.open_reader(filepath, READ_BLOCK)
+                    await self.send_image_data(tcp_socket, reader, size, handle, transfer)
+
+                    reply = await asyncio.wait_for(self._read_img_reply(tcp_socket), IMG_RESULT_TIMEOUT)
+                    if reply[0] != "IMGOK":
+                        self.output(f"[Error] Bild an {handle} nicht gespeichert: {reply[1] or 'keine Bestätigung'}")
+                        return False
+
+                    self.output(f"[IMG] Bild erfolgreich gesendet ({size} Bytes) an {handle}")
+                    return True
+
+                except asyncio.TimeoutError:
+                    self.output(f"[Error] Verbindung zu {handle} abgelaufen")
+                    return False
+                except ConnectionRefusedError:
+                    self.output(f"[Error] Verbindung zu {handle} wurde abgelehnt")
+                    return False
+                except asyncio.CancelledError:
+                    self.output(f"[IMG] Übertragung {transfer.id} an {handle} abgebrochen")
+                    raise
+                finally:
+                    tcp_socket.close()
+                    if reader is not None:
+                        await asyncio.shield(reader.close())
+
+        except TransferRejected as e:
+            self.output(f"[Error] Bild an {handle} nicht gesendet: {e}")
+            return False
         except Exception as e:
-            print(f"[Error] Bild konnte nicht gesendet werden: {e}")
+            self.output(f"[Error] Bild konnte nicht gesendet werden: {e}")
             return False
 
-    async def send_image_data(self, tcp_socket, img_bytes, handle):
+    async def _read_img_reply(self, tcp_socket):
+        """
+        @brief Liest eine Antwortzeile des Empfängers (IMGREADY, IMGOK oder IMGERR).
+        @param tcp_socket Offener TCP-Socket
+        @return Tupel (status, detail); ("", "") wenn die Verbindung ohne Antwort endet
+        """
+        loop = asyncio.get_running_loop()
+        data = b""
+        while not data.endswith(b"\n") and len(data) < 1024:
+            chunk = await loop.sock_recv(tcp_socket, 1024 - len(data))
+            if not chunk:
+                return "", ""
+            data += chunk
+        status, _, detail = data.decode(errors="replace").strip().partition(" ")
+        return status, detail
+
+    async def send_image_data(self, tcp_socket, reader, total_size, handle, transfer=None):
         """
-        @brief Sendet die Binärdaten eines Bildes über einen TCP-Socket und ruft Progress-Callbacks auf.
+        @brief Sendet die Binärdaten eines Bildes über einen TCP-Socket und veröffentlicht den Fortschritt.
         @param tcp_socket Offener TCP-Socket
-        @param img_bytes Bilddaten als Byte-Array
-        @param handle Ziel-Handle des Empfängers (für Progress-Callback)
+        @param reader ReadAheadReader der Bilddatei (liefert Blöcke von READ_BLOCK Bytes)
+        @param total_size Angekündigte Größe in Bytes (so viele Bytes werden gesendet)
+        @param handle Ziel-Handle des Empfängers (für Fortschritt und Bandbreite)
+        @param transfer Optionales Transfer-Objekt, dessen Fortschritt aktualisiert wird
+        @details Vor jedem Chunk wartet der upload_shaper auf freie Bandbreite und gibt den
+                 Eventloop frei, damit Chat-Nachrichten nicht hinter dem Bild warten.
+        @throws OSError Wenn die Datei kürzer als angekündigt ist
         """
         loop = asyncio.get_running_loop()
-        total_size = len(img_bytes)
         sent = 0
-        chunk_size = 8192  # 8KB Chunks
+        data = memoryview(b"")
+        offset = 0
 
         while sent < total_size:
-            current_chunk_size = min(chunk_size, total_size - sent)
-            chunk = img_bytes[sent:sent + current_chunk_size]
-
-            await loop.sock_sendall(tcp_socket, chunk)
+            if offset >= len(data):
+                block = await reader.read()
+                if not block:
+                    raise OSError(f"Datei endet nach {sent} von {total_size} Bytes")
+                data = memoryview(block)[:total_size - sent]  # Chunks ohne Kopie
+                offset = 0
+            current_chunk_size = min(CHUNK_SIZE, len(data) - offset)
+            await self.upload_shaper.consume(handle, current_chunk_size)
+
+            await loop.sock_sendall(tcp_socket, data[offset:offset + current_chunk_size])
+            offset += current_chunk_size
             sent += current_chunk_size
+            if transfer is not None:
+                transfer.transferred = sent
 
-            # Progress-Callback aufrufen
-            if self.progress_callback is not None:
-                progress = (sent / total_size) * 100
-                if asyncio.iscoroutinefunction(self.progress_callback):
-                    await self.progress_callback("send", handle, progress, sent, total_size)
-                else:
-                    self.progress_callback("send", handle, progress, sent, total_size)
-
-            if sent < total_size:
-                await asyncio.sleep(0.001)
+            # Fortschritt veröffentlichen
+            if self.events.has_subscribers(PROGRESS):
+                self.events.publish(PROGRESS, "send", handle, (sent / total_size) * 100, sent, total_size,
+                                    transfer.id if transfer is not None else None)
 
     async def start_tcp_server(self):
         """
@@ -309,15 +892,16 @@ class Messenger(asyncio.DatagramProtocol):
             server = await asyncio.start_server(
                 self.handle_tcp_connection,
                 '0.0.0.0',
-                self.config.port
+                self.config.port,
+                reuse_port=self.reuse_port
             )
-            print(f"[TCP] Server gestartet auf Port {self.config.port}")
+            self.output(f"[TCP] Server gestartet auf Port {self.config.port}")
 
             async with server:
                 await server.serve_forever()
 
         except Exception as e:
-            print(f"[Error] TCP-Server konnte nicht gestartet werden: {e}")
+            self.output(f"[Error] TCP-Server konnte nicht gestartet werden: {e}")
 
     async def handle_tcp_connection(self, reader, writer):
         """
@@ -325,16 +909,22 @@ class Messenger(asyncio.DatagramProtocol):
         @param reader StreamReader für eingehende Daten
         @param writer StreamWriter für ausgehende Daten
         @details Liest IMG-Befehle und empfängt Bilddaten, speichert diese
-                 lokal und ruft Image-Callbacks auf.
+                 lokal und veröffentlicht ein IMAGE-Ereignis. Jeder Empfang belegt einen Slot im
+                 TransferManager; bis dahin wartet die Verbindung. Der Absender erhält IMGREADY,
+                 sobald der Slot belegt ist, und zum Schluss IMGOK bzw. bei Ablehnung oder
+                 Fehler IMGERR, damit kein Bild unbemerkt verloren geht.
         """
         addr = writer.get_extra_info('peername')
-        print(f"[TCP] Neue Verbindung von {addr}")
+        log.info("tcp_connection", addr=addr)
+        set_traffic_class(writer.get_extra_info('socket'), "bulk")
 
         try:
             img_command_bytes = await asyncio.wait_for(
                 reader.readuntil(b'\n'),
                 timeout=5.0
             )
+            if self.capture is not None:
+                self.capture.record(KIND_TCP, addr, img_command_bytes)
             img_command = img_command_bytes.decode('utf-8').strip()
 
             if img_command.startswith("IMG"):
@@ -342,116 +932,147 @@ class Messenger(asyncio.DatagramProtocol):
                 if len(parts) >= 3:
                     _, handle, size_str = parts[0], parts[1], parts[2]
                     size = int(size_str)
-                    print(f"[IMG] Empfange {size} Bytes vom Peer {addr[0]}")
-                    filename = await self.receive_image_data(reader, addr, size, handle)
-
-                    if filename is not None and self.image_callback is not None:
-                        try:
-                            if asyncio.iscoroutinefunction(self.image_callback):
-                                await self.image_callback(handle, filename)
-                            else:
-                                self.image_callback(handle, filename)
-                        except Exception as e:
-                            print(f"[Error] Fehler beim Bild-Callback: {str(e)}")
+                    if not self.is_local(handle):
+                        log.warning("tcp_wrong_target", addr=addr, handle=handle)
+                        await self._send_img_reply(writer, "IMGERR", f"unbekanntes Ziel {handle}")
+                        return
+                    # Limits pro Peer gelten für den Absender, nicht für das (eigene) Ziel-Handle
+                    sender = self.peer_at(addr[0])
+                    async with self.transfers.run("receive", sender, size,
+                                                  memory=self.receive_buffer_size(size)) as transfer:
+                        self.output(f"[IMG] Übertragung {transfer.id}: Empfange {size} Bytes von {sender}")
+                        await self._send_img_reply(writer, "IMGREADY")
+                        filename = await self.receive_image_data(reader, addr, size, sender, transfer)
+
+                    if filename is not None:
+                        await self._send_img_reply(writer, "IMGOK", size)
+                        self.events_for(handle).publish(IMAGE, handle, filename)
+                    else:
+                        await self._send_img_reply(writer, "IMGERR", "Empfang fehlgeschlagen")
                 else:
-                    print(f"[Error] Ungültiges IMG-Befehlsformat: {img_command}")
+                    log.warning("tcp_invalid_img", addr=addr, command=img_command)
             else:
-                print(f"[Error] Unbekannter TCP-Befehl: {img_command}")
+                log.warning("tcp_unknown_command", addr=addr, command=img_command)
 
         except asyncio.TimeoutError:
-            print(f"[Error] TCP-Verbindung von {addr} abgelaufen")
+            log.warning("tcp_timeout", addr=addr)
+        except TransferRejected as e:
+            self.output(f"[Error] Bild von {addr[0]} abgelehnt: {e}")
+            await self._send_img_reply(writer, "IMGERR", e)
+        except asyncio.CancelledError:
+            self.output(f"[IMG] Empfang von {addr[0]} abgebrochen")
+            raise
         except Exception as e:
-            print(f"[Error] TCP-Verbindungsfehler von {addr}: {e}")
+            log.error("tcp_error", addr=addr, error=str(e))
         finally:
             writer.close()
             await writer.wait_closed()
 
-    async def receive_image_data(self, reader, addr, size, sender_handle):
+    async def _send_img_reply(self, writer, status, detail=""):
+        """
+        @brief Sendet dem Absender einer IMG-Verbindung eine Antwort (siehe protocol.create_img_reply()).
+        @param writer StreamWriter der Verbindung
+        @param status "IMGREADY", "IMGOK" oder "IMGERR"
+        @param detail Größe bzw. Grund
+        """
+        try:
+            writer.write(protocol.create_img_reply(status, detail).encode())
+            await writer.drain()
+        except (ConnectionError, OSError) as e:
+            log.debug("img_reply_failed", status=status, error=str(e))
+
+    async def receive_image_data(self, reader, addr, size, sender_handle, transfer=None):
         """
         @brief Empfängt Bilddaten über TCP und speichert sie.
         @param reader StreamReader für die Datenübertragung
         @param addr Absender-Adresse als (ip, port) Tupel
         @param size Erwartete Dateigröße in Bytes
         @param sender_handle Benutzername des Absenders
+        @param transfer Optionales Transfer-Objekt (ID im Dateinamen, Fortschritt)
         @return Dateiname der gespeicherten Datei oder None bei Fehler
-        @details Empfängt Daten in Chunks, zeigt Fortschritt an und speichert
-                das Bild mit einem eindeutigen Dateinamen.
+        @details Empfängt Daten in Chunks, zeigt Fortschritt an und schreibt sie
+                gepuffert über den I/O-Pool in eine Datei mit eindeutigem Namen.
+                Die Datei wird exklusiv angelegt, sodass nie eine vorhandene überschrieben wird.
         """
+        # Eindeutigen Dateinamen generieren (Transfer-ID unterscheidet Bilder derselben Sekunde)
+        suffix = f"_{transfer.id}" if transfer is not None else ""
+        filename = os.path.join(
+            self.config.imagepath,
+            f"{addr[0]}_{int(time.time())}_{sender_handle}{suffix}.jpg"
+        )
+        writer = None
         try:
-            img_data = bytearray()
+            await self.io.makedirs(os.path.dirname(filename))
+            writer = await self.io.open_writer(filename, self.config.write_buffer, self.config.fsync,
+                                               exclusive=True)
             received = 0
 
-            # Daten in Chunks empfangen
+            # Daten in Chunks empfangen und im Hintergrund schreiben (Write-Behind)
             while received < size:
+                await self.download_shaper.consume(sender_handle, min(CHUNK_SIZE, size - received))
                 chunk = await asyncio.wait_for(
-                    reader.read(min(8192, size - received)),
+                    reader.read(min(CHUNK_SIZE, size - received)),
                     timeout=30.0
                 )
                 if not chunk:
-                    print(f"[Error] Verbindung wurde unerwartet geschlossen")
+                    log.warning("tcp_closed_early", addr=addr, received=received, size=size)
+                    self.output(f"[Error] Bild von {sender_handle}: Verbindung wurde unerwartet geschlossen")
+                    await self._discard_partial(writer, filename)
                     return None
 
-                img_data += chunk
+                await writer.write(chunk)
                 received += len(chunk)
+                if transfer is not None:
+                    transfer.transferred = received
 
-                # Progress-Callback aufrufen
-                if self.progress_callback is not None:
-                    progress = (received / size) * 100
-                    if asyncio.iscoroutinefunction(self.progress_callback):
-                        await self.progress_callback("receive", sender_handle, progress, received, size)
-                    else:
-                        self.progress_callback("receive", sender_handle, progress, received, size)
+                # Fortschritt veröffentlichen
+                if self.events.has_subscribers(PROGRESS):
+                    self.events.publish(PROGRESS, "receive", sender_handle, (received / size) * 100, received, size,
+                                        transfer.id if transfer is not None else None)
 
-             # Eindeutigen Dateinamen generieren
-            filename = os.path.join(
-                self.config.imagepath,
-                f"{addr[0]}_{int(time.time())}_{sender_handle}.jpg"
-            )
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-            # Datei speichern
-            with open(filename, "wb") as f:
-                f.write(img_data)
-            print(f"[IMG] Gespeichert als: {os.path.normpath(filename)}")
+            # Datei abschließen (Restpuffer schreiben, ggf. fsync)
+            await writer.close()
+            self.output(f"[IMG] Gespeichert als: {os.path.normpath(filename)}")
             return filename
 
+        except asyncio.CancelledError:
+            if writer is not None:
+                await asyncio.shield(self._discard_partial(writer, filename))
+            raise
         except Exception as e:
-            print(f"[Error] Fehler beim Empfangen des Bildes: {e}")
+            log.error("receive_failed", addr=addr, error=str(e))
+            self.output(f"[Error] Fehler beim Empfangen des Bildes: {e}")
+            if writer is not None:
+                await self._discard_partial(writer, filename)
             return None
 
-    def set_progress_callback(self, callback):
+    def send_buffer_size(self, size):
         """
-        @brief Setzt den Callback für Übertragungsfortschritt.
-        @param callback Funktion mit Signatur: (direction, handle, progress, bytes_transferred, total_bytes)
-            - direction: "send" oder "receive"
-            - handle: Benutzername des Partners
-            - progress: Fortschritt in Prozent (0-100)
-            - bytes_transferred: Übertragene Bytes
-            - total_bytes: Gesamtanzahl Bytes
+        @brief Höchstens belegter Pufferspeicher beim Senden eines Bildes (für das Speicherbudget).
+        @param size Bildgröße in Bytes
+        @return Bytes (aktueller und vorausgelesener Block)
         """
-        self.progress_callback = callback
+        return 2 * min(size, READ_BLOCK)
 
-    def set_message_callback(self, callback):
+    def receive_buffer_size(self, size):
         """
-        @brief Setzt den Callback für empfangene Nachrichten.
-        @param callback Async-Funktion mit Signatur: (sender_handle, message)
+        @brief Höchstens belegter Pufferspeicher beim Empfang eines Bildes (für das Speicherbudget).
+        @param size Angekündigte Bildgröße in Bytes
+        @return Bytes (Write-Behind-Puffer, laufender Schreibblock und ein Chunk)
         """
-        self.message_callback = callback
+        return 2 * min(size, self.config.write_buffer + CHUNK_SIZE) + min(size, CHUNK_SIZE)
 
-    def set_image_callback(self, callback):
+    async def _discard_partial(self, writer, filename):
         """
-        @brief Setzt den Callback für empfangene Bilder.
-        @param callback Funktion mit Signatur: (sender_handle, filename)
+        @brief Schließt einen abgebrochenen Empfang und löscht die unvollständige Datei.
+        @param writer Geöffneter WriteBehindWriter
+        @param filename Pfad der unvollständigen Datei
         """
-        self.image_callback = callback
-
-    def set_knownusers_callback(self, callback):
-        """
-        @brief Setzt den Callback für Benutzerlisten.
-        @param callback Async-Funktion mit Signatur: (users_list)
-            users_list ist eine Liste von (handle, ip, port) Tupeln
-        """
-        self.knownusers_callback = callback
+        try:
+            await writer.abort()
+            await self.io.run(os.remove, filename)
+        except OSError:
+            pass
 
     async def handle_knownusers_response(self, message, addr):
         """
@@ -459,7 +1080,7 @@ class Messenger(asyncio.DatagramProtocol):
         @param message Die vollständige KNOWNUSERS-Nachricht
         @param addr Absender-Adresse als (ip, port) Tupel
         @details Parst die Benutzerliste, aktualisiert die Peer-Informationen
-                und ruft den entsprechenden Callback auf. Sammelt Antworten
+                und veröffentlicht ein KNOWNUSERS-Ereignis. Sammelt Antworten
                 für eine kurze Zeit um mehrfache Antworten zu konsolidieren.
         """
         user_list = message[len("KNOWNUSERS "):].strip().split(",")
@@ -469,8 +1090,9 @@ class Messenger(asyncio.DatagramProtocol):
             if len(infos) == 3:
                 handle, ip, port = infos
                 users.append((handle, ip, int(port)))
-                if handle != self.config.handle:
-                    self.peers[handle] = (ip, int(port))
+                if not self.is_local(handle):
+                    # Nur der Eintrag des Antwortenden selbst ist ein direkter Kontakt
+                    self.add_peer(handle, (ip, int(port)), seen=(ip, int(port)) == tuple(addr))
 
         response_id = f"who_{int(time.time())}"
         if response_id not in self.pending_who_responses:
@@ -486,41 +1108,170 @@ class Messenger(asyncio.DatagramProtocol):
             for handle, ip, port in all_users:
                 unique_users[handle] = (ip, port)
 
-            if self.knownusers_callback:
+            if self.events.has_subscribers(KNOWNUSERS):
                 users_list = [(h, i, p) for h, (i, p) in unique_users.items()]
-                await self.knownusers_callback(users_list)
+                self.events.publish(KNOWNUSERS, users_list)
             else:
-                print("\n[PEER LIST] Aktive Benutzer:")
+                self.output("[PEER LIST] Aktive Benutzer:")
                 for handle, (ip, port) in unique_users.items():
-                    print(f" - {handle} @ {ip}:{port}")
+                    self.output(f" - {handle} @ {ip}:{port}")
 
             del self.pending_who_responses[response_id]
 
+    def load_peer_cache(self):
+        """
+        @brief Übernimmt die gültigen Einträge des Peer-Caches in die Peer-Tabelle.
+        @return Liste der geladenen Handles (noch unbestätigt, siehe probe_peers)
+        """
+        if self.peer_cache is None:
+            return []
+        loaded = []
+        for handle, entry in self.peer_cache.load().items():
+            if self.is_local(handle) or handle in self.peers:
+                continue
+            self.add_peer(handle, entry["address"])
+            self.last_seen[handle] = entry["last_seen"]
+            if entry["caps"]:
+                self.set_peer_caps(handle, entry["caps"])
+            loaded.append(handle)
+        if loaded:
+            self.output(f"[Cache] {len(loaded)} Peers aus {self.peer_cache.path} geladen")
+        return loaded
+
+    async def save_peer_cache(self):
+        """
+        @brief Speichert die aktuelle Peer-Tabelle mit letzten Kontaktzeiten im Peer-Cache (im I/O-Pool).
+        """
+        if self.peer_cache is None:
+            return
+        now = time.time()
+        snapshot = {handle: {"address": address, "last_seen": self.last_seen.get(handle, now),
+                             "caps": list(self.peer_caps.get(handle, ()))}
+                    for handle, address in self.peers.items() if not self.is_local(handle)}
+        try:
+            await self.io.run(self.peer_cache.save, snapshot)
+        except OSError as e:
+            log.warning("peer_cache_save_failed", path=self.peer_cache.path, error=str(e))
+
+    async def _save_peer_cache_periodically(self):
+        """
+        @brief Speichert den Peer-Cache alle config.peer_cache_interval Sekunden.
+        """
+        while True:
+            await asyncio.sleep(self.config.peer_cache_interval)
+            await self.save_peer_cache()
+
+    async def probe_peers(self, handles, timeout=2.0, retries=2):
+        """
+        @brief Prüft Peers gezielt per Unicast-WHO und entfernt Peers, die nicht antworten.
+        @param handles Zu prüfende Handles (z. B. aus load_peer_cache)
+        @param timeout Wartezeit pro Versuch in Sekunden
+        @param retries Anzahl Versuche pro Peer
+        @return Liste der bestätigten Handles
+        @details Statt eines Broadcast-WHO an alle erhält jeder Peer ein WHO an seine bekannte
+                 Adresse; die KNOWNUSERS-Antwort bestätigt ihn (und liefert ggf. weitere Peers).
+                 Gesendet wird über einen eigenen, kurzlebigen Socket, damit die Antworten auch
+                 im Worker-Modus (SO_REUSEPORT) bei diesem Prozess ankommen.
+        """
+        loop = asyncio.get_running_loop()
+        replies = {}  # (ip, port) → Future
+
+        def on_reply(data, addr):
+            for line in protocol.split_lines(data.decode(errors="replace")):
+                parsed = protocol.parse_slcp(line)
+                if parsed["type"] != "KNOWNUSERS":
+                    continue
+                for user in parsed["users"]:
+                    if not self.is_local(user["handle"]):
+                        address = (user["ip"], user["port"])
+                        self.add_peer(user["handle"], address, seen=address == tuple(addr))
+                future = replies.get(addr)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ProbeProtocol(on_reply), local_addr=("0.0.0.0", 0), family=socket.AF_INET)
+
+        async def probe(handle):
+            address = self.peers.get(handle)
+            if address is None:
+                return False
+            future = replies[address] = loop.create_future()
+            for _ in range(retries):
+                transport.sendto(protocol.create_who().encode(), address)
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), timeout)
+                    self.last_seen[handle] = time.time()
+                    return True
+                except asyncio.TimeoutError:
+                    continue
+            return False
+
+        started = time.time()
+        try:
+            results = await asyncio.gather(*(probe(h) for h in handles))
+        finally:
+            transport.close()
+        confirmed = [h for h, ok in zip(handles, results) if ok]
+        for handle, ok in zip(handles, results):
+            # Peers, die sich währenddessen anderweitig gemeldet haben (z. B. JOIN), bleiben erhalten
+            if not ok and self.last_seen.get(handle, 0) < started and self.remove_peer(handle):
+                self.output(f"[Cache] {handle} antwortet nicht und wurde entfernt")
+        if handles:
+            self.output(f"[Cache] {len(confirmed)} von {len(handles)} Peers bestätigt")
+        return confirmed
+
     async def send_known_to(self, ip, port):
         """
         @brief Sendet bekannte Benutzer als Antwort auf WHO-Anfrage.
         @param ip Ziel-IP-Adresse
         @param port Ziel-Port
-        @details Erstellt eine KNOWNUSERS-Nachricht mit allen bekannten Peers
-                inklusive eigener Informationen und sendet diese direkt an
-                den anfragenden Peer.
+        @details Sendet die zwischengespeicherten KNOWNUSERS-Seiten (siehe knownusers_pages())
+                direkt an den anfragenden Peer.
+        """
+        if self.transport is None:
+            return
+        try:
+            for page in self.knownusers_pages():
+                self.transport.sendto(page, (ip, port))
+        except Exception as e:
+            self.output(f"[Error] Fehler beim Senden an {ip}:{port}: {e}")
+
+    def knownusers_pages(self):
+        """
+        @brief Liefert die kodierte KNOWNUSERS-Antwort auf ein WHO.
+        @return Liste von KNOWNUSERS-Zeilen (bytes), je höchstens config.max_datagram Bytes
+        @details Enthält alle bekannten Peers inklusive eigener Informationen, insgesamt begrenzt auf
+                config.who_max_bytes. Die Seiten werden nur neu erzeugt, wenn sich die
+                Peer-Tabelle seit dem letzten Aufruf geändert hat.
+        """
+        if self._knownusers_pages is None:
+            self._knownusers_pages = protocol.create_knownusers_pages(
+                self.member_entries(), self.config.max_datagram, self.config.who_max_bytes)
+        return self._knownusers_pages
+
+    def member_entries(self):
+        """
+        @brief Liefert die eigenen Einträge (zuerst) und alle Peers.
+        @return Liste von (handle, ip, port) Tupeln
         """
-        user_infos = [f"{self.config.handle} {self.get_local_ip()} {self.config.port}"]
-        for handle, (peer_ip, peer_port) in self.peers.items():
-            user_infos.append(f"{handle} {peer_ip} {peer_port}")  # peer_ip statt ip
-        msg = "KNOWNUSERS " + ", ".join(user_infos) + "\n"
-        await self.send_slcp(msg, ip, port)
+        entries = [(self.config.handle, self.get_local_ip(), self.config.port)]
+        entries.extend((handle, peer_ip, peer_port) for handle, (peer_ip, peer_port) in self.peers.items())
+        return entries
 
     def get_local_ip(self):
         """
         @brief Ermittelt die lokale IP-Adresse.
         @return Die lokale IP-Adresse als String
+        @details Eine erfolgreich ermittelte Adresse wird zwischengespeichert.
         """
+        if self._local_ip is not None:
+            return self._local_ip
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
+            self._local_ip = s.getsockname()[0]
             s.close()
-            return ip
+            return self._local_ip
         except Exception:
             return "127.0.0.1"
@@ -0,0 +1,78 @@
+"""
+@file peer_cache.py
+@brief Persistenter Peer-Cache für schnelle Neustarts (Warmstart).
+@details
+    Die Peer-Tabelle des Messengers wird mit Adresse, angekündigten Fähigkeiten und dem Zeitpunkt
+    des letzten Kontakts in einer kleinen JSON-Datei gespeichert (beim Beenden und periodisch).
+    Beim Start werden Einträge, die nicht älter als max_age sind, sofort geladen, sodass /msg
+    ohne WHO funktioniert. Anschließend prüft der Messenger die geladenen Peers gezielt per
+    Unicast-WHO (siehe Messenger.probe_peers) und entfernt Peers, die nicht antworten.
+"""
+
+import json
+import os
+import time
+
+## Version des Dateiformats
+VERSION = 1
+
+
+class PeerCache:
+    """
+    @class PeerCache
+    @brief Liest und schreibt den Peer-Cache (JSON, atomar ersetzt).
+    """
+
+    def __init__(self, path, max_age=7 * 24 * 3600):
+        """
+        @brief Konstruktor des PeerCache.
+        @param path Pfad der Cache-Datei
+        @param max_age Maximales Alter eines Eintrags in Sekunden, ältere werden beim Laden verworfen
+        """
+        self.path = path
+        self.max_age = max_age
+
+    def load(self, now=None):
+        """
+        @brief Liest die gültigen Einträge aus der Cache-Datei.
+        @param now Aktueller Zeitpunkt (time.time()), Standard: jetzt
+        @return Dictionary handle → {"address": (ip, port), "last_seen": float, "caps": [...]};
+                leer, wenn die Datei fehlt oder ungültig ist
+        """
+        now = time.time() if now is None else now
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            return {}
+
+        peers = {}
+        for handle, entry in data.get("peers", {}).items():
+            try:
+                address = (str(entry["ip"]), int(entry["port"]))
+                last_seen = float(entry["last_seen"])
+                caps = [str(c) for c in entry.get("caps", [])]
+            except (KeyError, TypeError, ValueError):
+                continue
+            if now - last_seen <= self.max_age:
+                peers[handle] = {"address": address, "last_seen": last_seen, "caps": caps}
+        return peers
+
+    def save(self, peers):
+        """
+        @brief Schreibt die Einträge atomar (temporäre Datei, dann os.replace).
+        @param peers Dictionary handle → {"address": (ip, port), "last_seen": float, "caps": [...]}
+        """
+        data = {"version": VERSION, "peers": {
+            handle: {"ip": entry["address"][0], "port": entry["address"][1],
+                     "last_seen": round(entry["last_seen"], 3), "caps": sorted(entry["caps"])}
+            for handle, entry in peers.items()
+        }}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.path)
@@ -0,0 +1,251 @@
+"""
+@file reliable.py
+@brief Zuverlässige Zustellung von Textnachrichten über UDP (optionaler Modus).
+@details
+    Jede Nachricht erhält pro Peer eine Sequenznummer (RMSG). Der Empfänger bestätigt kumulativ
+    und selektiv (ACK), verwirft Duplikate und liefert Nachrichten in Reihenfolge aus. Der Sender
+    wiederholt unbestätigte Nachrichten nach einem adaptiven Timeout (RTT-Schätzung nach RFC 6298,
+    Karn-Algorithmus) und begrenzt die Zahl unbestätigter Nachrichten mit einem Sendefenster.
+"""
+
+import asyncio
+import random
+from collections import deque
+from Chat.common import protocol, binary_protocol
+
+## Anzahl selektiv bestätigter späterer Segmente, ab der eine Lücke sofort wiederholt wird
+FAST_RETRANSMIT_SACKS = 3
+
+
+class _Segment:
+    """
+    @class _Segment
+    @brief Eine gesendete, noch unbestätigte Nachricht.
+    """
+    __slots__ = ("seq", "data", "future", "sent_at", "retries", "timer")
+
+    def __init__(self, seq, data, future):
+        self.seq = seq
+        self.data = data
+        self.future = future
+        self.sent_at = 0.0
+        self.retries = 0
+        self.timer = None
+
+
+class _SendState:
+    """
+    @class _SendState
+    @brief Senderzustand pro Peer: Sequenznummern, Sendefenster und RTT-Schätzung.
+    """
+
+    def __init__(self, initial_rto):
+        self.next_seq = 1
+        self.unacked = {}  # seq → _Segment
+        self.queue = deque()  # Wartende Nachrichten (build, future)
+        self.srtt = None
+        self.rttvar = None
+        self.rto = initial_rto
+
+
+class _RecvState:
+    """
+    @class _RecvState
+    @brief Empfängerzustand pro Peer: kumulativ bestätigte Sequenznummer und Umordnungspuffer.
+    """
+
+    def __init__(self, epoch):
+        self.epoch = epoch
+        self.cum = 0
+        self.buffer = {}  # seq → Nachricht (außerhalb der Reihenfolge angekommen)
+
+
+class ReliableChannel:
+    """
+    @class ReliableChannel
+    @brief Zuverlässige, geordnete Nachrichtenzustellung über einen unzuverlässigen Datagramm-Transport.
+    @details
+        Der Kanal kennt nur Adressen (ip, port); das Senden der Datagramme übernimmt die
+        übergebene Funktion send_raw. Die epoch-Kennung unterscheidet Sitzungen des Senders,
+        damit ein Neustart (Sequenznummern ab 1) nicht als Duplikat verworfen wird.
+    """
+
+    def __init__(self, send_raw, window=32, max_retries=8, initial_rto=0.5,
+                 min_rto=0.05, max_rto=5.0, max_buffer=256):
+        """
+        @brief Konstruktor des ReliableChannel.
+        @param send_raw Funktion (data: bytes, addr) zum Versenden eines Datagramms
+        @param window Maximale Anzahl unbestätigter Nachrichten pro Peer
+        @param max_retries Maximale Anzahl Wiederholungen, bevor eine Nachricht als verloren gilt
+        @param initial_rto Start-Timeout für Wiederholungen in Sekunden
+        @param min_rto Untergrenze des Timeouts in Sekunden
+        @param max_rto Obergrenze des Timeouts in Sekunden
+        @param max_buffer Maximale Anzahl umgeordneter Nachrichten, die der Empfänger puffert
+        """
+        self.send_raw = send_raw
+        self.window = window
+        self.max_retries = max_retries
+        self.initial_rto = initial_rto
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.max_buffer = max_buffer
+        self.epoch = random.getrandbits(31)
+        self.senders = {}  # addr → _SendState
+        self.receivers = {}  # addr → _RecvState
+        self.retransmits = 0
+        self.duplicates = 0
+
+    # --- Sender ---
+
+    async def send(self, addr, target, text):
+        """
+        @brief Sendet eine Nachricht zuverlässig und wartet auf die Bestätigung.
+        @param addr Zieladresse (ip, port)
+        @param target Empfänger-Handle
+        @param text Nachrichtentext
+        @return True bei bestätigter Zustellung, False nach Ausschöpfen aller Wiederholungen
+        """
+        return await self.send_frame(addr, lambda epoch, seq: protocol.create_rmsg(target, epoch, seq, text))
+
+    async def send_frame(self, addr, build):
+        """
+        @brief Sendet ein beliebiges sequenziertes Datagramm zuverlässig (z. B. RMSG oder RFRAG).
+        @param addr Zieladresse (ip, port)
+        @param build Funktion (epoch, seq) → SLCP-Zeile (str) oder Binärrahmen (bytes)
+        @return True bei bestätigter Zustellung, False nach Ausschöpfen aller Wiederholungen
+        """
+        state = self.senders.get(addr)
+        if state is None:
+            state = self.senders[addr] = _SendState(self.initial_rto)
+        future = asyncio.get_running_loop().create_future()
+        state.queue.append((build, future))
+        self._pump(addr, state)
+        return await future
+
+    def _pump(self, addr, state):
+        """
+        @brief Sendet wartende Nachrichten, solange das Sendefenster Platz hat.
+        """
+        while state.queue and len(state.unacked) < self.window:
+            build, future = state.queue.popleft()
+            seq = state.next_seq
+            state.next_seq += 1
+            data = build(self.epoch, seq)
+            if isinstance(data, str):
+                data = data.encode()
+            segment = _Segment(seq, data, future)
+            state.unacked[seq] = segment
+            self._transmit(addr, state, segment)
+
+    def _transmit(self, addr, state, segment):
+        """
+        @brief Sendet ein Segment und startet dessen Wiederholungs-Timer.
+        """
+        loop = asyncio.get_running_loop()
+        self.send_raw(segment.data, addr)
+        segment.sent_at = loop.time()
+        # Exponentielles Backoff pro Segment, damit ein Verlustschub nicht den RTO aller Segmente aufbläht
+        timeout = min(state.rto * (2 ** segment.retries), self.max_rto)
+        segment.timer = loop.call_later(timeout, self._on_timeout, addr, state, segment)
+
+    def _on_timeout(self, addr, state, segment):
+        """
+        @brief Wiederholt ein unbestätigtes Segment oder gibt es nach max_retries auf.
+        """
+        if state.unacked.get(segment.seq) is not segment:
+            return
+        if segment.retries >= self.max_retries:
+            del state.unacked[segment.seq]
+            if not segment.future.done():
+                segment.future.set_result(False)
+            self._pump(addr, state)
+            return
+        self._retransmit(addr, state, segment)
+
+    def _retransmit(self, addr, state, segment):
+        """
+        @brief Sendet ein Segment erneut (nach Timeout oder als Fast Retransmit).
+        """
+        if segment.timer is not None:
+            segment.timer.cancel()
+        segment.retries += 1
+        self.retransmits += 1
+        self._transmit(addr, state, segment)
+
+    def on_ack(self, addr, epoch, cum, sacks):
+        """
+        @brief Verarbeitet eine Empfangsbestätigung.
+        @param addr Absender der Bestätigung (ip, port)
+        @param epoch Bestätigte Sitzungskennung
+        @param cum Kumulativ bestätigte Sequenznummer
+        @param sacks Selektiv bestätigte Sequenznummern
+        """
+        state = self.senders.get(addr)
+        if state is None or epoch != self.epoch:
+            return
+        now = asyncio.get_running_loop().time()
+        acked = [seq for seq in state.unacked if seq <= cum]
+        acked.extend(seq for seq in sacks if seq in state.unacked and seq > cum)
+        for seq in acked:
+            segment = state.unacked.pop(seq)
+            segment.timer.cancel()
+            if segment.retries == 0:  # Karn: nur nicht wiederholte Segmente messen
+                self._update_rtt(state, now - segment.sent_at)
+            if not segment.future.done():
+                segment.future.set_result(True)
+
+        # Fast Retransmit: Lücken, hinter denen bereits FAST_RETRANSMIT_SACKS Segmente angekommen
+        # sind, gelten als verloren und werden sofort (höchstens einmal pro RTT) wiederholt
+        if sacks:
+            highest = max(sacks)
+            for seq, segment in list(state.unacked.items()):
+                later = sum(1 for s in sacks if s > seq)
+                if seq < highest and later >= FAST_RETRANSMIT_SACKS and now - segment.sent_at > (state.srtt or 0):
+                    self._retransmit(addr, state, segment)
+        self._pump(addr, state)
+
+    def _update_rtt(self, state, sample):
+        """
+        @brief Aktualisiert SRTT, RTTVAR und RTO mit einer neuen RTT-Messung (RFC 6298).
+        """
+        if state.srtt is None:
+            state.srtt = sample
+            state.rttvar = sample / 2
+        else:
+            state.rttvar = 0.75 * state.rttvar + 0.25 * abs(state.srtt - sample)
+            state.srtt = 0.875 * state.srtt + 0.125 * sample
+        state.rto = min(max(state.srtt + 4 * state.rttvar, self.min_rto), self.max_rto)
+
+    # --- Empfänger ---
+
+    def on_data(self, addr, epoch, seq, item, binary=False):
+        """
+        @brief Verarbeitet eine empfangene sequenzierte Nachricht (RMSG/RFRAG) und bestätigt sie.
+        @param addr Absender (ip, port)
+        @param epoch Sitzungskennung des Senders
+        @param seq Sequenznummer
+        @param item Nutzdaten der Nachricht (z. B. das geparste Dictionary)
+        @param binary True, um die Bestätigung im Binärformat zu senden
+        @return Liste der jetzt in Reihenfolge auslieferbaren Nachrichten (leer bei Duplikaten/Lücken)
+        """
+        state = self.receivers.get(addr)
+        if state is None or state.epoch != epoch:
+            state = self.receivers[addr] = _RecvState(epoch)
+
+        deliver = []
+        if seq <= state.cum or seq in state.buffer:
+            self.duplicates += 1
+        elif seq <= state.cum + self.max_buffer:
+            state.buffer[seq] = item
+            while state.cum + 1 in state.buffer:
+                state.cum += 1
+                deliver.append(state.buffer.pop(state.cum))
+        # Außerhalb des Puffers: nicht bestätigen, der Sender wiederholt später
+
+        sacks = sorted(state.buffer)[:32]
+        if binary:
+            ack = binary_protocol.encode_ack(epoch, state.cum, sacks)
+        else:
+            ack = protocol.create_ack(epoch, state.cum, sacks).encode()
+        self.send_raw(ack, addr)
+        return deliver
@@ -0,0 +1,137 @@
+"""
+@file shaper.py
+@brief Bandbreitenbegrenzung für Bildübertragungen und Vorrang für Chat-Datagramme.
+@details
+    Bildübertragungen (TCP) laufen in Chunks; vor jedem Chunk wird BandwidthShaper.consume()
+    aufgerufen. Token-Buckets begrenzen die Rate global und pro Peer, sodass eine große
+    Übertragung die Leitung nicht sättigt. consume() gibt den Eventloop in jedem Fall frei,
+    damit eingehende und ausgehende UDP-Nachrichten zwischen zwei Chunks verarbeitet werden.
+
+    Auf dem Übertragungsweg sorgt set_traffic_class() für Vorrang: Der UDP-Socket wird als
+    latenzkritisch (DSCP EF, hohe SO_PRIORITY), TCP-Sockets für Bilder als Massendaten
+    (DSCP CS1, niedrige SO_PRIORITY) markiert, sodass die Sendewarteschlange des Kernels
+    (z. B. pfifo_fast) und Router Chat-Datagramme vor Bilddaten senden.
+"""
+
+import asyncio
+import socket
+from time import monotonic
+
+## Standard-Chunkgröße für Bildübertragungen in Bytes
+CHUNK_SIZE = 64 * 1024
+
+## Verkehrsklassen: (IP-TOS-Byte, SO_PRIORITY)
+TRAFFIC_CLASSES = {
+    "interactive": (0xB8, 6),  # DSCP EF (Expedited Forwarding)
+    "bulk": (0x20, 1),         # DSCP CS1 (Lower Effort / Hintergrund)
+}
+
+
+def set_traffic_class(sock, traffic_class):
+    """
+    @brief Markiert einen Socket als latenzkritisch oder als Massendaten.
+    @param sock socket.socket oder asyncio TransportSocket
+    @param traffic_class "interactive" oder "bulk"
+    @return True, wenn mindestens eine Markierung gesetzt werden konnte
+    """
+    tos, priority = TRAFFIC_CLASSES[traffic_class]
+    applied = False
+    for level, option, value in ((socket.IPPROTO_IP, getattr(socket, "IP_TOS", None), tos),
+                                 (socket.SOL_SOCKET, getattr(socket, "SO_PRIORITY", None), priority)):
+        if option is None:
+            continue
+        try:
+            sock.setsockopt(level, option, value)
+            applied = True
+        except OSError:
+            pass  # Nicht unterstützt oder nicht erlaubt: ohne Markierung weiter
+    return applied
+
+
+class TokenBucket:
+    """
+    @class TokenBucket
+    @brief Token-Bucket in Bytes, der Schulden zulässt (Chunks dürfen größer als der Burst sein).
+    """
+
+    def __init__(self, rate, burst):
+        """
+        @brief Konstruktor des TokenBucket.
+        @param rate Füllrate in Bytes pro Sekunde
+        @param burst Maximale Anzahl angesparter Bytes
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = monotonic()
+
+    def reserve(self, nbytes, now):
+        """
+        @brief Bucht nbytes und liefert die Wartezeit, bis der Saldo wieder ausgeglichen ist.
+        @param nbytes Anzahl Bytes
+        @param now Aktueller Zeitpunkt (time.monotonic())
+        @return Wartezeit in Sekunden (0, wenn genügend Tokens vorhanden waren)
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        self.tokens -= nbytes
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class BandwidthShaper:
+    """
+    @class BandwidthShaper
+    @brief Begrenzt die Datenrate von Übertragungen global und pro Peer.
+    """
+
+    def __init__(self, rate=0, peer_rate=0, burst=None, max_peers=256):
+        """
+        @brief Konstruktor des BandwidthShaper.
+        @param rate Gesamtrate in Bytes pro Sekunde (0 = unbegrenzt)
+        @param peer_rate Rate pro Peer in Bytes pro Sekunde (0 = unbegrenzt)
+        @param burst Burstgröße in Bytes (Standard: 1/10 s der jeweiligen Rate, mindestens ein Chunk)
+        @param max_peers Anzahl Peer-Buckets, ab der unbenutzte entfernt werden
+        """
+        self.rate = rate
+        self.peer_rate = peer_rate
+        self.burst = burst
+        self.max_peers = max_peers
+        self.total = TokenBucket(rate, self._burst(rate)) if rate > 0 else None
+        self.peers = {}  # peer → TokenBucket
+        self.delayed = 0.0  # Summe der Wartezeiten in Sekunden (Statistik)
+
+    def _burst(self, rate):
+        """
+        @brief Burstgröße für eine Rate.
+        """
+        return self.burst or max(CHUNK_SIZE, rate / 10)
+
+    async def consume(self, peer, nbytes):
+        """
+        @brief Wartet, bis nbytes für einen Peer übertragen werden dürfen.
+        @param peer Handle oder Adresse des Partners
+        @param nbytes Größe des nächsten Chunks in Bytes
+        @details Gibt den Eventloop auch ohne Begrenzung frei, damit Chat-Nachrichten
+                 zwischen zwei Chunks verarbeitet werden.
+        """
+        now = monotonic()
+        wait = 0.0
+        if self.total is not None:
+            wait = self.total.reserve(nbytes, now)
+        if self.peer_rate > 0:
+            bucket = self.peers.get(peer)
+            if bucket is None:
+                if len(self.peers) >= self.max_peers:
+                    self._prune(now)
+                bucket = self.peers[peer] = TokenBucket(self.peer_rate, self._burst(self.peer_rate))
+            wait = max(wait, bucket.reserve(nbytes, now))
+        self.delayed += wait
+        await asyncio.sleep(wait)
+
+    def _prune(self, now):
+        """
+        @brief Entfernt Peer-Buckets, die wieder voll sind (also gerade nicht genutzt werden).
+        """
+        for peer in [p for p, b in self.peers.items()
+                     if b.tokens + (now - b.stamp) * b.rate >= b.burst]:
+            del self.peers[peer]
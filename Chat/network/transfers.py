@@ -0,0 +1,237 @@
+"""
+@file transfers.py
+@brief Verwaltung gleichzeitiger Bildübertragungen (IDs, Limits, Prioritäts-Warteschlange, Abbruch).
+@details
+    Jede Übertragung (Senden oder Empfangen) erhält eine eindeutige ID und belegt einen Slot.
+    Die Anzahl aktiver Übertragungen ist global und pro Peer begrenzt. Weitere Übertragungen
+    warten in einer Prioritäts-Warteschlange (kleinere Dateien zuerst, bei Gleichstand in
+    Ankunftsreihenfolge). Laufende und wartende Übertragungen lassen sich auflisten und abbrechen.
+
+    Zusätzlich gilt ein Speicherbudget für die Puffer aller aktiven Übertragungen: Jede Übertragung
+    gibt beim Start an, wie viel Pufferspeicher sie höchstens belegt. Passt sie gerade nicht in das
+    Budget, wartet sie; ist sie größer als das gesamte Budget, wird sie sofort abgelehnt.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+
+## Zustände einer Übertragung
+QUEUED = "wartend"
+ACTIVE = "aktiv"
+DONE = "fertig"
+CANCELLED = "abgebrochen"
+FAILED = "fehlgeschlagen"
+
+
+class TransferRejected(Exception):
+    """
+    @class TransferRejected
+    @brief Die Warteschlange ist voll; die Übertragung wurde nicht angenommen.
+    """
+
+
+class Transfer:
+    """
+    @class Transfer
+    @brief Zustand einer einzelnen Bildübertragung.
+    """
+    __slots__ = ("id", "direction", "peer", "size", "priority", "memory", "transferred", "state",
+                 "created", "started", "task")
+
+    def __init__(self, transfer_id, direction, peer, size, priority, memory=0):
+        """
+        @brief Konstruktor einer Übertragung.
+        @param transfer_id Eindeutige ID
+        @param direction "send" oder "receive"
+        @param peer Handle des Partners
+        @param size Gesamtgröße in Bytes
+        @param priority Priorität (kleiner = früher)
+        @param memory Höchstens belegter Pufferspeicher in Bytes
+        """
+        self.id = transfer_id
+        self.direction = direction
+        self.peer = peer
+        self.size = size
+        self.priority = priority
+        self.memory = memory
+        self.transferred = 0
+        self.state = QUEUED
+        self.created = time.monotonic()
+        self.started = None
+        self.task = None  # Task, die die Übertragung ausführt (für den Abbruch)
+
+    @property
+    def progress(self):
+        """
+        @brief Fortschritt in Prozent (0–100).
+        """
+        return 100.0 * self.transferred / self.size if self.size else 100.0
+
+
+class TransferManager:
+    """
+    @class TransferManager
+    @brief Vergibt Slots für Übertragungen unter Einhaltung globaler und peer-bezogener Limits.
+    """
+
+    def __init__(self, max_active=4, max_per_peer=2, max_queued=32, id_prefix="", memory_budget=0):
+        """
+        @brief Konstruktor des TransferManagers.
+        @param max_active Maximale Anzahl gleichzeitig aktiver Übertragungen
+        @param max_per_peer Maximale Anzahl gleichzeitig aktiver Übertragungen pro Peer
+        @param max_queued Maximale Anzahl wartender Übertragungen (weitere werden abgelehnt)
+        @param id_prefix Präfix der IDs (z. B. pro Worker-Prozess, damit IDs eindeutig bleiben)
+        @param memory_budget Pufferspeicher aller aktiven Übertragungen in Bytes (0 = unbegrenzt)
+        """
+        self.memory_budget = memory_budget
+        self.memory_used = 0  # Summe der Puffer aktiver Übertragungen in Bytes
+        self.max_active = max_active
+        self.max_per_peer = max_per_peer
+        self.max_queued = max_queued
+        self.id_prefix = id_prefix
+        self.ids = itertools.count(1)
+        self.order = itertools.count()  # Ankunftsreihenfolge bei gleicher Priorität
+        self.transfers = {}  # id → Transfer (aktiv oder wartend)
+        self.queue = []  # Heap aus (priority, order, transfer, future)
+        self.active = 0
+        self.active_per_peer = {}
+
+    @asynccontextmanager
+    async def run(self, direction, peer, size, priority=None, memory=0):
+        """
+        @brief Führt eine Übertragung innerhalb eines Slots aus (wartet ggf. in der Warteschlange).
+        @param direction "send" oder "receive"
+        @param peer Handle des Partners
+        @param size Gesamtgröße in Bytes
+        @param priority Priorität (kleiner = früher), Standard: size
+        @param memory Höchstens belegter Pufferspeicher in Bytes (für memory_budget)
+        @return Kontextmanager, der das Transfer-Objekt liefert
+        @throws TransferRejected Wenn die Warteschlange voll ist oder die Übertragung nie ins Speicherbudget passt
+        @throws asyncio.CancelledError Wenn die Übertragung per cancel() abgebrochen wurde
+        """
+        transfer = Transfer(f"{self.id_prefix}{next(self.ids)}", direction, peer, size,
+                            size if priority is None else priority, memory)
+        transfer.task = asyncio.current_task()
+        await self._acquire(transfer)
+        try:
+            yield transfer
+            transfer.state = DONE
+        except asyncio.CancelledError:
+            transfer.state = CANCELLED
+            raise
+        except BaseException:
+            transfer.state = FAILED
+            raise
+        finally:
+            self._release(transfer)
+
+    async def _acquire(self, transfer):
+        """
+        @brief Belegt einen Slot sofort oder reiht die Übertragung in die Warteschlange ein.
+        """
+        if self.memory_budget and transfer.memory > self.memory_budget:
+            raise TransferRejected(f"benötigt {transfer.memory} Bytes Puffer, Speicherbudget {self.memory_budget} Bytes")
+        # Einreihen und verteilen: Wartende, die nur am Limit ihres Peers hängen, blockieren
+        # Übertragungen anderer Peers nicht, die Priorität gilt unter allen startbaren
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (transfer.priority, next(self.order), transfer, future))
+        self.transfers[transfer.id] = transfer
+        self._dispatch()
+        if not future.done() and len(self.queue) > self.max_queued:
+            self._remove_queued(transfer)
+            raise TransferRejected(f"Warteschlange voll ({self.max_queued} Übertragungen)")
+        try:
+            await future
+        except asyncio.CancelledError:
+            if transfer.state == ACTIVE:  # Slot wurde gerade noch zugeteilt
+                self._release(transfer)
+            else:
+                self._remove_queued(transfer)
+            transfer.state = CANCELLED
+            raise
+
+    def _can_start(self, transfer):
+        """
+        @brief Prüft die globalen und peer-bezogenen Limits sowie das Speicherbudget.
+        """
+        return (self.active < self.max_active
+                and self.active_per_peer.get(transfer.peer, 0) < self.max_per_peer
+                and (not self.memory_budget or self.memory_used + transfer.memory <= self.memory_budget))
+
+    def _start(self, transfer):
+        """
+        @brief Markiert eine Übertragung als aktiv und belegt ihren Slot.
+        """
+        transfer.state = ACTIVE
+        transfer.started = time.monotonic()
+        self.transfers[transfer.id] = transfer
+        self.active += 1
+        self.memory_used += transfer.memory
+        self.active_per_peer[transfer.peer] = self.active_per_peer.get(transfer.peer, 0) + 1
+
+    def _release(self, transfer):
+        """
+        @brief Gibt den Slot einer Übertragung frei und startet wartende Übertragungen.
+        """
+        if self.transfers.pop(transfer.id, None) is None:
+            return
+        self.active -= 1
+        self.memory_used -= transfer.memory
+        remaining = self.active_per_peer[transfer.peer] - 1
+        if remaining:
+            self.active_per_peer[transfer.peer] = remaining
+        else:
+            del self.active_per_peer[transfer.peer]
+        self._dispatch()
+
+    def _dispatch(self):
+        """
+        @brief Startet die wartenden Übertragungen mit der höchsten Priorität, für die Slots frei sind.
+        @details Übertragungen von Peers am Limit oder ohne Platz im Speicherbudget werden
+                 übersprungen, behalten aber ihren Platz.
+        """
+        skipped = []
+        while self.queue and self.active < self.max_active:
+            entry = heapq.heappop(self.queue)
+            transfer, future = entry[2], entry[3]
+            if future.done():
+                continue
+            if not self._can_start(transfer):
+                skipped.append(entry)
+                continue
+            self._start(transfer)
+            future.set_result(None)
+        for entry in skipped:
+            heapq.heappush(self.queue, entry)
+
+    def _remove_queued(self, transfer):
+        """
+        @brief Entfernt eine wartende Übertragung aus der Warteschlange.
+        """
+        self.transfers.pop(transfer.id, None)
+        self.queue = [entry for entry in self.queue if entry[2] is not transfer]
+        heapq.heapify(self.queue)
+
+    def cancel(self, transfer_id):
+        """
+        @brief Bricht eine aktive oder wartende Übertragung ab.
+        @param transfer_id ID der Übertragung
+        @return True, wenn die Übertragung gefunden und abgebrochen wurde
+        """
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None or transfer.task is None:
+            return False
+        transfer.task.cancel()
+        return True
+
+    def list(self):
+        """
+        @brief Liefert alle aktiven und wartenden Übertragungen.
+        @return Liste von Transfer-Objekten (aktive zuerst, dann nach Warteposition)
+        """
+        queued = {entry[2].id: position for position, entry in enumerate(sorted(self.queue))}
+        return sorted(self.transfers.values(),
+                      key=lambda t: (t.state != ACTIVE, queued.get(t.id, 0), t.created))
@@ -0,0 +1,266 @@
+"""
+@file workers.py
+@brief Optionaler Mehrprozess-Betrieb für eingehenden UDP/TCP-Verkehr (SO_REUSEPORT).
+@details
+    Der Hauptprozess startet config.workers - 1 zusätzliche Prozesse, die denselben Port mit
+    SO_REUSEPORT binden. Der Kernel verteilt eingehende Datagramme und TCP-Verbindungen anhand
+    der Absenderadresse auf alle Prozesse, sodass Parsen, Reassembly, ACKs und Bildempfang auf
+    mehreren Kernen laufen. Jeder Worker hat einen eigenen Messenger und Eventloop.
+
+    Über eine Pipe pro Worker meldet der Worker Ereignisse an den Hauptprozess (Ausgaben,
+    empfangene Nachrichten und Bilder, Peer-Änderungen, ACKs für vom Hauptprozess gesendete
+    Nachrichten). Der Hauptprozess verteilt Änderungen der Peer-Tabelle an alle Worker.
+    Ereignisse werden pro Eventloop-Durchlauf gebündelt, um IPC-Aufrufe zu sparen.
+"""
+
+import asyncio
+import multiprocessing
+from Chat.common import log
+from Chat.network.events import IMAGE, KNOWNUSERS, MESSAGE, PEER, PROGRESS
+from Chat.network.messenger import Messenger
+
+
+class _Link:
+    """
+    @class _Link
+    @brief Gebündelter Versand von Ereignissen über eine multiprocessing-Pipe.
+    """
+
+    def __init__(self, conn):
+        """
+        @brief Konstruktor des _Link.
+        @param conn Verbindungsende einer multiprocessing.Pipe
+        """
+        self.conn = conn
+        self.pending = []
+
+    def send(self, event):
+        """
+        @brief Reiht ein Ereignis ein; gesendet wird gesammelt am Ende des Eventloop-Durchlaufs.
+        @param event Tupel (art, ...)
+        """
+        if not self.pending:
+            asyncio.get_running_loop().call_soon(self.flush)
+        self.pending.append(event)
+
+    def flush(self):
+        """
+        @brief Sendet alle eingereihten Ereignisse als eine Liste.
+        """
+        events, self.pending = self.pending, []
+        if not events:
+            return
+        try:
+            self.conn.send(events)
+        except (OSError, EOFError):
+            pass  # Gegenseite beendet
+
+
+def _listen(conn, handler):
+    """
+    @brief Ruft handler für jedes über conn empfangene Ereignis auf (im Eventloop, ohne Thread).
+    @param conn Verbindungsende einer multiprocessing.Pipe
+    @param handler Funktion (event); bei geschlossener Pipe wird ("closed",) übergeben
+    """
+    loop = asyncio.get_running_loop()
+
+    def on_readable():
+        try:
+            while conn.poll():
+                for event in conn.recv():
+                    handler(event)
+        except (OSError, EOFError):
+            loop.remove_reader(conn.fileno())
+            handler(("closed",))
+
+    loop.add_reader(conn.fileno(), on_readable)
+
+
+def _apply_peer_event(messenger, kind, handle, value):
+    """
+    @brief Übernimmt eine Änderung der Peer-Tabelle, ohne sie erneut zu melden.
+    """
+    if kind == "join":
+        messenger.add_peer(handle, tuple(value), notify=False)
+    elif kind == "leave":
+        messenger.remove_peer(handle, notify=False)
+    elif kind == "caps":
+        messenger.set_peer_caps(handle, value, notify=False)
+
+
+class WorkerPool:
+    """
+    @class WorkerPool
+    @brief Startet und verwaltet Worker-Prozesse, die den Port des Messengers mitbenutzen.
+    """
+
+    def __init__(self, messenger, count):
+        """
+        @brief Konstruktor des WorkerPool.
+        @param messenger Messenger des Hauptprozesses (Ausgaben, Ereignisse, Peer-Tabelle)
+        @param count Anzahl zusätzlicher Worker-Prozesse
+        """
+        self.messenger = messenger
+        self.count = count
+        self.links = []
+        self.processes = []
+
+    def start(self):
+        """
+        @brief Startet die Worker-Prozesse und übergibt ihnen die aktuelle Peer-Tabelle.
+        @return True, wenn Worker gestartet wurden, False ohne SO_REUSEPORT-Unterstützung
+        """
+        if not self.messenger.reuse_port:
+            self.messenger.output("[Warnung] SO_REUSEPORT nicht verfügbar, Worker-Modus deaktiviert")
+            return False
+
+        ctx = multiprocessing.get_context("spawn")  # Kein fork eines laufenden Eventloops
+        snapshot = ("peers", dict(self.messenger.peers),
+                    {h: sorted(c) for h, c in self.messenger.peer_caps.items()})
+        for index in range(self.count):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_worker_main, args=(self.messenger.config, child_conn, index + 1),
+                                  name=f"slcp-worker-{index + 1}", daemon=True)
+            process.start()
+            child_conn.close()
+            link = _Link(parent_conn)
+            link.send(snapshot)
+            _listen(parent_conn, lambda event, link=link: self._on_event(link, event))
+            self.links.append(link)
+            self.processes.append(process)
+
+        # Ohne Warteschlange, damit Worker Peer-Änderungen in derselben Reihenfolge wie der Hauptprozess sehen
+        self.messenger.events.subscribe(PEER, self._on_peer_change, maxsize=0)
+        self.messenger.output(f"[Workers] {self.count} zusätzliche Prozesse auf Port {self.messenger.config.port}")
+        return True
+
+    def _on_peer_change(self, kind, handle, value):
+        """
+        @brief Verteilt eine Änderung der Peer-Tabelle an alle Worker.
+        """
+        for link in self.links:
+            link.send(("peer", kind, handle, value))
+
+    def _on_event(self, link, event):
+        """
+        @brief Verarbeitet ein Ereignis eines Workers im Hauptprozess.
+        @param link Verbindung zum meldenden Worker
+        @param event Tupel (art, ...)
+        """
+        messenger = self.messenger
+        kind = event[0]
+        if kind == "output":
+            messenger.output(event[1])
+        elif kind == "message":
+            if messenger.events.has_subscribers(MESSAGE):
+                messenger.events.publish(MESSAGE, event[1], event[2], tuple(event[3]))
+            else:
+                messenger.output(f"💬 Nachricht von {event[1]}: {event[2]}")
+        elif kind in (IMAGE, KNOWNUSERS):
+            messenger.events.publish(kind, *event[1:])
+        elif kind == "progress":
+            messenger.events.publish(PROGRESS, *event[1])
+        elif kind == "peer":
+            # Über die Messenger-Methoden, damit die Änderung an alle Worker weitergegeben wird
+            if event[1] == "join":
+                messenger.add_peer(event[2], tuple(event[3]))
+            elif event[1] == "leave":
+                messenger.remove_peer(event[2])
+            elif event[1] == "caps":
+                messenger.set_peer_caps(event[2], event[3])
+        elif kind == "ack":
+            if messenger.reliable is not None:
+                messenger.reliable.on_ack(*event[1:])
+        elif kind == "closed":
+            if link in self.links:
+                self.links.remove(link)
+                messenger.output("[Workers] Ein Worker-Prozess wurde beendet")
+
+    async def stop(self, timeout=2.0):
+        """
+        @brief Beendet alle Worker-Prozesse (erst geordnet, nach timeout Sekunden hart).
+        @param timeout Wartezeit pro Prozess in Sekunden
+        """
+        for link in self.links:
+            link.send(("stop",))
+            link.flush()
+        for process in self.processes:
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                process.terminate()
+        self.links.clear()
+        self.processes.clear()
+
+
+def _worker_main(config, conn, number):
+    """
+    @brief Einstiegspunkt eines Worker-Prozesses.
+    @param config Konfiguration des Hauptprozesses
+    @param conn Verbindungsende zur Pipe des Hauptprozesses
+    @param number Nummer des Workers (ab 1)
+    """
+    try:
+        asyncio.run(_run_worker(config, conn, number))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _run_worker(config, conn, number):
+    """
+    @brief Betreibt einen Messenger ohne Benutzeroberfläche und meldet alle Ereignisse weiter.
+    @param config Konfiguration des Hauptprozesses
+    @param conn Verbindungsende zur Pipe des Hauptprozesses
+    @param number Nummer des Workers (ab 1)
+    """
+    log.configure(config.log_level, config.log_file)
+    if config.capture_file:
+        config.capture_file = f"{config.capture_file}.w{number}"  # Eigene Datei pro Prozess
+    link = _Link(conn)
+    stopped = asyncio.get_running_loop().create_future()
+    messenger = Messenger(config)
+    messenger.peer_cache = None  # Den Peer-Cache schreibt nur der Hauptprozess
+    messenger.transfers.id_prefix = f"w{number}-"  # Transfer-IDs (und Dateinamen) prozessübergreifend eindeutig
+    messenger.output = lambda text: link.send(("output", text))
+
+    # Ereignisse ohne Warteschlange an den Hauptprozess weiterleiten (link.send wartet nicht)
+    events = messenger.events
+    events.subscribe(MESSAGE, lambda sender, message, address: link.send(("message", sender, message, address)),
+                     maxsize=0)
+    events.subscribe(KNOWNUSERS, lambda users: link.send(("knownusers", users)), maxsize=0)
+    events.subscribe(IMAGE, lambda handle, filename: link.send(("image", handle, filename)), maxsize=0)
+    events.subscribe(PROGRESS, lambda *args: link.send(("progress", args)), maxsize=0)
+    events.subscribe(PEER, lambda kind, handle, value: link.send(("peer", kind, handle, value)), maxsize=0)
+
+    if messenger.reliable is not None:
+        # ACKs für Nachrichten des Hauptprozesses (andere epoch) landen je nach Absender hier
+        own_on_ack = messenger.reliable.on_ack
+
+        def on_ack(addr, epoch, cum, sacks):
+            if epoch == messenger.reliable.epoch:
+                own_on_ack(addr, epoch, cum, sacks)
+            else:
+                link.send(("ack", addr, epoch, cum, sacks))
+
+        messenger.reliable.on_ack = on_ack
+
+    def on_event(event):
+        if event[0] == "peers":
+            for handle, address in event[1].items():
+                messenger.add_peer(handle, tuple(address), notify=False)
+            for handle, caps in event[2].items():
+                messenger.set_peer_caps(handle, caps, notify=False)
+        elif event[0] == "peer":
+            _apply_peer_event(messenger, *event[1:])
+        elif event[0] in ("stop", "closed") and not stopped.done():
+            stopped.set_result(None)
+
+    _listen(conn, on_event)
+    await messenger.start_listener(join=False)
+    await stopped
+    if messenger.transport is not None:
+        messenger.transport.close()
+    if messenger.loop_monitor is not None:
+        messenger.loop_monitor.stop()
+    if messenger.capture is not None:
+        messenger.capture.close()
+    messenger.io.shutdown()
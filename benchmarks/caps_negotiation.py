@@ -0,0 +1,141 @@
+"""
+@file caps_negotiation.py
+@brief Loopback-Prüfung der CAPS-Aushandlung im Standardbetrieb (Discovery-Dienst, kein Gossip).
+
+Ein Discovery-Dienst läuft auf dem whoisport, dazu die Messenger Bob (wire_format = "binary")
+und Carol (Text). Alice (binary) fragt per WHO und lernt beide nur über KNOWNUSERS; JOIN und
+Broadcasts erreichen die Messenger nie. Geprüft wird:
+- Alice und Bob verwenden danach gegenseitig das Binärformat (CAPS per Unicast und Antwort),
+- mit Carol bleibt es beim Text,
+- Nachrichten von Alice kommen bei Bob (binär) und Carol (Text) an.
+
+Aufruf: `python -m benchmarks.caps_negotiation`
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import toml
+from Chat.common import binary_protocol
+from Chat.config.config import Config
+from Chat.discovery.discovery_service import DiscoveryService
+from Chat.network.events import MESSAGE
+from Chat.network.messenger import Messenger
+
+WHOIS_PORT = 4000
+PORTS = {"Alice": 6731, "Bob": 6732, "Carol": 6733}
+
+
+def make_config(workdir, handle, wire_format):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration für den Test.
+    """
+    overrides = {"handle": handle, "port": PORTS[handle], "whoisport": WHOIS_PORT, "peer_cache": "",
+                 "imagepath": os.path.join(workdir, f"img_{handle}"), "loop_monitor": False,
+                 "wire_format": wire_format}
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+async def wait_until(condition, timeout):
+    """
+    @brief Wartet, bis condition() wahr ist.
+    @return True, wenn die Bedingung vor Ablauf von timeout eintrat
+    """
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def negotiate(workdir, timeout):
+    """
+    @brief Startet Bob, Carol und Alice und prüft die Aushandlung.
+    @return Liste von Fehlermeldungen (leer bei Erfolg)
+    """
+    messengers = {}
+    received = {}  # handle → Liste von (Nachricht, binär empfangen)
+    for handle, wire_format in (("Bob", "binary"), ("Carol", "text"), ("Alice", "binary")):
+        messenger = Messenger(make_config(workdir, handle, wire_format))
+        messenger.output = lambda text: None
+        received[handle] = []
+        frames = []
+
+        def on_datagram(data, addr, original=messenger.datagram_received, frames=frames):
+            frames.append(binary_protocol.is_binary(data))
+            original(data, addr)
+
+        def on_message(sender, message, address, handle=handle, frames=frames):
+            received[handle].append((message, bool(frames) and frames[-1]))
+
+        messenger.datagram_received = on_datagram
+        messenger.events.subscribe(MESSAGE, on_message, maxsize=0)
+        await messenger.start_listener(join=False)
+        messengers[handle] = messenger
+    alice, bob, carol = messengers["Alice"], messengers["Bob"], messengers["Carol"]
+
+    errors = []
+    await carol.send_join()  # Nur der Discovery-Dienst lernt Carol
+    await asyncio.sleep(0.2)
+    await alice.send_who()
+    if not await wait_until(lambda: alice.use_binary("Bob") and bob.use_binary("Alice"), timeout):
+        errors.append(f"Binärformat nicht ausgehandelt (Alice→Bob {alice.use_binary('Bob')}, "
+                      f"Bob→Alice {bob.use_binary('Alice')}, Peers von Alice: {sorted(alice.peers)})")
+    print(f"Alice → Bob:   {'binär' if alice.use_binary('Bob') else 'Text'}")
+    print(f"Bob → Alice:   {'binär' if bob.use_binary('Alice') else 'Text'}")
+    print(f"Alice → Carol: {'binär' if alice.use_binary('Carol') else 'Text'}")
+    if alice.use_binary("Carol"):
+        errors.append("Binärformat mit Carol (Text) verwendet")
+
+    for handle in ("Bob", "Carol"):
+        if handle in alice.peers:
+            await alice.send_message(handle, f"Hallo {handle}")
+    await wait_until(lambda: received["Bob"] and received["Carol"], timeout)
+    expected = {"Bob": True, "Carol": False}
+    for handle, binary in expected.items():
+        if not received[handle]:
+            errors.append(f"Nachricht an {handle} nicht angekommen")
+        elif received[handle][0][1] != binary:
+            errors.append(f"Nachricht an {handle} {'binär' if received[handle][0][1] else 'als Text'} empfangen")
+
+    for messenger in messengers.values():
+        messenger.transport.close()
+        messenger.io.shutdown()
+    return errors
+
+
+def main(argv=None):
+    """
+    @brief Startet den Discovery-Dienst und führt die Prüfung aus.
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0 bei erfolgreicher Aushandlung, sonst 1
+    """
+    parser = argparse.ArgumentParser(description="CAPS-Aushandlung über den Discovery-Dienst")
+    parser.add_argument("--timeout", type=float, default=3.0, help="Wartezeit pro Schritt in Sekunden")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "discovery.toml")
+        with open(path, "w") as f:
+            toml.dump({"handle": "Bob", "port": PORTS["Bob"], "whoisport": WHOIS_PORT}, f)
+        discovery = DiscoveryService(path)
+        discovery.start(who=False, join=False)
+        try:
+            errors = asyncio.run(negotiate(workdir, args.timeout))
+        finally:
+            discovery.running = False
+            discovery.sock.close()
+
+    for error in errors:
+        print(f"FEHLER: {error}")
+    if not errors:
+        print("OK: CAPS per Unicast ausgehandelt, Text-Peers erhalten weiter Text")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
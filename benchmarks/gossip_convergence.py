@@ -0,0 +1,216 @@
+"""
+@file gossip_convergence.py
+@brief Loopback-Simulation der Gossip-Discovery: Runden bis zur vollständigen Peer-Tabelle.
+
+N Messenger laufen in einem Prozess auf aufeinanderfolgenden Ports (discovery_mode = "gossip").
+Alle kennen nur Knoten 0 als Seed. Gemessen wird, bis jeder Knoten alle N-1 anderen kennt:
+- Zeit und mittlere Anzahl Runden pro Knoten (zum Vergleich: log2(N)),
+- gesendete GOSSIP-Nachrichten und MEMBERS-Seiten pro Knoten.
+Anschließend meldet sich ein Knoten per LEAVE ab; geprüft wird, dass er aus allen Tabellen
+verschwindet und durch ältere Tabellen nicht zurückkehrt.
+
+Zuletzt die Prüfung gefälschter Absender: Ein Knoten mit --spoof-peers Peers erhält von einem
+einfachen Socket (dem "Opfer", dessen Adresse ein Angreifer fälschen würde) ein und danach ein
+zweites GOSSIP. Beide Antworten müssen unter gossip_unverified_bytes bleiben, und das Opfer darf
+weder Peer noch Gossip-Partner werden. Erst das Echo des Cookies (Roundtrip) trägt es ein.
+
+Alle Knoten teilen eine Ereignisschleife; bei vielen Knoten (ab etwa 200) das Intervall
+entsprechend erhöhen (z. B. --interval 1), sonst misst die Simulation die CPU statt der Runden.
+
+Aufruf: `python -m benchmarks.gossip_convergence [--nodes 64] [--interval 0.1] [--fanout 3]`
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import socket
+import time
+from Chat.common import protocol
+from Chat.config.config import Config
+from Chat.network.messenger import Messenger
+
+BASE_PORT = 6700
+
+
+def make_config(workdir, index, args):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration für Knoten index.
+    """
+    overrides = {"handle": f"node{index}", "port": BASE_PORT + index, "whoisport": 4000,
+                 "peer_cache": "", "loop_monitor": False, "imagepath": os.path.join(workdir, "img"),
+                 "discovery_mode": "gossip", "gossip_seeds": [f"127.0.0.1:{BASE_PORT}"],
+                 "gossip_interval": args.interval, "gossip_fanout": args.fanout,
+                 # Alle Knoten teilen 127.0.0.1, die Ratenbegrenzung pro Absender-IP wäre sofort erschöpft
+                 "rate_limits": {name: [0, 1] for name in ("join", "knownusers", "gossip", "gossip_total",
+                                                           "msg", "who")}}
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+async def wait_until(condition, timeout):
+    """
+    @brief Wartet, bis condition() wahr ist.
+    @return Verstrichene Zeit in Sekunden oder None bei Zeitüberschreitung
+    """
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > timeout:
+            return None
+        await asyncio.sleep(0.005)
+    return time.perf_counter() - started
+
+
+async def simulate(args):
+    """
+    @brief Startet die Knoten, misst die Konvergenz und prüft das Abmelden.
+    @return True, wenn Konvergenz und Abmeldung erfolgreich waren
+    """
+    n = args.nodes
+    with tempfile.TemporaryDirectory() as workdir:
+        nodes = []
+        for index in range(n):
+            messenger = Messenger(make_config(workdir, index, args))
+            messenger.output = lambda text: None
+            await messenger.start_listener(join=False)
+            nodes.append(messenger)
+
+        for messenger in nodes:
+            messenger.gossip.start()
+        elapsed = await wait_until(lambda: all(len(m.peers) == n - 1 for m in nodes), args.timeout)
+
+        rounds = sum(m.gossip.rounds for m in nodes) / n
+        gossip_sent = sum(m.gossip.sent for m in nodes) / n
+        members_sent = sum(m.gossip.members_sent for m in nodes) / n
+        if elapsed is None:
+            known = sum(len(m.peers) for m in nodes) / n
+            print(f"Keine Konvergenz nach {args.timeout:.0f} s: im Mittel {known:.1f}/{n - 1} Peers bekannt")
+        else:
+            print(f"Konvergenz:     {n} Knoten in {elapsed * 1000:.0f} ms, "
+                  f"{rounds:.1f} Runden pro Knoten (log2(N) = {math.log2(n):.1f}, "
+                  f"Intervall {args.interval} s, Fanout {args.fanout})")
+            print(f"Nachrichten:    {gossip_sent:.1f} GOSSIP und {members_sent:.1f} MEMBERS-Seiten pro Knoten")
+
+        left = None
+        if elapsed is not None:
+            leaving = nodes.pop()
+            leaving.gossip.stop()
+            await leaving.send_leave()
+            handle = leaving.config.handle
+            left = await wait_until(lambda: all(handle not in m.peers for m in nodes), args.timeout)
+            await asyncio.sleep(args.interval * 10)  # Weitere Runden: kehrt der Knoten zurück?
+            returned = sum(handle in m.peers for m in nodes)
+            if left is None:
+                print(f"Abmeldung:      {handle} nicht aus allen Tabellen entfernt")
+            else:
+                print(f"Abmeldung:      {handle} nach {left * 1000:.0f} ms aus allen Tabellen entfernt, "
+                      f"nach 10 weiteren Intervallen wieder in {returned} Tabellen")
+            left = left if returned == 0 else None
+            leaving.transport.close()
+            leaving.io.shutdown()
+
+        for messenger in nodes:
+            messenger.gossip.stop()
+            messenger.transport.close()
+            messenger.io.shutdown()
+        return elapsed is not None and left is not None
+
+
+def receive_all(sock):
+    """
+    @brief Liest alle bereits empfangenen Datagramme eines nicht blockierenden Sockets.
+    @return Liste der Datagramme (bytes)
+    """
+    datagrams = []
+    try:
+        while True:
+            datagrams.append(sock.recv(65535))
+    except BlockingIOError:
+        pass
+    return datagrams
+
+
+async def check_spoofing(args):
+    """
+    @brief Prüft, dass ein oder zwei GOSSIP mit fremder Absenderadresse kaum Verstärkung erzielen
+           und den Absender nicht eintragen.
+    @return True, wenn alle Prüfungen erfolgreich waren
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        messenger = Messenger(make_config(workdir, args.nodes, args))
+        messenger.output = lambda text: None
+        await messenger.start_listener(join=False)
+        for i in range(args.spoof_peers):
+            messenger.add_peer(f"peer{i}", (f"10.0.{i // 250}.{i % 250 + 1}", 5000))
+        target = ("127.0.0.1", messenger.config.port)
+        limit = messenger.gossip.unverified_bytes + 512  # MEMBERS-Seiten plus eine GOSSIP-Zeile
+
+        victim = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        victim.bind(("127.0.0.1", 0))
+        victim.setblocking(False)
+        victim_addr = victim.getsockname()
+        request = protocol.create_gossip("victim", victim_addr[1], "0" * 16).encode()
+        errors = []
+        cookie = None
+        with victim:
+            for packet in (1, 2):
+                victim.sendto(request, target)
+                await asyncio.sleep(0.2)
+                replies = receive_all(victim)
+                size = sum(len(data) for data in replies)
+                print(f"Gefälscht {packet}:    {len(request)} Bytes → {size} Bytes Antwort "
+                      f"(Faktor {size / len(request):.0f}, Grenze {limit})")
+                if size > limit:
+                    errors.append(f"Antwort auf GOSSIP {packet} mit {size} Bytes über {limit}")
+                for data in replies:
+                    parsed = protocol.parse_slcp(data.decode())
+                    if parsed and parsed["type"] == "GOSSIP" and parsed["cookie"]:
+                        cookie = parsed["cookie"]
+            if "victim" in messenger.peers or victim_addr in messenger.gossip.candidates():
+                errors.append("Opfer nach gefälschten GOSSIP als Peer eingetragen")
+
+            bad = protocol.create_gossip("victim", victim_addr[1], "0" * 16, cookie="0" * 16, echo=True)
+            victim.sendto(bad.encode(), target)
+            await asyncio.sleep(0.2)
+            receive_all(victim)
+            if "victim" in messenger.peers:
+                errors.append("Echo mit falschem Cookie akzeptiert")
+            if cookie is None:
+                errors.append("Kein Cookie in der Antwort")
+            else:
+                echo = protocol.create_gossip("victim", victim_addr[1], "0" * 16, cookie=cookie, echo=True)
+                victim.sendto(echo.encode(), target)
+                await asyncio.sleep(0.2)
+                size = sum(len(data) for data in receive_all(victim))
+                print(f"Roundtrip:      Echo des Cookies → eingetragen: {'victim' in messenger.peers}, "
+                      f"volle Tabelle {size} Bytes")
+                if "victim" not in messenger.peers:
+                    errors.append("Absender trotz Echo des Cookies nicht eingetragen")
+        messenger.transport.close()
+        messenger.io.shutdown()
+    for error in errors:
+        print(f"FEHLER: {error}")
+    return not errors
+
+
+def main(argv=None):
+    """
+    @brief Führt die Simulation aus.
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0 bei Konvergenz, erfolgreicher Abmeldung und bestandener Prüfung gefälschter Absender, sonst 1
+    """
+    parser = argparse.ArgumentParser(description="Konvergenz der Gossip-Discovery auf Loopback")
+    parser.add_argument("--nodes", type=int, default=64, help="Anzahl Knoten")
+    parser.add_argument("--interval", type=float, default=0.1, help="Gossip-Intervall in Sekunden")
+    parser.add_argument("--fanout", type=int, default=3, help="Gossip-Partner pro Runde")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Abbruch nach Sekunden")
+    parser.add_argument("--spoof-peers", type=int, default=3000,
+                        help="Größe der Peer-Tabelle bei der Prüfung gefälschter Absender")
+    args = parser.parse_args(argv)
+    converged = asyncio.run(simulate(args))
+    return 0 if asyncio.run(check_spoofing(args)) and converged else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
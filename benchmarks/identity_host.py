@@ -0,0 +1,133 @@
+"""
+@file identity_host.py
+@brief Vergleicht den Speicherbedarf vieler Handles in einem IdentityHost mit vollständigen Clients.
+
+Gemessen werden:
+- ein vollständiger Client (Config, Messenger, UDP-Socket, TCP-Server) in einem eigenen Prozess:
+  RSS des Prozesses und per tracemalloc belegter Speicher,
+- ein IdentityHost mit n Handles (je ein eigener Ereignisbus mit Abonnent): Zuwachs pro Handle,
+- die Zustellung: ein Sender schickt jedem Handle eine Nachricht über den gemeinsamen Port.
+
+Aufruf: `python -m benchmarks.identity_host [--count 200]`
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from Chat.config.config import Config
+from Chat.network.events import MESSAGE
+from Chat.network.host import IdentityHost
+from Chat.network.memory import rss_bytes
+from Chat.network.messenger import Messenger
+
+HOST_PORT = 6641
+SENDER_PORT = 6642
+CLIENT_PORT = 6643
+
+
+def make_config(workdir, handle, port):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration für den Test.
+    """
+    overrides = {"handle": handle, "port": port, "whoisport": 4000, "peer_cache": "",
+                 "imagepath": os.path.join(workdir, "img"), "loop_monitor": False,
+                 "rate_limits": {"msg": [0, 1]}}
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+def measure_client(workdir, result):
+    """
+    @brief Prozess: startet einen vollständigen Client und meldet RSS und tracemalloc-Zuwachs.
+    """
+    async def run():
+        before = tracemalloc.get_traced_memory()[0]
+        messenger = Messenger(make_config(workdir, "Client", CLIENT_PORT))
+        messenger.output = lambda text: None
+        messenger.events.subscribe(MESSAGE, lambda sender, message, address: None)
+        await messenger.start_listener(join=False)
+        await asyncio.sleep(0.2)
+        traced = tracemalloc.get_traced_memory()[0] - before
+        result.put((rss_bytes()[0], traced))
+        messenger.transport.close()
+        messenger.io.shutdown()
+
+    tracemalloc.start()
+    asyncio.run(run())
+
+
+async def measure_host(workdir, count):
+    """
+    @brief Misst den Zuwachs pro Handle und die Zustellung an alle Handles.
+    @return (Bytes pro Handle laut tracemalloc, RSS-Zuwachs pro Handle, Zustelldauer, zugestellt)
+    """
+    host = IdentityHost(make_config(workdir, "bot1", HOST_PORT))
+    host.output = lambda text: None
+    received = []
+
+    tracemalloc.start()
+    rss_before = rss_bytes()[0]
+    traced_before = tracemalloc.get_traced_memory()[0]
+    for n in range(1, count + 1):
+        identity = host.add_identity(f"bot{n}")
+        identity.events.subscribe(MESSAGE, lambda sender, message, address, handle=identity.handle: received.append(handle))
+    traced = (tracemalloc.get_traced_memory()[0] - traced_before) / count
+    rss = ((rss_bytes()[0] or 0) - (rss_before or 0)) / count
+    tracemalloc.stop()
+    await host.start_listener(join=False)
+
+    sender = Messenger(make_config(workdir, "Sender", SENDER_PORT))
+    sender.output = lambda text: None
+    await sender.start_listener(join=False)
+    for handle in host.identities:
+        sender.add_peer(handle, ("127.0.0.1", HOST_PORT))
+    started = time.perf_counter()
+    for index, handle in enumerate(host.identities):
+        await sender.send_message(handle, "ping")
+        if index % 64 == 63:
+            await asyncio.sleep(0)
+    while len(received) < count and time.perf_counter() - started < 10:
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - started
+
+    for messenger in (sender, host):
+        messenger.transport.close()
+        messenger.io.shutdown()
+    return traced, rss, elapsed, len(set(received))
+
+
+def main(argv=None):
+    """
+    @brief Führt die Messungen aus und gibt das Ergebnis aus.
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0 bei vollständiger Zustellung, sonst 1
+    """
+    parser = argparse.ArgumentParser(description="Speicherbedarf: IdentityHost vs. vollständige Clients")
+    parser.add_argument("--count", type=int, default=200, help="Anzahl Handles im Host")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        result = multiprocessing.Queue()
+        process = multiprocessing.Process(target=measure_client, args=(workdir, result))
+        process.start()
+        client_rss, client_traced = result.get(timeout=30)
+        process.join()
+        traced, rss, elapsed, delivered = asyncio.run(measure_host(workdir, args.count))
+
+    print(f"Vollständiger Client: {client_rss / 2**20:.1f} MiB RSS pro Prozess, "
+          f"{client_traced / 1024:.1f} KiB Python-Objekte (ohne Discovery-Thread)")
+    print(f"IdentityHost:         {traced / 1024:.2f} KiB pro Handle (tracemalloc), "
+          f"{rss / 1024:.2f} KiB RSS-Zuwachs pro Handle")
+    print(f"Verhältnis:           {traced / client_traced * 100:.2f} % der Python-Objekte, "
+          f"{max(rss, 0) / client_rss * 100:.3f} % des RSS eines Client-Prozesses")
+    print(f"Zustellung:           {delivered}/{args.count} Handles in {elapsed * 1000:.1f} ms "
+          f"über einen gemeinsamen Port")
+    return 0 if delivered == args.count else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+@file loop_latency.py
+@brief Loopback-Test: Lag des Eventloops beim Empfänger während einer großen Bildübertragung.
+
+Ein Empfänger (eigener Prozess) misst mit einem Heartbeat alle --tick-ms, wie verspätet sein
+Eventloop aufwacht, solange ein großes Bild empfangen, geschrieben und (je nach --fsync)
+synchronisiert wird. Da Schreiben und fsync im I/O-Pool laufen, sollte der Lag im Bereich
+weniger Millisekunden bleiben. Rückgabewert 1, wenn das Maximum über --max-lag-ms liegt oder
+die Übertragung fehlschlägt.
+
+Aufruf: `python -m benchmarks.loop_latency [--size-mb 512] [--fsync always] [--max-lag-ms 50]`
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from Chat.config.config import Config
+from Chat.network.events import IMAGE
+from Chat.network.messenger import Messenger
+
+SENDER_PORT = 6671
+RECEIVER_PORT = 6672
+
+MIB = 1024 * 1024
+
+
+def make_config(workdir, handle, port, args):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration für den Test.
+    """
+    overrides = {"handle": handle, "port": port, "whoisport": 4000, "peer_cache": "",
+                 "imagepath": os.path.join(workdir, f"img_{handle}"), "loop_monitor": False,
+                 "fsync": args.fsync}
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+def run_receiver(workdir, args, conn):
+    """
+    @brief Prozess des Empfängers: misst den Lag bis zum ersten empfangenen Bild und meldet ihn über conn.
+    """
+    async def receive():
+        messenger = Messenger(make_config(workdir, "Receiver", RECEIVER_PORT, args))
+        messenger.output = lambda text: None
+        received = asyncio.Event()
+        lags = []
+        files = []
+
+        def on_image(handle, filename):
+            files.append(filename)  # Gelöscht wird erst nach der Messung (blockiert sonst den Loop)
+            received.set()
+
+        async def heartbeat():
+            tick = args.tick_ms / 1000
+            while True:
+                due = time.perf_counter() + tick
+                await asyncio.sleep(tick)
+                lags.append(time.perf_counter() - due)
+
+        messenger.events.subscribe(IMAGE, on_image, maxsize=0)
+        await messenger.start_listener(join=False)
+        task = asyncio.create_task(heartbeat())
+        conn.send("ready")
+        try:
+            await asyncio.wait_for(received.wait(), args.timeout)
+        except asyncio.TimeoutError:
+            pass
+        task.cancel()
+        for filename in files:
+            os.remove(filename)
+        messenger.transport.close()
+        messenger.io.shutdown()
+        conn.send((received.is_set(), lags))
+
+    asyncio.run(receive())
+
+
+async def send(workdir, args):
+    """
+    @brief Überträgt die Testdatei an den Empfänger.
+    @return (Erfolg, Dauer in Sekunden)
+    """
+    path = os.path.join(workdir, "large.png")
+    block = os.urandom(MIB)
+    with open(path, "wb") as f:
+        for _ in range(args.size_mb):
+            f.write(block)
+    messenger = Messenger(make_config(workdir, "Sender", SENDER_PORT, args))
+    messenger.output = lambda text: None
+    messenger.peers["Receiver"] = ("127.0.0.1", RECEIVER_PORT)
+    await messenger.start_listener(join=False)
+    started = time.perf_counter()
+    ok = await messenger.send_image("Receiver", path)
+    elapsed = time.perf_counter() - started
+    messenger.transport.close()
+    messenger.io.shutdown()
+    return ok, elapsed
+
+
+def main(argv=None):
+    """
+    @brief Startet den Empfänger, überträgt das Bild und prüft den gemessenen Lag.
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0, wenn die Übertragung gelang und der Lag unter --max-lag-ms blieb, sonst 1
+    """
+    parser = argparse.ArgumentParser(description="Eventloop-Lag beim Empfang eines großen Bildes")
+    parser.add_argument("--size-mb", type=int, default=512, help="Größe des Bildes in MiB")
+    parser.add_argument("--fsync", default="always", help="fsync-Strategie des Empfängers (none, close, always)")
+    parser.add_argument("--tick-ms", type=float, default=5, help="Abstand der Heartbeats in Millisekunden")
+    parser.add_argument("--max-lag-ms", type=float, default=50, help="Erlaubter maximaler Lag in Millisekunden")
+    parser.add_argument("--timeout", type=float, default=300, help="Abbruch nach Sekunden")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        conn, child = multiprocessing.Pipe()
+        receiver = multiprocessing.Process(target=run_receiver, args=(workdir, args, child), daemon=True)
+        receiver.start()
+        try:
+            if not conn.poll(30) or conn.recv() != "ready":
+                raise RuntimeError("Empfänger nicht gestartet")
+            sent, elapsed = asyncio.run(send(workdir, args))
+            if not conn.poll(args.timeout):
+                raise RuntimeError("Empfänger antwortet nicht")
+            received, lags = conn.recv()
+            receiver.join(5)
+        finally:
+            receiver.terminate()
+
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99)] * 1000 if lags else 0.0
+    worst = lags[-1] * 1000 if lags else 0.0
+    print(f"{args.size_mb} MiB in {elapsed:.2f} s ({args.size_mb / elapsed:.0f} MiB/s), fsync = {args.fsync}")
+    print(f"Lag des Empfängers: p99 {p99:.1f} ms, max {worst:.1f} ms ({len(lags)} Heartbeats)")
+    errors = []
+    if not (sent and received):
+        errors.append("Übertragung fehlgeschlagen")
+    if worst > args.max_lag_ms:
+        errors.append(f"maximaler Lag {worst:.1f} ms über {args.max_lag_ms:.0f} ms")
+    for error in errors:
+        print(f"FEHLER: {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+@file msg_latency.py
+@brief Loopback-Test: Latenz von Chatnachrichten während einer großen Bildübertragung.
+
+Ein Echo-Peer (eigener Prozess) schickt jede empfangene MSG sofort zurück. Der Sender misst die
+Umlaufzeit seiner MSG-Pings, zuerst ohne und dann während eines Bild-Uploads zum Echo-Peer.
+Mit --max-p99 wird das Ergebnis geprüft (Rückgabewert 1, wenn das 99. Perzentil darüber liegt).
+
+Aufruf: `python -m benchmarks.msg_latency [--size-mb 200] [--limit 50000000] [--max-p99 20]`
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from Chat.config.config import Config
+from Chat.network.events import MESSAGE
+from Chat.network.messenger import Messenger
+
+SENDER_PORT = 6601
+ECHO_PORT = 6602
+
+
+def make_config(workdir, handle, port, args):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration für den Test.
+
+    @param workdir Arbeitsverzeichnis (Bilder, Konfigurationsdatei)
+    @param handle Benutzername
+    @param port UDP/TCP-Port
+    @param args Kommandozeilenargumente (Bandbreitenlimits)
+    @return Config-Objekt
+    """
+    overrides = {
+        "handle": handle, "port": port, "whoisport": 4000,
+        "imagepath": os.path.join(workdir, f"img_{handle}"),
+        "bandwidth_limit": args.limit, "bandwidth_peer_limit": args.peer_limit,
+    }
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+def run_echo(workdir, args):
+    """
+    @brief Prozess des Echo-Peers: schickt jede Nachricht an den Sender zurück.
+    """
+    async def echo():
+        messenger = Messenger(make_config(workdir, "Echo", ECHO_PORT, args))
+        messenger.output = lambda text: None
+
+        def on_message(sender, message, address):
+            messenger._send_raw(f'MSG Sender "{message}"\n'.encode(), ("127.0.0.1", SENDER_PORT))
+
+        messenger.events.subscribe(MESSAGE, on_message, maxsize=0)
+        await messenger.start_listener(join=False)
+        await asyncio.sleep(3600)
+
+    asyncio.run(echo())
+
+
+def percentile(values, q):
+    """
+    @brief Liefert das q-Quantil einer sortierten Liste.
+    """
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+async def measure(workdir, args):
+    """
+    @brief Misst MSG-Umlaufzeiten im Leerlauf und während eines Uploads.
+
+    @return (Umlaufzeiten im Leerlauf, Umlaufzeiten während des Uploads, Uploaddauer) in Sekunden
+    """
+    messenger = Messenger(make_config(workdir, "Sender", SENDER_PORT, args))
+    messenger.output = lambda text: None
+    messenger.peers["Echo"] = ("127.0.0.1", ECHO_PORT)
+    rtts = []
+
+    def on_message(sender, message, address):
+        rtts.append(time.perf_counter() - float(message))
+
+    messenger.events.subscribe(MESSAGE, on_message, maxsize=0)
+    await messenger.start_listener(join=False)
+    await asyncio.sleep(1.0)  # Echo-Prozess starten lassen
+
+    stop = asyncio.Event()
+
+    async def pinger():
+        while not stop.is_set():
+            await messenger.send_message("Echo", repr(time.perf_counter()))
+            await asyncio.sleep(args.interval / 1000)
+
+    ping_task = asyncio.create_task(pinger())
+    await asyncio.sleep(0.5)
+    idle, rtts[:] = list(rtts), []
+
+    image = os.path.join(workdir, "test.png")
+    with open(image, "wb") as f:
+        f.write(bytes(args.size_mb * 1024 * 1024))
+    started = time.perf_counter()
+    ok = await messenger.send_image("Echo", image)
+    duration = time.perf_counter() - started
+    stop.set()
+    await ping_task
+    await asyncio.sleep(0.2)
+    if not ok:
+        raise RuntimeError("Upload fehlgeschlagen")
+    return idle, list(rtts), duration
+
+
+def main(argv=None):
+    """
+    @brief Startet Echo-Peer und Messung und gibt die Latenzen aus.
+
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0 bei Erfolg, 1 wenn --max-p99 überschritten wurde
+    """
+    parser = argparse.ArgumentParser(description="MSG-Latenz während einer Bildübertragung (Loopback)")
+    parser.add_argument("--size-mb", type=int, default=200, help="Bildgröße in MiB")
+    parser.add_argument("--limit", type=int, default=0, help="bandwidth_limit in Bytes/s (0 = unbegrenzt)")
+    parser.add_argument("--peer-limit", type=int, default=0, help="bandwidth_peer_limit in Bytes/s")
+    parser.add_argument("--interval", type=float, default=10.0, help="Abstand der Pings in ms")
+    parser.add_argument("--max-p99", type=float, default=None, help="Obergrenze für das 99. Perzentil in ms")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        echo = multiprocessing.Process(target=run_echo, args=(workdir, args), daemon=True)
+        echo.start()
+        try:
+            idle, busy, duration = asyncio.run(measure(workdir, args))
+        finally:
+            echo.terminate()
+
+    busy_ms = sorted(r * 1000 for r in busy)
+    print(f"Upload {args.size_mb} MiB in {duration:.2f} s ({args.size_mb / duration:.0f} MiB/s), "
+          f"Limit {args.limit or 'aus'} / pro Peer {args.peer_limit or 'aus'}")
+    print(f"MSG-Umlaufzeit Leerlauf: p50 {statistics.median(idle) * 1000:.2f} ms")
+    print(f"MSG-Umlaufzeit Upload:   n={len(busy_ms)} p50 {percentile(busy_ms, 0.5):.2f} ms "
+          f"p99 {percentile(busy_ms, 0.99):.2f} ms max {busy_ms[-1] if busy_ms else float('nan'):.2f} ms")
+    if args.max_p99 is not None and not percentile(busy_ms, 0.99) <= args.max_p99:
+        print(f"FEHLER: p99 über {args.max_p99} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+@file multicast_loopback.py
+@brief Loopback-Prüfung des Discovery-Versands per Multicast und des Broadcast-Fallbacks.
+
+Ein einfacher UDP-Socket tritt auf 127.0.0.1 der Multicast-Gruppe bei und lauscht auf dem
+whoisport. Geprüft wird:
+- multicast: Ein Messenger mit discovery_mode = "multicast" und multicast_interface = "127.0.0.1"
+  sendet JOIN an die Gruppe, der Socket empfängt es.
+- fallback: Mit einer ungültigen Gruppe (keine Multicast-Adresse) fällt der Messenger beim Start
+  auf Broadcast zurück, statt später ins Leere zu senden.
+
+Voraussetzung: Linux mit Multicast auf dem Loopback-Interface (Standard).
+
+Aufruf: `python -m benchmarks.multicast_loopback [--group 239.255.76.67]`
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+from Chat.common.multicast import BROADCAST_ADDR, setup_multicast
+from Chat.config.config import Config
+from Chat.network.messenger import Messenger
+
+WHOIS_PORT = 6691
+MESSENGER_PORT = 6692
+
+
+def make_config(workdir, group):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration im Multicast-Modus auf Loopback.
+    """
+    overrides = {"handle": "Sender", "port": MESSENGER_PORT, "whoisport": WHOIS_PORT, "peer_cache": "",
+                 "imagepath": os.path.join(workdir, "img"), "loop_monitor": False,
+                 "discovery_mode": "multicast", "multicast_group": group,
+                 "multicast_interface": "127.0.0.1"}
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+def open_listener(group):
+    """
+    @brief Öffnet einen Socket auf dem whoisport, der auf 127.0.0.1 der Gruppe beigetreten ist.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("", WHOIS_PORT))
+    setup_multicast(sock, group, 1, "127.0.0.1")
+    sock.settimeout(2.0)
+    return sock
+
+
+async def send_join(workdir, group):
+    """
+    @brief Startet einen Messenger, sendet JOIN und liefert die verwendete Discovery-Adresse.
+    @return (discovery_addr, Ergebnis von send_join)
+    """
+    messenger = Messenger(make_config(workdir, group))
+    messenger.output = lambda text: None
+    await messenger.start_listener(join=False)
+    ok = await messenger.send_join()
+    await asyncio.sleep(0.1)
+    messenger.transport.close()
+    messenger.io.shutdown()
+    return messenger.discovery_addr, ok
+
+
+def main(argv=None):
+    """
+    @brief Führt beide Fälle aus.
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0, wenn beide Fälle erfolgreich waren, sonst 1
+    """
+    parser = argparse.ArgumentParser(description="Multicast-Discovery und Broadcast-Fallback auf Loopback")
+    parser.add_argument("--group", default="239.255.76.67", help="Multicast-Gruppe")
+    args = parser.parse_args(argv)
+
+    errors = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            listener = open_listener(args.group)
+        except OSError as e:
+            print(f"FEHLER: Multicast auf Loopback nicht verfügbar ({e})")
+            return 1
+        with listener:
+            target, ok = asyncio.run(send_join(workdir, args.group))
+            try:
+                data, addr = listener.recvfrom(65535)
+                received = data.decode(errors="replace").strip()
+            except socket.timeout:
+                received = None
+            print(f"multicast: Ziel {target}, empfangen: {received!r}")
+            if target != args.group or not ok:
+                errors.append(f"multicast: Ziel {target} statt {args.group}")
+            if received is None or not received.startswith("JOIN Sender"):
+                errors.append("multicast: JOIN nicht über die Gruppe empfangen")
+
+        target, ok = asyncio.run(send_join(workdir, "192.0.2.250"))
+        print(f"fallback:  Ziel {target} bei ungültiger Gruppe")
+        if target != BROADCAST_ADDR:
+            errors.append(f"fallback: Ziel {target} statt {BROADCAST_ADDR}")
+
+    for error in errors:
+        print(f"FEHLER: {error}")
+    if not errors:
+        print("OK: JOIN per Multicast zugestellt, Fallback auf Broadcast beim Start erkannt")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
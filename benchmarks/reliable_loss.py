@@ -0,0 +1,105 @@
+"""
+@file reliable_loss.py
+@brief Loopback-Prüfung des zuverlässigen Modus unter Paketverlust und Umordnung.
+
+Ein Sender (reliable = true) schickt N nummerierte Nachrichten an einen Empfänger mit
+Standardkonfiguration. Beide Transporte werden mit LossyTransport umhüllt, sodass Nachrichten
+und ACKs verloren gehen oder umgeordnet werden. Geprüft wird, dass jede Nachricht genau einmal
+und in Reihenfolge ausgeliefert und vom Sender als bestätigt gemeldet wird.
+
+Aufruf: `python -m benchmarks.reliable_loss [--count 500] [--loss 0.2] [--reorder 0.2] [--seed 1]`
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from Chat.config.config import Config
+from Chat.network.events import MESSAGE
+from Chat.network.lossy_transport import LossyTransport
+from Chat.network.messenger import Messenger
+
+SENDER_PORT = 6661
+RECEIVER_PORT = 6662
+
+
+def make_config(workdir, handle, port, reliable, args):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration für den Test.
+    """
+    overrides = {"handle": handle, "port": port, "whoisport": 4000, "peer_cache": "",
+                 "imagepath": os.path.join(workdir, f"img_{handle}"), "loop_monitor": False,
+                 "reliable": reliable, "reliable_retries": args.retries,
+                 "rate_limits": {"msg": [0, 1]}}
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+async def run(workdir, args):
+    """
+    @brief Sendet die Nachrichten und prüft die Auslieferung.
+    @return (ausgelieferte Nachrichten, Ergebnisse des Senders, Dauer, Sender, Empfänger)
+    """
+    sender = Messenger(make_config(workdir, "Sender", SENDER_PORT, True, args))
+    receiver = Messenger(make_config(workdir, "Receiver", RECEIVER_PORT, False, args))
+    delivered = []
+    receiver.events.subscribe(MESSAGE, lambda handle, message, address: delivered.append(message), maxsize=0)
+    for messenger in (sender, receiver):
+        messenger.output = lambda text: None
+        await messenger.start_listener(join=False)
+    sender.transport = LossyTransport(sender.transport, args.loss, args.reorder, seed=args.seed)
+    receiver.transport = LossyTransport(receiver.transport, args.loss, args.reorder, seed=args.seed + 1)
+    sender.peers["Receiver"] = ("127.0.0.1", RECEIVER_PORT)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(sender.send_message("Receiver", f"m{i}") for i in range(args.count)))
+    await asyncio.sleep(0.2)  # Letzte ACKs und Auslieferungen abwarten
+    elapsed = time.perf_counter() - started
+
+    for messenger in (sender, receiver):
+        messenger.transport.close()
+        messenger.io.shutdown()
+    return delivered, results, elapsed, sender, receiver
+
+
+def main(argv=None):
+    """
+    @brief Führt die Prüfung aus.
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0, wenn alle Nachrichten genau einmal und in Reihenfolge ankamen, sonst 1
+    """
+    parser = argparse.ArgumentParser(description="Zuverlässiger Modus unter Verlust und Umordnung (Loopback)")
+    parser.add_argument("--count", type=int, default=500, help="Anzahl Nachrichten")
+    parser.add_argument("--loss", type=float, default=0.2, help="Verlustrate je Richtung (0.0–1.0)")
+    parser.add_argument("--reorder", type=float, default=0.2, help="Anteil umgeordneter Datagramme")
+    parser.add_argument("--retries", type=int, default=16, help="reliable_retries des Senders")
+    parser.add_argument("--seed", type=int, default=1, help="Seed für reproduzierbare Verluste")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        delivered, results, elapsed, sender, receiver = asyncio.run(run(workdir, args))
+
+    expected = [f"m{i}" for i in range(args.count)]
+    print(f"{args.count} Nachrichten in {elapsed:.2f} s, Verlust {args.loss:.0%}, Umordnung {args.reorder:.0%}")
+    print(f"Verworfen: {sender.transport.dropped} Daten / {receiver.transport.dropped} ACKs, "
+          f"Wiederholungen: {sender.reliable.retransmits}, "
+          f"Duplikate beim Empfänger: {getattr(receiver.reliable_receiver, 'duplicates', 0)}")
+    errors = []
+    if delivered != expected:
+        missing = len(set(expected) - set(delivered))
+        duplicated = len(delivered) - len(set(delivered))
+        ordered = delivered == sorted(delivered, key=lambda m: int(m[1:]))
+        errors.append(f"Auslieferung weicht ab: {missing} fehlen, {duplicated} doppelt, "
+                      f"Reihenfolge {'korrekt' if ordered else 'falsch'}")
+    if not all(results):
+        errors.append(f"{results.count(False)} Nachrichten vom Sender als verloren gemeldet")
+    for error in errors:
+        print(f"FEHLER: {error}")
+    if not errors:
+        print("OK: jede Nachricht genau einmal und in Reihenfolge ausgeliefert")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+@file replay.py
+@brief Spielt einen SLCP-Mitschnitt (capture_file) in einen Messenger ein und misst den Durchsatz.
+
+Die mitgeschnittenen Datagramme werden direkt an Messenger.datagram_received übergeben, TCP-Kopfzeilen
+(optional mit synthetischen Bilddaten) an Messenger.handle_tcp_connection. Antworten des Messengers
+werden nicht gesendet, sondern nur gezählt, sodass echter Verkehr ohne Netzwerk und ohne Nebenwirkungen
+wiederholbar abgespielt werden kann. Datagramme des Discovery-Dienstes (JOIN/LEAVE/WHO) werden
+ebenfalls dem Messenger übergeben, der dieselben Befehle verarbeitet.
+
+Geschwindigkeit: --speed 1 (Original), --speed 10 (zehnfach) oder --speed 0 (so schnell wie möglich).
+
+Aufruf: `python -m benchmarks.replay mitschnitt.slcpcap [--speed 0] [--repeat 10] [--no-rate-limit]`
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from Chat.common.capture import KIND_NAMES, KIND_TCP, read_capture
+from Chat.common.rate_limit import DEFAULT_BUDGETS
+from Chat.config.config import Config
+from Chat.network.events import MESSAGE
+from Chat.network.messenger import Messenger
+
+## Anzahl eingespielter Einträge, nach denen im Modus --speed 0 der Eventloop freigegeben wird
+BATCH = 64
+
+
+class _NullSocket:
+    """
+    @class _NullSocket
+    @brief Platzhalter-Socket für set_traffic_class() bei eingespielten TCP-Verbindungen.
+    """
+
+    def setsockopt(self, *args):
+        pass
+
+
+class _NullTransport:
+    """
+    @class _NullTransport
+    @brief UDP-Transport, der Antworten nur zählt statt sie zu senden.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.sent_bytes = 0
+
+    def sendto(self, data, addr=None):
+        self.sent += 1
+        self.sent_bytes += len(data)
+
+    def get_extra_info(self, name, default=None):
+        return _NullSocket() if name == "socket" else default
+
+    def close(self):
+        pass
+
+
+class _NullWriter:
+    """
+    @class _NullWriter
+    @brief StreamWriter-Ersatz für eingespielte TCP-Verbindungen.
+    """
+
+    def __init__(self, addr):
+        self.addr = addr
+
+    def get_extra_info(self, name, default=None):
+        if name == "peername":
+            return self.addr
+        return _NullSocket() if name == "socket" else default
+
+    def write(self, data):
+        pass
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+
+def tcp_reader(header, max_image_bytes):
+    """
+    @brief Erstellt einen StreamReader mit einer mitgeschnittenen Kopfzeile und synthetischen Bilddaten.
+    @param header Kopfzeile (z. B. b"IMG Bob 1234\\n")
+    @param max_image_bytes Obergrenze der synthetischen Bilddaten; größere Bilder werden abgeschnitten
+    @return asyncio.StreamReader
+    """
+    reader = asyncio.StreamReader()
+    reader.feed_data(header)
+    parts = header.split()
+    if len(parts) >= 3 and parts[0] == b"IMG" and parts[2].isdigit():
+        reader.feed_data(bytes(min(int(parts[2]), max_image_bytes)))
+    reader.feed_eof()
+    return reader
+
+
+async def replay(records, messenger, speed, max_image_bytes):
+    """
+    @brief Spielt Einträge in einen Messenger ein und wartet, bis alle ausgelösten Tasks fertig sind.
+    @param records Liste von (Zeitpunkt, Art, (ip, port), Rohdaten)
+    @param messenger Messenger mit _NullTransport
+    @param speed Zeitfaktor (1 = Originaltempo, 0 = so schnell wie möglich)
+    @param max_image_bytes Obergrenze synthetischer Bilddaten pro TCP-Verbindung
+    @return (Wanduhrzeit, CPU-Zeit) in Sekunden
+    """
+    loop = asyncio.get_running_loop()
+    current = asyncio.current_task()
+    first = records[0][0] if records else 0.0
+    started, cpu_started = time.perf_counter(), time.process_time()
+
+    for index, (ts, kind, addr, data) in enumerate(records):
+        if speed > 0:
+            delay = started + (ts - first) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif index % BATCH == 0:
+            await asyncio.sleep(0)
+        if kind == KIND_TCP:
+            loop.create_task(messenger.handle_tcp_connection(tcp_reader(data, max_image_bytes), _NullWriter(addr)))
+        else:
+            messenger.datagram_received(data, addr)
+
+    while True:
+        pending = [t for t in asyncio.all_tasks() if t is not current]
+        if not pending:
+            break
+        await asyncio.wait(pending)
+    return time.perf_counter() - started, time.process_time() - cpu_started
+
+
+def main(argv=None):
+    """
+    @brief Liest den Mitschnitt, spielt ihn ein und gibt Durchsatz und Ergebnisse aus.
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0 bei Erfolg, 2 bei ungültiger Datei
+    """
+    parser = argparse.ArgumentParser(description="SLCP-Mitschnitt in einen Messenger einspielen")
+    parser.add_argument("capture", help="Mitschnittdatei (capture_file)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Zeitfaktor: 1 = Originaltempo, 0 = so schnell wie möglich")
+    parser.add_argument("--repeat", type=int, default=1, help="Mitschnitt n-mal hintereinander einspielen")
+    parser.add_argument("--kinds", default="udp,discovery,tcp",
+                        help="Einzuspielende Arten (udp, discovery, tcp)")
+    parser.add_argument("--handle", help="Eigenes Handle (Standard: Handle aus dem Mitschnitt)")
+    parser.add_argument("--no-rate-limit", action="store_true", help="Ratenbegrenzung abschalten")
+    parser.add_argument("--max-image-bytes", type=int, default=1024 * 1024,
+                        help="Obergrenze synthetischer Bilddaten pro TCP-Verbindung")
+    args = parser.parse_args(argv)
+
+    try:
+        handle, records = read_capture(args.capture)
+    except (OSError, ValueError) as e:
+        print(f"[Error] {e}", file=sys.stderr)
+        return 2
+    kinds = {k for k, name in KIND_NAMES.items() if name in args.kinds.split(",")}
+    records = [r for r in records if r[1] in kinds]
+    if records and args.repeat > 1:
+        span = records[-1][0] - records[0][0] + 0.001
+        records = [(ts + span * n, kind, addr, data) for n in range(args.repeat)
+                   for ts, kind, addr, data in records]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        overrides = {
+            "handle": args.handle or handle or "Replay", "port": 1, "whoisport": 4000,
+            "imagepath": os.path.join(workdir, "img"), "quiet": True, "loop_monitor": False,
+        }
+        if args.no_rate_limit:
+            overrides["rate_limits"] = {name: [0, 1] for name in DEFAULT_BUDGETS}
+        messenger = Messenger(Config(os.path.join(workdir, "none.toml"), overrides, interactive=False))
+        messenger.transport = _NullTransport()
+        outputs = []
+        messenger.output = outputs.append
+        delivered = []
+
+        def on_message(sender, message, address):
+            delivered.append(message)
+
+        messenger.events.subscribe(MESSAGE, on_message, maxsize=0)
+        wall, cpu = asyncio.run(replay(records, messenger, args.speed, args.max_image_bytes))
+        messenger.io.shutdown()
+
+    total_bytes = sum(len(r[3]) for r in records)
+    print(f"Mitschnitt {args.capture} (Handle {handle or '-'}): {len(records)} Einträge, {total_bytes} Bytes, "
+          f"Tempo {'max' if args.speed <= 0 else args.speed}")
+    print(f"Dauer {wall:.3f} s, CPU {cpu:.3f} s → {len(records) / wall:.0f} Einträge/s, "
+          f"{total_bytes / wall / 1e6:.2f} MB/s, {cpu / max(1, len(records)) * 1e6:.1f} µs CPU pro Eintrag")
+    print(f"Zugestellte Nachrichten: {len(delivered)}, Antworten: {messenger.transport.sent} "
+          f"({messenger.transport.sent_bytes} Bytes), Statusmeldungen: {len(outputs)}")
+    if messenger.limiter.dropped:
+        print(f"Durch Ratenbegrenzung verworfen: {dict(messenger.limiter.dropped)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+"""
+@file transfer_throughput.py
+@brief Loopback-Test: Durchsatz der Bildübertragung (send_image → handle_tcp_connection) Ende zu Ende.
+
+Ein Empfänger (eigener Prozess, Messenger mit TCP-Server) löscht jedes empfangene Bild sofort
+wieder. Der Sender überträgt für jede Kombination aus Dateigröße und Parallelität so viele
+Dateien, dass mindestens --min-mb übertragen werden (höchstens --max-files, mindestens eine pro
+paralleler Übertragung), mit --repeat mehrfach (berichtet wird der Median). Gemessen werden pro
+Fall auf beiden Seiten:
+- Durchsatz in MiB/s (bis der Empfänger das letzte Bild gespeichert hat),
+- CPU-Zeit pro MiB (Prozesszeit von Sender und Empfänger),
+- Spitzen-RSS (alle 5 ms abgetastet) und
+- Lag des Eventloops (LoopMonitor des Messengers: p50/p99/max und Anzahl blockierender Callbacks).
+
+Fälle mit Größe × Parallelität über --max-case-mb werden übersprungen (Plattenplatz).
+Mit --output werden die Ergebnisse als JSON gespeichert, mit --compare einem früheren Lauf
+gegenübergestellt.
+
+Aufruf: `python -m benchmarks.transfer_throughput [--sizes 10K,1M,100M,1G] [--concurrency 1,4,16,64]
+[--output neu.json] [--compare alt.json]`
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from Chat.config.config import Config
+from Chat.network.events import IMAGE
+from Chat.network.memory import rss_bytes
+from Chat.network.messenger import Messenger
+
+SENDER_PORT = 6651
+RECEIVER_PORT = 6652
+
+## Einheiten für --sizes
+UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+MIB = 1024 * 1024
+
+## Sekunden ohne neues Bild, nach denen der Empfänger fehlende Übertragungen als verloren meldet
+IDLE_TIMEOUT = 10.0
+
+
+def parse_size(text):
+    """
+    @brief Wandelt eine Größenangabe wie "10K", "100M" oder "1G" in Bytes um.
+    @throws ValueError Bei ungültiger Angabe
+    """
+    text = text.strip().upper().removesuffix("B")
+    unit = text[-1:] if text[-1:] in UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * UNITS[unit])
+
+
+def format_size(size):
+    """
+    @brief Kurzform einer Größe in Bytes (z. B. 10K, 1G).
+    """
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return str(size)
+
+
+def make_config(workdir, handle, port, args):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration für den Test.
+    @details Die Anzahl paralleler Übertragungen wird auf die größte Parallelität angehoben, damit
+             sie die Messung nicht begrenzt; die Warteschlange behält ihr Standardlimit. Der Sender
+             wartet auf IMGOK, abgelehnte Übertragungen zählen daher als fehlgeschlagen. Der
+             Eventloop wird mit 10 ms Auflösung überwacht.
+    """
+    most = max(args.concurrency)
+    overrides = {"handle": handle, "port": port, "whoisport": 4000, "peer_cache": "",
+                 "imagepath": os.path.join(workdir, f"img_{handle}"),
+                 "transfer_max_active": most, "transfer_max_per_peer": most,
+                 "transfer_memory_budget": args.memory_budget,
+                 "loop_monitor": True, "slow_callback_ms": 20}
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+class RssSampler:
+    """
+    @class RssSampler
+    @brief Tastet den RSS des Prozesses in einem Thread ab und merkt sich das Maximum.
+    """
+
+    def __init__(self, period=0.005):
+        """
+        @brief Startet den Abtast-Thread.
+        @param period Abstand der Messungen in Sekunden
+        """
+        self.period = period
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+
+    def reset(self):
+        """
+        @brief Beginnt eine neue Messung beim aktuellen RSS.
+        """
+        self.peak = rss_bytes()[0] or 0
+
+    def _run(self):
+        """
+        @brief Abtast-Thread: liest den RSS und aktualisiert das Maximum.
+        """
+        while not self._stop.wait(self.period):
+            current = rss_bytes()[0] or 0
+            if current > self.peak:
+                self.peak = current
+
+    def stop(self):
+        """
+        @brief Beendet den Abtast-Thread.
+        """
+        self._stop.set()
+
+
+class SideStats:
+    """
+    @class SideStats
+    @brief Misst CPU-Zeit, Spitzen-RSS und Eventloop-Lag einer Seite für einen Fall.
+    """
+
+    def __init__(self, messenger):
+        """
+        @param messenger Messenger der Seite (mit LoopMonitor)
+        """
+        self.messenger = messenger
+        self.rss = RssSampler()
+        self.cpu = 0.0
+        self.slow = 0
+
+    def begin(self):
+        """
+        @brief Beginnt die Messung eines Falls.
+        """
+        monitor = self.messenger.loop_monitor
+        monitor.samples = deque()  # Unbegrenzt: alle Messwerte des Falls
+        self.slow = monitor.slow_total
+        self.rss.reset()
+        self.cpu = time.process_time()
+
+    def end(self):
+        """
+        @brief Beendet die Messung eines Falls.
+        @return Dictionary mit cpu_s, peak_rss und lag (Millisekunden)
+        """
+        cpu = time.process_time() - self.cpu
+        monitor = self.messenger.loop_monitor
+        lag = monitor.percentiles((0.5, 0.99)) or {0.5: 0.0, 0.99: 0.0, "max": 0.0}
+        return {"cpu_s": cpu, "peak_rss": self.rss.peak,
+                "lag_ms": {"p50": lag[0.5] * 1000, "p99": lag[0.99] * 1000, "max": lag["max"] * 1000},
+                "slow_callbacks": monitor.slow_total - self.slow}
+
+
+def run_receiver(workdir, args, conn):
+    """
+    @brief Prozess des Empfängers: empfängt Bilder, löscht sie und meldet Messwerte über conn.
+    @details Befehle: ("begin",) startet eine Messung, ("end", n) antwortet, sobald n Bilder
+             empfangen wurden oder IDLE_TIMEOUT Sekunden lang keins mehr eintraf, ("stop",)
+             beendet den Prozess.
+    """
+    async def receive():
+        messenger = Messenger(make_config(workdir, "Receiver", RECEIVER_PORT, args))
+        messenger.output = lambda text: None
+        stats = SideStats(messenger)
+        received = [0]
+        done = asyncio.Event()
+        waiting = [None]
+
+        def on_image(handle, filename):
+            os.remove(filename)
+            received[0] += 1
+            if waiting[0] is not None and received[0] >= waiting[0]:
+                done.set()
+
+        async def finish(count):
+            waiting[0] = count
+            while received[0] < count:
+                before = received[0]
+                try:
+                    await asyncio.wait_for(done.wait(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    if received[0] == before:
+                        break  # Verlorene Übertragungen (z. B. vom TransferManager abgelehnt)
+            result = stats.end()
+            result["received"] = received[0]
+            conn.send(result)
+
+        def on_command():
+            command = conn.recv()
+            if command[0] == "begin":
+                received[0], waiting[0] = 0, None
+                done.clear()
+                stats.begin()
+                conn.send("ok")
+            elif command[0] == "end":
+                asyncio.create_task(finish(command[1]))
+            else:
+                stopped.set()
+
+        messenger.events.subscribe(IMAGE, on_image, maxsize=0)
+        stopped = asyncio.Event()
+        asyncio.get_running_loop().add_reader(conn.fileno(), on_command)
+        await messenger.start_listener(join=False)
+        await asyncio.sleep(0.2)  # TCP-Server starten lassen
+        conn.send("ready")
+        await stopped.wait()
+        messenger.io.shutdown()
+
+    asyncio.run(receive())
+
+
+def make_file(workdir, size):
+    """
+    @brief Legt eine Testdatei der angegebenen Größe an (nicht sparse, damit wirklich gelesen wird).
+    @return Pfad der Datei
+    """
+    path = os.path.join(workdir, f"test_{format_size(size)}.png")
+    block = os.urandom(min(size, MIB))
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining:
+            remaining -= f.write(block[:remaining])
+    return path
+
+
+async def run_case(messenger, stats, conn, path, size, concurrency, files):
+    """
+    @brief Überträgt files Dateien mit concurrency parallelen send_image-Aufrufen.
+    @return Ergebnis-Dictionary des Falls
+    """
+    await asyncio.to_thread(conn.send, ("begin",))
+    await asyncio.to_thread(conn.recv)
+    stats.begin()
+    remaining = [files]
+    failed = [0]
+
+    async def worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            if not await messenger.send_image("Receiver", path):
+                failed[0] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    sender = stats.end()
+    await asyncio.to_thread(conn.send, ("end", files - failed[0]))
+    receiver = await asyncio.to_thread(conn.recv)
+    elapsed = time.perf_counter() - started
+
+    mib = size * receiver["received"] / MIB
+    return {"size": size, "concurrency": concurrency, "files": files, "failed": failed[0],
+            "lost": files - failed[0] - receiver["received"],
+            "seconds": elapsed, "mib_s": mib / elapsed,
+            "cpu_ms_per_mib": (sender["cpu_s"] + receiver["cpu_s"]) * 1000 / mib,
+            "sender": sender, "receiver": receiver}
+
+
+def print_result(result, previous=None):
+    """
+    @brief Gibt eine Ergebniszeile aus, mit previous zusätzlich die Änderung gegenüber dem alten Lauf.
+    """
+    s, r = result["sender"], result["receiver"]
+    line = (f"{format_size(result['size']):>5} x{result['concurrency']:<3} {result['files']:>5} Dateien "
+            f"{result['mib_s']:9.1f} MiB/s  CPU {result['cpu_ms_per_mib']:6.2f} ms/MiB  "
+            f"RSS {s['peak_rss'] / MIB:6.1f}/{r['peak_rss'] / MIB:6.1f} MiB  "
+            f"Lag p99 {s['lag_ms']['p99']:5.1f}/{r['lag_ms']['p99']:5.1f} ms "
+            f"max {s['lag_ms']['max']:6.1f}/{r['lag_ms']['max']:6.1f} ms")
+    if result["failed"] or result["lost"]:
+        line += f"  FEHLGESCHLAGEN: {result['failed']}, VERLOREN: {result['lost']}"
+    if previous is not None:
+        line += (f"  | {(result['mib_s'] / previous['mib_s'] - 1) * 100:+.0f} % MiB/s, "
+                 f"{(result['cpu_ms_per_mib'] / previous['cpu_ms_per_mib'] - 1) * 100:+.0f} % CPU")
+    print(line)
+
+
+def git_revision():
+    """
+    @brief Aktueller Commit (für den Vergleich von Läufen), None außerhalb eines Git-Repositorys.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def measure(workdir, args, conn):
+    """
+    @brief Führt alle Fälle aus.
+    @return Liste der Ergebnisse
+    """
+    messenger = Messenger(make_config(workdir, "Sender", SENDER_PORT, args))
+    messenger.output = lambda text: None
+    messenger.peers["Receiver"] = ("127.0.0.1", RECEIVER_PORT)
+    await messenger.start_listener(join=False)
+    stats = SideStats(messenger)
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {(r["size"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    results = []
+    for size in args.sizes:
+        path = None
+        for concurrency in args.concurrency:
+            if size * concurrency > args.max_case_mb * MIB:
+                print(f"{format_size(size):>5} x{concurrency:<3} übersprungen (> --max-case-mb)")
+                continue
+            path = path or await asyncio.to_thread(make_file, workdir, size)
+            files = max(concurrency, min(args.max_files, math.ceil(args.min_mb * MIB / size)))
+            runs = [await run_case(messenger, stats, conn, path, size, concurrency, files)
+                    for _ in range(args.repeat)]
+            result = sorted(runs, key=lambda r: r["mib_s"])[len(runs) // 2]  # Median nach Durchsatz
+            result["runs_mib_s"] = [r["mib_s"] for r in runs]
+            print_result(result, previous.get((size, concurrency)))
+            results.append(result)
+        if path is not None:
+            os.remove(path)
+
+    stats.rss.stop()
+    messenger.transport.close()
+    messenger.io.shutdown()
+    return results
+
+
+def main(argv=None):
+    """
+    @brief Startet Empfänger und Messung, gibt die Ergebnisse aus und speichert sie.
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0 bei Erfolg, 1 wenn Übertragungen fehlgeschlagen oder verloren sind
+    """
+    parser = argparse.ArgumentParser(description="Durchsatz der Bildübertragung über Loopback")
+    parser.add_argument("--sizes", default="10K,100K,1M,10M,100M,1G",
+                        help="Dateigrößen, kommagetrennt (K/M/G)")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Parallele Übertragungen, kommagetrennt")
+    parser.add_argument("--min-mb", type=float, default=64, help="Mindestens übertragene MiB pro Fall")
+    parser.add_argument("--max-files", type=int, default=2000, help="Höchstens übertragene Dateien pro Fall")
+    parser.add_argument("--max-case-mb", type=float, default=2048,
+                        help="Fälle mit Größe × Parallelität darüber überspringen (MiB)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Wiederholungen pro Fall, berichtet wird der Lauf mit dem mittleren Durchsatz")
+    parser.add_argument("--memory-budget", type=int, default=0,
+                        help="transfer_memory_budget beider Seiten in Bytes (0 = unbegrenzt)")
+    parser.add_argument("--output", help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("--compare", help="JSON eines früheren Laufs zum Vergleich")
+    args = parser.parse_args(argv)
+    args.sizes = [parse_size(s) for s in args.sizes.split(",")]
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        conn, child = multiprocessing.Pipe()
+        receiver = multiprocessing.Process(target=run_receiver, args=(workdir, args, child), daemon=True)
+        receiver.start()
+        try:
+            if not conn.poll(30) or conn.recv() != "ready":
+                raise RuntimeError("Empfänger nicht gestartet")
+            results = asyncio.run(measure(workdir, args, conn))
+            conn.send(("stop",))
+            receiver.join(5)
+        finally:
+            receiver.terminate()
+
+    if args.output:
+        meta = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": git_revision(),
+                "python": platform.python_version(), "platform": platform.platform(),
+                "cpus": os.cpu_count(), "memory_budget": args.memory_budget}
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Ergebnisse gespeichert in {args.output}")
+    return 1 if any(r["failed"] or r["lost"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+@file warm_start.py
+@brief Loopback-Test: Zeit bis zur ersten erfolgreichen Nachricht nach dem Start, ohne und mit Peer-Cache.
+
+Ein Peer "Bob" (eigener Prozess, Messenger und Discovery-Dienst auf Port 4000) schickt jede
+Nachricht an den Absender zurück. Gemessen wird ab dem Erzeugen des Messengers von "Alice",
+bis das erste Echo eintrifft:
+- Kaltstart: leerer Cache, Bob wird per Broadcast-WHO gefunden.
+- Warmstart: Peers aus dem beim Kaltstart gespeicherten Cache, Prüfung per Unicast-WHO im Hintergrund.
+
+Aufruf: `python -m benchmarks.warm_start [--runs 5]`
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import toml
+from Chat.config.config import Config
+from Chat.discovery.discovery_service import DiscoveryService
+from Chat.network.events import MESSAGE
+from Chat.network.messenger import Messenger
+
+ALICE_PORT = 6621
+BOB_PORT = 6622
+
+
+def make_config(workdir, handle, port, cache):
+    """
+    @brief Erstellt eine nicht-interaktive Konfiguration für den Test.
+
+    @param workdir Arbeitsverzeichnis
+    @param handle Benutzername
+    @param port UDP/TCP-Port
+    @param cache Pfad des Peer-Caches ("" = aus)
+    @return Config-Objekt
+    """
+    overrides = {"handle": handle, "port": port, "whoisport": 4000, "peer_cache": cache,
+                 "imagepath": os.path.join(workdir, f"img_{handle}"), "loop_monitor": False}
+    return Config(os.path.join(workdir, "none.toml"), overrides, interactive=False)
+
+
+def run_bob(workdir):
+    """
+    @brief Prozess des Peers Bob: Discovery-Dienst und Echo-Messenger.
+    """
+    path = os.path.join(workdir, "bob.toml")
+    with open(path, "w") as f:
+        toml.dump({"handle": "Bob", "port": BOB_PORT, "whoisport": 4000}, f)
+    discovery = DiscoveryService(path)
+    discovery.start()
+
+    async def echo():
+        messenger = Messenger(make_config(workdir, "Bob", BOB_PORT, ""))
+        messenger.output = lambda text: None
+
+        def on_message(sender, message, address):
+            messenger._send_raw(f'MSG Alice "{message}"\n'.encode(), ("127.0.0.1", ALICE_PORT))
+
+        messenger.events.subscribe(MESSAGE, on_message, maxsize=0)
+        await messenger.start_listener(join=False)
+        await asyncio.sleep(3600)
+
+    asyncio.run(echo())
+
+
+async def first_message(workdir, cache):
+    """
+    @brief Startet Alice und misst die Zeit bis zum ersten Echo von Bob.
+
+    @param workdir Arbeitsverzeichnis
+    @param cache Pfad des Peer-Caches
+    @return (Zeit bis zum ersten Echo, Zeit bis zur Bestätigung der Cache-Peers oder None) in Sekunden
+    """
+    started = time.perf_counter()
+    messenger = Messenger(make_config(workdir, "Alice", ALICE_PORT, cache))
+    messenger.output = lambda text: None
+    echoed = asyncio.Event()
+
+    def on_message(sender, message, address):
+        echoed.set()
+
+    messenger.events.subscribe(MESSAGE, on_message, maxsize=0)
+    loaded = messenger.load_peer_cache()
+    await messenger.start_listener(join=False)
+    probe = None
+    if loaded:
+        probe = asyncio.create_task(messenger.probe_peers(loaded))
+    else:
+        await messenger.send_who()
+
+    while True:  # Wie ein Benutzer, der /msg wiederholt, bis es klappt
+        if "Bob" in messenger.peers:
+            await messenger.send_message("Bob", "ping")
+            try:
+                await asyncio.wait_for(echoed.wait(), 0.5)
+                break
+            except asyncio.TimeoutError:
+                continue
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - started
+
+    confirmed = None
+    if probe is not None:
+        await probe
+        confirmed = time.perf_counter() - started
+    await messenger.save_peer_cache()
+    messenger.transport.close()
+    messenger.io.shutdown()
+    await asyncio.sleep(0.1)  # Port freigeben
+    return elapsed, confirmed
+
+
+def main(argv=None):
+    """
+    @brief Misst Kalt- und Warmstarts und gibt die Zeiten aus.
+
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    @return 0
+    """
+    parser = argparse.ArgumentParser(description="Zeit bis zur ersten Nachricht: Kalt- vs. Warmstart")
+    parser.add_argument("--runs", type=int, default=5, help="Anzahl Messungen je Variante")
+    args = parser.parse_args(argv)
+
+    cold, warm, confirm = [], [], []
+    with tempfile.TemporaryDirectory() as workdir:
+        bob = multiprocessing.Process(target=run_bob, args=(workdir,), daemon=True)
+        bob.start()
+        time.sleep(2.0)  # Discovery-Dienst (JOIN/WHO) und Messenger von Bob starten lassen
+        try:
+            for run in range(args.runs):
+                cache = os.path.join(workdir, f"peers_{run}.json")
+                cold.append(asyncio.run(first_message(workdir, cache))[0])
+                elapsed, confirmed = asyncio.run(first_message(workdir, cache))
+                warm.append(elapsed)
+                confirm.append(confirmed)
+        finally:
+            bob.terminate()
+
+    print(f"Kaltstart (Broadcast-WHO): Median {statistics.median(cold) * 1000:.1f} ms, "
+          f"max {max(cold) * 1000:.1f} ms")
+    print(f"Warmstart (Peer-Cache):    Median {statistics.median(warm) * 1000:.1f} ms, "
+          f"max {max(warm) * 1000:.1f} ms")
+    print(f"Cache-Peers per Unicast bestätigt nach: Median {statistics.median(confirm) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+@file wire_format.py
+@brief Benchmark: Kodieren und Dekodieren von Chatnachrichten im Text- und im Binärformat.
+
+Aufruf: `python -m benchmarks.wire_format [--runs 200000]`
+"""
+
+import argparse
+import timeit
+from Chat.common import protocol, binary_protocol
+
+TEXT = "Hallo zusammen, das ist eine ganz normale Chatnachricht mit Umlauten: äöü"
+CHUNK = "x" * 1000
+
+## Je Nachrichtentyp: (Text kodieren, Binär kodieren)
+CASES = {
+    "MSG": (lambda: protocol.create_msg("Bob", TEXT).encode(),
+            lambda: binary_protocol.encode_msg("Bob", TEXT)),
+    "RMSG": (lambda: protocol.create_rmsg("Bob", 123456, 42, TEXT).encode(),
+             lambda: binary_protocol.encode_rmsg("Bob", 123456, 42, TEXT)),
+    "ACK": (lambda: protocol.create_ack(123456, 40, [42, 43, 45]).encode(),
+            lambda: binary_protocol.encode_ack(123456, 40, [42, 43, 45])),
+    "FRAG": (lambda: protocol.create_frag("Bob", 777, 3, 12, CHUNK).encode(),
+             lambda: binary_protocol.encode_frag("Bob", 777, 3, 12, CHUNK)),
+}
+
+
+def measure(func, runs):
+    """
+    @brief Misst die mittlere Laufzeit einer Funktion.
+
+    @param func Zu messende Funktion ohne Argumente
+    @param runs Anzahl Aufrufe
+    @return Mittlere Laufzeit in Nanosekunden
+    """
+    return min(timeit.repeat(func, number=runs, repeat=3)) / runs * 1e9
+
+
+def main(argv=None):
+    """
+    @brief Führt den Vergleich für alle Nachrichtentypen aus und gibt eine Tabelle aus.
+
+    @param argv Argumentliste (Standard: sys.argv[1:])
+    """
+    parser = argparse.ArgumentParser(description="Vergleich Text- vs. Binärformat")
+    parser.add_argument("--runs", type=int, default=200000, help="Aufrufe pro Messung")
+    args = parser.parse_args(argv)
+
+    print(f"{'Typ':6} {'Bytes T/B':>11} {'enc Text':>10} {'enc Bin':>10} {'dec Text':>10} {'dec Bin':>10} {'Faktor':>7}")
+    for name, (encode_text, encode_binary) in CASES.items():
+        text_frame, binary_frame = encode_text(), encode_binary()
+        assert protocol.parse_slcp(text_frame.decode())["type"] == binary_protocol.decode(binary_frame)["type"]
+
+        enc_t = measure(encode_text, args.runs)
+        enc_b = measure(encode_binary, args.runs)
+        dec_t = measure(lambda: protocol.parse_slcp(text_frame.decode()), args.runs)
+        dec_b = measure(lambda: binary_protocol.decode(binary_frame), args.runs)
+        factor = (enc_t + dec_t) / (enc_b + dec_b)
+        print(f"{name:6} {len(text_frame):>5}/{len(binary_frame):<5} {enc_t:>8.0f}ns {enc_b:>8.0f}ns "
+              f"{dec_t:>8.0f}ns {dec_b:>8.0f}ns {factor:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()